@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, status
-from fastapi_pagination import LimitOffsetPage
 
+from app.pagination import LimitOffsetPage
 from app.api.deps import SessionDep, AdminRequired
 from app.faculties import crud as faculties_crud
 from app.faculties import schemas as faculties_schemas
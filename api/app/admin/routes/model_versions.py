@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException, Query
 
 from app.api.deps import SessionDep, AdminRequired
 from app.model_versions import helpers, crud, exceptions
+from app.predictions import jobs as prediction_jobs
 
 router = APIRouter(prefix="/models")
 
@@ -14,6 +15,9 @@ def activate_model(
 ):
     """
     Endpoint to set a specific model as active.
+
+    The whole cohort is scored with the model in a background job, and the
+    model becomes active when the job completes.
     """
     try:
         # Get the model to activate
@@ -28,13 +32,17 @@ def activate_model(
         if model_to_activate.is_active:
             return {"message": "Este modelo ya está activo", "model_id": model_id}
 
-        # Set the model as active
-        crud.set_active_model_version(db, model_to_activate)
+        # Score the students with the model, then set it as active
+        job = prediction_jobs.submit_activation_job(db, model_to_activate)
 
         return {
-            "message": f"Modelo #{model_id} (versión v{model_to_activate.version}.0) activado con éxito",
+            "message": (
+                f"Modelo #{model_id} (versión v{model_to_activate.version}.0) "
+                "se activará cuando se calculen sus predicciones"
+            ),
             "model_id": model_id,
             "model_version": model_to_activate.version,
+            "job_id": job.id,
         }
     except HTTPException as ex:
         raise ex
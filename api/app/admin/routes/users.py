@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, status
 from sqlalchemy.exc import IntegrityError
-from fastapi_pagination import LimitOffsetPage
 
+from app.pagination import LimitOffsetPage
 from app.users import crud as users_crud
 from app.users import constants as user_constants
 from app.api.deps import SessionDep, AdminRequired
@@ -9,7 +9,8 @@ from alembic import context
 # Models
 from app.model_versions.models import ModelVersion  # noqa
 from app.faculties.models import Faculty  # noqa
-from app.predictions.models import Prediction  # noqa
+from app.predictions.models import Prediction, PredictionJob, StudentLatestPrediction  # noqa
+from app.reports.models import DataVersion, ReportSnapshot  # noqa
 from app.students.models import Student  # noqa
 from app.users.models import User  # noqa
 
@@ -0,0 +1,152 @@
+"""partition_predictions
+
+Revision ID: 0a6d2e8c4b17
+Revises: f1c7e4b2d905
+Create Date: 2026-10-18 16:47:13.905521
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6d2e8c4b17"
+down_revision: Union[str, None] = "f1c7e4b2d905"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (
+    "id, student_id, dropout_probability, model_version_id, model_version, "
+    "features_hash, created_at, updated_at"
+)
+
+
+def create_indexes():
+    op.create_index(
+        "predictions_model_version_id_student_id_created_at_idx",
+        "predictions",
+        ["model_version_id", "student_id", sa.text("created_at DESC")],
+        unique=False,
+        postgresql_include=["dropout_probability", "features_hash"],
+    )
+    op.create_index(
+        "predictions_student_id_created_at_idx",
+        "predictions",
+        ["student_id", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+
+def rename_predictions_table():
+    # Free the names of the constraints and indexes for the new table
+    op.rename_table("predictions", "predictions_old")
+    op.drop_index(
+        "predictions_model_version_id_student_id_created_at_idx",
+        table_name="predictions_old",
+    )
+    op.drop_index("predictions_student_id_created_at_idx", table_name="predictions_old")
+    op.drop_constraint("predictions_pkey", "predictions_old")
+    # Keep the id sequence when the old table is dropped
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY NONE")
+
+
+def drop_old_predictions_table():
+    op.drop_table("predictions_old")
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY predictions.id")
+
+
+def upgrade() -> None:
+    rename_predictions_table()
+
+    # Partition the predictions by model version
+    op.create_table(
+        "predictions",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('predictions_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("dropout_probability", sa.Float(), nullable=False),
+        sa.Column("model_version_id", sa.Integer(), nullable=False),
+        sa.Column("model_version", sa.String(), nullable=False),
+        sa.Column("features_hash", sa.String(length=32), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["model_version_id"],
+            ["model_versions.id"],
+            name=op.f("predictions_model_version_id_fkey"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["student_id"], ["students.id"], name=op.f("predictions_student_id_fkey")
+        ),
+        sa.PrimaryKeyConstraint(
+            "id", "model_version_id", name=op.f("predictions_pkey")
+        ),
+        postgresql_partition_by="LIST (model_version_id)",
+    )
+    create_indexes()
+    op.execute("CREATE TABLE predictions_default PARTITION OF predictions DEFAULT")
+    # One partition per model version
+    op.execute(
+        """
+        DO $$
+        DECLARE model_version_id integer;
+        BEGIN
+            FOR model_version_id IN SELECT id FROM model_versions LOOP
+                EXECUTE format(
+                    'CREATE TABLE predictions_mv_%s PARTITION OF predictions '
+                    'FOR VALUES IN (%s)',
+                    model_version_id, model_version_id
+                );
+            END LOOP;
+        END $$
+        """
+    )
+
+    op.execute(
+        f"INSERT INTO predictions ({COLUMNS}) SELECT {COLUMNS} FROM predictions_old"
+    )
+    drop_old_predictions_table()
+
+
+def downgrade() -> None:
+    rename_predictions_table()
+
+    op.create_table(
+        "predictions",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('predictions_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("student_id", sa.Integer(), nullable=False),
+        sa.Column("dropout_probability", sa.Float(), nullable=False),
+        sa.Column("model_version_id", sa.Integer(), nullable=False),
+        sa.Column("model_version", sa.String(), nullable=False),
+        sa.Column("features_hash", sa.String(length=32), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["model_version_id"],
+            ["model_versions.id"],
+            name=op.f("predictions_model_version_id_fkey"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["student_id"], ["students.id"], name=op.f("predictions_student_id_fkey")
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("predictions_pkey")),
+    )
+    create_indexes()
+
+    op.execute(
+        f"INSERT INTO predictions ({COLUMNS}) SELECT {COLUMNS} FROM predictions_old"
+    )
+    # Drops the partitions as well
+    drop_old_predictions_table()
@@ -0,0 +1,44 @@
+"""add_students_search_index
+
+Revision ID: 2b8e5f1a9c64
+Revises: 0a6d2e8c4b17
+Create Date: 2026-10-18 18:02:36.470159
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "2b8e5f1a9c64"
+down_revision: Union[str, None] = "0a6d2e8c4b17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    # unaccent is not immutable, so it's wrapped in a function that can be indexed
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+    op.create_index(
+        "students_search_name_idx",
+        "students",
+        [sa.text("f_unaccent(first_name || ' ' || last_name) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "students_search_name_idx", table_name="students", postgresql_using="gin"
+    )
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
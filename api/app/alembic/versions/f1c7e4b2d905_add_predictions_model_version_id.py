@@ -0,0 +1,120 @@
+"""add_predictions_model_version_id
+
+Revision ID: f1c7e4b2d905
+Revises: e5b9a3d17f26
+Create Date: 2026-10-18 15:21:40.118372
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1c7e4b2d905"
+down_revision: Union[str, None] = "e5b9a3d17f26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def backfill_model_version_id(table: str):
+    # Model version names are built as "v<version>.0"
+    op.add_column(table, sa.Column("model_version_id", sa.Integer(), nullable=True))
+    op.execute(
+        f"UPDATE {table} SET model_version_id = model_versions.id "
+        f"FROM model_versions "
+        f"WHERE {table}.model_version = 'v' || model_versions.version || '.0'"
+    )
+    unmatched = (
+        op.get_bind()
+        .execute(
+            sa.text(
+                f"SELECT DISTINCT model_version FROM {table} "
+                f"WHERE model_version_id IS NULL"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if unmatched:
+        raise RuntimeError(
+            f"The model versions {unmatched} of {table} don't match any "
+            f"'v<version>.0' of model_versions, map them to an existing version "
+            f"before upgrading"
+        )
+    op.alter_column(table, "model_version_id", nullable=False)
+    op.create_foreign_key(
+        op.f(f"{table}_model_version_id_fkey"),
+        table,
+        "model_versions",
+        ["model_version_id"],
+        ["id"],
+    )
+
+
+def upgrade() -> None:
+    backfill_model_version_id("predictions")
+    op.create_index(
+        "predictions_model_version_id_student_id_created_at_idx",
+        "predictions",
+        ["model_version_id", "student_id", sa.text("created_at DESC")],
+        unique=False,
+        postgresql_include=["dropout_probability", "features_hash"],
+    )
+    op.create_index(
+        "predictions_student_id_created_at_idx",
+        "predictions",
+        ["student_id", sa.text("created_at DESC")],
+        unique=False,
+    )
+
+    # Key the latest predictions by model_version_id
+    backfill_model_version_id("student_latest_prediction")
+    op.drop_constraint(
+        op.f("student_latest_prediction_pkey"), "student_latest_prediction"
+    )
+    op.create_primary_key(
+        op.f("student_latest_prediction_pkey"),
+        "student_latest_prediction",
+        ["student_id", "model_version_id"],
+    )
+    op.create_index(
+        "student_latest_prediction_model_version_id_student_id_idx",
+        "student_latest_prediction",
+        ["model_version_id", "student_id"],
+        unique=False,
+        postgresql_include=["dropout_probability", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "student_latest_prediction_model_version_id_student_id_idx",
+        table_name="student_latest_prediction",
+    )
+    op.drop_constraint(
+        op.f("student_latest_prediction_pkey"), "student_latest_prediction"
+    )
+    op.create_primary_key(
+        op.f("student_latest_prediction_pkey"),
+        "student_latest_prediction",
+        ["student_id", "model_version"],
+    )
+    op.drop_constraint(
+        op.f("student_latest_prediction_model_version_id_fkey"),
+        "student_latest_prediction",
+        type_="foreignkey",
+    )
+    op.drop_column("student_latest_prediction", "model_version_id")
+
+    op.drop_index("predictions_student_id_created_at_idx", table_name="predictions")
+    op.drop_index(
+        "predictions_model_version_id_student_id_created_at_idx",
+        table_name="predictions",
+    )
+    op.drop_constraint(
+        op.f("predictions_model_version_id_fkey"), "predictions", type_="foreignkey"
+    )
+    op.drop_column("predictions", "model_version_id")
@@ -28,6 +28,46 @@ class Settings(BaseSettings):
     COOKIE_HTTPONLY: bool = True
     COOKIE_SECURE: bool = True
 
+    # Models
+    MODEL_REGISTRY_SIZE: int = 3
+    MODEL_REGISTRY_ACTIVE_TTL: int = 60
+
+    # Predictions
+    PREDICTION_CHUNK_SIZE: int = 5000
+    PREDICTION_JOB_WORKERS: int = 1
+    # Seconds without heartbeats after which a running job is considered lost
+    PREDICTION_JOB_HEARTBEAT_TIMEOUT: int = 600
+    # Rows per second written by the backfill of a model being activated (0: no limit)
+    PREDICTION_BACKFILL_MAX_ROWS_PER_SECOND: int = 2000
+    # Compaction: latest predictions kept per student and model version, and
+    # model versions whose predictions are kept besides the active one (0: all,
+    # the history of the students is kept unless the operators opt in)
+    PREDICTION_RETENTION_PER_STUDENT: int = 0
+    PREDICTION_RETAINED_MODEL_VERSIONS: int = 0
+    PREDICTION_COMPACTION_INTERVAL_HOURS: int = 24
+    # Maximum wait for the lock of the predictions table when a partition is
+    # created or dropped, so readers don't queue behind the DDL (milliseconds)
+    PREDICTION_PARTITION_LOCK_TIMEOUT_MS: int = 5000
+
+    # Students: latest predictions included in every student of the listings
+    STUDENT_PREDICTION_HISTORY_LIMIT: int = 5
+
+    # Reports: buckets of the probability distribution and risk levels
+    REPORT_DISTRIBUTION_BUCKETS: int = 10
+    REPORT_HIGH_RISK_THRESHOLD: float = 0.7
+    REPORT_MEDIUM_RISK_THRESHOLD: float = 0.4
+    # Report cache: seconds a result is served as is, and then while it's revalidated
+    REPORT_CACHE_TTL: int = 30
+    REPORT_CACHE_MAX_STALE: int = 600
+    # Report snapshots: latest runs per model version whose snapshots are kept (0: all)
+    REPORT_SNAPSHOT_RETENTION: int = 20
+
+    # Pagination totals of the large listings (students, run predictions): exact
+    # (cached), estimate or auto (estimate above the threshold), the others are exact
+    PAGINATION_COUNT_STRATEGY: str = "auto"
+    PAGINATION_COUNT_CACHE_TTL: int = 60
+    PAGINATION_ESTIMATE_THRESHOLD: int = 100_000
+
 
 class DevelopmentSettings(Settings):
     model_config = SettingsConfigDict(env_file=".env.development")
@@ -46,6 +86,11 @@ class TestingSettings(Settings):
     COOKIE_DOMAIN: str | None = None
     COOKIE_SECURE: bool = False
 
+    # Exact totals, data changes between requests
+    PAGINATION_COUNT_STRATEGY: str = "exact"
+    PAGINATION_COUNT_CACHE_TTL: int = 0
+    REPORT_CACHE_TTL: int = 0
+
 
 class ProductionSettings(Settings):
     model_config = SettingsConfigDict(env_file=".env.production")
@@ -1,7 +1,7 @@
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.pagination import paginate
 from app.faculties import models, schemas
 
 
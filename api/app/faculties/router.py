@@ -1,6 +1,6 @@
 from fastapi import APIRouter
-from fastapi_pagination import LimitOffsetPage
 
+from app.pagination import LimitOffsetPage
 from app.api.deps import SessionDep
 from app.faculties import schemas, crud
 
@@ -17,6 +17,8 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.model_versions import tasks as model_version_tasks
+from app.predictions import jobs as prediction_jobs
+from app.predictions import tasks as prediction_tasks
 from app.api.deps import get_db
 
 from app.logger.setup import logger
@@ -37,6 +39,20 @@ def schedule_jobs() -> AsyncIOScheduler:
         args=[next(get_db())],
         id="train_model_job",
     )
+    # Compaction is opt-in, every prediction is kept by default
+    if (
+        settings.PREDICTION_RETENTION_PER_STUDENT > 0
+        or settings.PREDICTION_RETAINED_MODEL_VERSIONS > 0
+    ):
+        logger.info("Adding job to compact the predictions.")
+        scheduler.add_job(
+            prediction_tasks.compact_predictions,
+            trigger=IntervalTrigger(
+                hours=settings.PREDICTION_COMPACTION_INTERVAL_HOURS
+            ),
+            args=[next(get_db())],
+            id="compact_predictions_job",
+        )
     scheduler.start()
     logger.info("Scheduler started successfully.")
     return scheduler
@@ -49,11 +65,14 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 @asynccontextmanager
 async def lifespan(_: FastAPI):
     seeder.seed_db()
+    prediction_tasks.recover_prediction_jobs(next(get_db()))
     logger.info("Initialize scheduler")
     async_scheduler = schedule_jobs()
     yield
     logger.info("Shutdown scheduler")
     async_scheduler.shutdown()
+    logger.info("Shutdown prediction jobs executor")
+    prediction_jobs.shutdown_executor()
 
 
 app_configs = {
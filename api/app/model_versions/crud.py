@@ -2,13 +2,20 @@ import time
 from typing import Any
 
 import joblib
-from fastapi_pagination.ext.sqlalchemy import paginate
+import pandas as pd
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.pagination import paginate
 from app.model_versions import models, constants, exceptions, helpers
+from app.model_versions.registry import model_registry
+from app.reports import crud as report_crud
+from app.reports.cache import report_cache
 from app.students import crud as student_crud
+from app.predictions import crud as prediction_crud
 from app.predictions import helpers as prediction_helpers
+from app.predictions import jobs as prediction_jobs
+from app.predictions.encoder import FeatureEncoder
 
 
 def get_model_versions(
@@ -59,6 +66,10 @@ def get_model_versions(
     return paginate(db, stmt)
 
 
+def get_all_model_versions(db: Session) -> list[models.ModelVersion]:
+    return db.query(models.ModelVersion).order_by(models.ModelVersion.version).all()
+
+
 def get_model_version(db: Session, model_id) -> models.ModelVersion | None:
     return db.query(models.ModelVersion).filter_by(id=model_id).first()
 
@@ -108,6 +119,36 @@ def get_active_model_version(db: Session) -> models.ModelVersion | None:
     return db.query(models.ModelVersion).filter_by(is_active=True).first()
 
 
+def get_retired_model_versions(db: Session, retained: int) -> list[models.ModelVersion]:
+    """Inactive model versions older than the `retained` latest model versions"""
+    return (
+        db.query(models.ModelVersion)
+        .filter(models.ModelVersion.is_active.is_not(True))
+        .order_by(models.ModelVersion.version.desc())
+        .offset(retained)
+        .all()
+    )
+
+
+def get_model_version_or_active(
+    db: Session, model_version_id: int | None = None
+) -> models.ModelVersion | None:
+    """Get the model version by id, or the active one if not provided or not found"""
+    if model_version_id is not None:
+        model_version = get_model_version(db, model_version_id)
+        if model_version is not None:
+            return model_version
+    return get_active_model_version(db)
+
+
+def get_model_version_id_or_active(
+    db: Session, model_version_id: int | None = None
+) -> int | None:
+    """Id of the model version, or of the active one if not provided or not found"""
+    model_version = get_model_version_or_active(db, model_version_id)
+    return model_version.id if model_version else None
+
+
 def set_active_model_version(
     db: Session, new_model_version: models.ModelVersion
 ) -> models.ModelVersion | None:
@@ -116,10 +157,15 @@ def set_active_model_version(
     actual_model_version = get_active_model_version(db)
     if actual_model_version is not None:
         actual_model_version.is_active = False
+        model_registry.invalidate(actual_model_version.id)
 
     # Activate the new model
     new_model_version.is_active = True
+    report_crud.bump_data_version(db, models.ModelVersion.__tablename__)
     db.commit()
+    # Reload the artifact of the new active model on its next use
+    model_registry.invalidate(new_model_version.id)
+    report_cache.invalidate()
     db.refresh(new_model_version)
     return new_model_version
 
@@ -154,6 +200,8 @@ def save_model(
     )
     db.add(model_version)
     db.commit()
+    # Store the predictions of the new model version in their own partition
+    prediction_crud.create_predictions_partition(db, model_version)
     return model_version
 
 
@@ -168,11 +216,15 @@ def train_new_model_version(db: Session) -> (models.ModelVersion, dict, str):
         raise exceptions.NoNewStudentsDataAvailable()
 
     # Fetch all students from the database
-    df = student_crud.get_students_data_for_ia(db, purpose="TRAINING")
+    students_df = student_crud.get_students_data_for_ia(db, purpose="TRAINING")
+    # Encode the students, the model keeps the column order as feature names
+    faculty_mapping = prediction_helpers.get_faculty_mapping(db)
+    encoder = FeatureEncoder.from_vocabularies(sorted(faculty_mapping.values()))
+    df = pd.DataFrame(
+        encoder.transform(students_df, faculty_mapping), columns=encoder.columns
+    )
     # Convert 'estado' to binary 'desercion' column
-    df["desercion"] = df["estado"].apply(lambda x: 1 if x == "A" else 0)
-    # Preprocess the data
-    df = prediction_helpers.preprocess_data(df, db)
+    df["desercion"] = (students_df["estado"] == "A").astype(int).to_numpy()
 
     # Train model
     start_time = time.time()
@@ -195,10 +247,10 @@ def train_new_model_version(db: Session) -> (models.ModelVersion, dict, str):
 
     update_training_status(db, new_model_version)
 
-    # If the model improves performance, set it as active
+    # If the model improves performance, set it as active once its predictions are ready
     if improved:
-        set_active_model_version(db, new_model_version)
-        improvement_message = "El nuevo modelo mejoró el rendimiento por lo que se estableció como activo."
+        prediction_jobs.submit_activation_job(db, new_model_version)
+        improvement_message = "El nuevo modelo mejoró el rendimiento por lo que se establecerá como activo cuando se calculen sus predicciones."
     else:
         improvement_message = "El nuevo modelo no mejoró el rendimiento. La versión anterior se mantiene activa."
 
@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+import joblib
+import numpy as np
+import pandas as pd
+from scipy.special import expit
+from sklearn.linear_model import LogisticRegression
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.model_versions import models
+from app.predictions.encoder import FeatureEncoder
+
+MODEL_FILES_DIRECTORY = "files"
+MODEL_COLUMNS_FILENAME = "model_columns.pkl"
+
+
+class LoadedModel:
+    """Trained estimator of a model version, ready to score students"""
+
+    def __init__(
+        self,
+        model_version_id: int,
+        version: int,
+        estimator: Any,
+        columns: list[str],
+    ):
+        self.model_version_id = model_version_id
+        self.version = version
+        self.estimator = estimator
+        # Columns expected by the estimator, in training order
+        self.columns = columns
+        self.encoder = FeatureEncoder(columns)
+
+    def predict_dropout_probabilities(self, features: np.ndarray) -> np.ndarray:
+        """Probability of class 1 (dropout) for every row of the feature matrix"""
+        if (
+            isinstance(self.estimator, LogisticRegression)
+            and len(self.estimator.classes_) == 2
+        ):
+            # Same computation as predict_proba, without the input validation
+            # which is most of the latency when scoring a single student. Missing
+            # features (NULL columns of the students) are rejected as it does
+            if not np.isfinite(features).all():
+                raise ValueError("Input X contains NaN or infinity.")
+            return expit(
+                features @ self.estimator.coef_[0] + self.estimator.intercept_[0]
+            )
+        if hasattr(self.estimator, "feature_names_in_"):
+            # Models trained on a DataFrame validate the feature names
+            features = pd.DataFrame(features, columns=self.columns, copy=False)
+        return self.estimator.predict_proba(features)[:, 1]
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of trained models keyed by ModelVersion.id.
+
+    Each artifact is deserialized once and kept in a bounded LRU, so scoring
+    endpoints don't pay for joblib.load on every request.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._models: OrderedDict[int, LoadedModel] = OrderedDict()
+        self._lock = threading.RLock()
+        # Id of the active model version and when it was read from the database
+        self._active_model_version_id: int | None = None
+        self._active_checked_at = 0.0
+
+    def get(self, model_version: models.ModelVersion) -> LoadedModel:
+        with self._lock:
+            loaded_model = self._models.get(model_version.id)
+            if loaded_model is not None:
+                self._models.move_to_end(model_version.id)
+                return loaded_model
+
+            estimator = joblib.load(
+                f"{MODEL_FILES_DIRECTORY}/{model_version.model_path}"
+            )
+            loaded_model = LoadedModel(
+                model_version_id=model_version.id,
+                version=model_version.version,
+                estimator=estimator,
+                columns=self._get_model_columns(estimator),
+            )
+            self._models[model_version.id] = loaded_model
+            # Evict the least recently used models
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return loaded_model
+
+    def get_active(self, db: Session) -> LoadedModel | None:
+        """
+        Get the active model without querying the database on every call.
+
+        The active model version is re-read after MODEL_REGISTRY_ACTIVE_TTL
+        seconds, so activations made by other workers are picked up too.
+        """
+        with self._lock:
+            expired = (
+                time.monotonic() - self._active_checked_at
+                > settings.MODEL_REGISTRY_ACTIVE_TTL
+            )
+            if not expired and self._active_model_version_id in self._models:
+                loaded_model = self._models[self._active_model_version_id]
+                self._models.move_to_end(self._active_model_version_id)
+                return loaded_model
+
+            model_version = (
+                db.query(models.ModelVersion).filter_by(is_active=True).first()
+            )
+            if model_version is None:
+                return None
+            self._active_model_version_id = model_version.id
+            self._active_checked_at = time.monotonic()
+            return self.get(model_version)
+
+    @staticmethod
+    def _get_model_columns(estimator: Any) -> list[str]:
+        """Columns the estimator was trained on, in training order"""
+        if hasattr(estimator, "feature_names_in_"):
+            return list(estimator.feature_names_in_)
+        # Models trained without feature names use the shared training columns
+        model_columns = joblib.load(f"{MODEL_FILES_DIRECTORY}/{MODEL_COLUMNS_FILENAME}")
+        return [column for column in model_columns if column != "desercion"]
+
+    def invalidate(self, model_version_id: int):
+        with self._lock:
+            self._models.pop(model_version_id, None)
+            if model_version_id == self._active_model_version_id:
+                self._active_model_version_id = None
+
+    def invalidate_active(self):
+        """Re-read the active model version from the database on its next use"""
+        with self._lock:
+            self._active_model_version_id = None
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self._active_model_version_id = None
+
+
+model_registry = ModelRegistry(max_size=settings.MODEL_REGISTRY_SIZE)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Query
-from fastapi_pagination import LimitOffsetPage
 
+from app.pagination import LimitOffsetPage
 from app.api.deps import SessionDep, UserRequired
 from app.model_versions import schemas, crud, constants
 
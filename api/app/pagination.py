@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Generic, TypeVar
+
+from fastapi_pagination import LimitOffsetPage as BaseLimitOffsetPage
+from fastapi_pagination import LimitOffsetParams
+from fastapi_pagination.api import resolve_params
+from fastapi_pagination.bases import RawParams
+from fastapi_pagination.ext.sqlalchemy import paginate as sqlalchemy_paginate
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.util import find_tables
+
+from app.config import settings
+from app.logger.setup import logger
+from app.reports import crud as report_crud
+
+T = TypeVar("T")
+
+# Cached exact counts
+COUNT_CACHE_SIZE = 1024
+
+
+class CountStrategy(str, Enum):
+    # Exact count, cached per query and data version
+    EXACT = "exact"
+    # Planner estimate (EXPLAIN) for large result sets
+    ESTIMATE = "estimate"
+    # Exact count for small result sets, estimate above the threshold
+    AUTO = "auto"
+
+
+class TotalStrategy(str, Enum):
+    """How the total of a page was obtained"""
+
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+class LimitOffsetPage(BaseLimitOffsetPage[T], Generic[T]):
+    total_strategy: TotalStrategy | None = None
+
+
+class LimitOffsetParamsWithoutTotal(LimitOffsetParams):
+    """Params that skip the COUNT query of fastapi_pagination, the total is set later"""
+
+    def to_raw_params(self) -> RawParams:
+        raw_params = super().to_raw_params()
+        raw_params.include_total = False
+        return raw_params
+
+
+class CountCache:
+    """Exact counts by query, invalidated when the data of its tables changes"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._counts: OrderedDict[str, tuple[int, int, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, data_version: int) -> int | None:
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached is None:
+                return None
+            total, cached_data_version, cached_at = cached
+            expired = time.monotonic() - cached_at > settings.PAGINATION_COUNT_CACHE_TTL
+            if expired or cached_data_version != data_version:
+                del self._counts[key]
+                return None
+            self._counts.move_to_end(key)
+            return total
+
+    def set(self, key: str, data_version: int, total: int):
+        if settings.PAGINATION_COUNT_CACHE_TTL <= 0:
+            return
+        with self._lock:
+            self._counts[key] = (total, data_version, time.monotonic())
+            self._counts.move_to_end(key)
+            while len(self._counts) > self.max_size:
+                self._counts.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+count_cache = CountCache(COUNT_CACHE_SIZE)
+
+
+def get_count_cache_key(db: Session, stmt: Select) -> str:
+    compiled = stmt.compile(dialect=db.get_bind().dialect)
+    return json.dumps([compiled.string, compiled.params], sort_keys=True, default=str)
+
+
+def get_data_version(db: Session, stmt: Select) -> int | None:
+    """
+    Data version of the tables of the query, from the data_versions table
+    (the same version that invalidates the report cache).
+
+    Returns:
+        None if a table of the query isn't versioned, its count is not cached
+    """
+    tables = {table.name for table in find_tables(stmt, include_joins=True)}
+    if not tables <= report_crud.VERSIONED_TABLES:
+        return None
+    return report_crud.get_data_version(db, tables)
+
+
+def get_estimated_count(db: Session, stmt: Select) -> int | None:
+    """Rows of the query estimated by the planner, without running it"""
+    try:
+        # The parameters (search terms) are sent to the driver, not rendered
+        compiled = stmt.compile(
+            dialect=db.get_bind().dialect,
+            compile_kwargs={"render_postcompile": True},
+        )
+        # Savepoint, a failed EXPLAIN must not abort the transaction
+        with db.begin_nested():
+            plan = (
+                db.connection()
+                .exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {compiled.string}", compiled.params
+                )
+                .scalar()
+            )
+    except Exception as e:
+        logger.warning(f"Could not estimate the count of the query: {str(e)}")
+        return None
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_total(
+    db: Session, stmt: Select, estimate: bool = False
+) -> tuple[int, TotalStrategy]:
+    """
+    Total of a paginated query.
+
+    Queries that can return large result sets (estimate) follow
+    settings.PAGINATION_COUNT_STRATEGY, the others are always counted. In
+    auto mode the cached count is used before asking the planner, so only
+    the cache misses run an EXPLAIN.
+
+    Returns:
+        The total and how it was obtained
+    """
+    strategy = CountStrategy.EXACT
+    if estimate:
+        strategy = CountStrategy(settings.PAGINATION_COUNT_STRATEGY)
+    if strategy == CountStrategy.ESTIMATE:
+        estimated = get_estimated_count(db, stmt)
+        if estimated is not None:
+            return estimated, TotalStrategy.ESTIMATED
+
+    key = get_count_cache_key(db, stmt)
+    data_version = get_data_version(db, stmt)
+    if data_version is not None:
+        total = count_cache.get(key, data_version)
+        if total is not None:
+            return total, TotalStrategy.CACHED
+
+    if strategy == CountStrategy.AUTO:
+        estimated = get_estimated_count(db, stmt)
+        if (
+            estimated is not None
+            and estimated >= settings.PAGINATION_ESTIMATE_THRESHOLD
+        ):
+            return estimated, TotalStrategy.ESTIMATED
+
+    count_stmt = select(func.count()).select_from(stmt.order_by(None).subquery())
+    total = db.execute(count_stmt).scalar()
+    if data_version is not None:
+        count_cache.set(key, data_version, total)
+    return total, TotalStrategy.EXACT
+
+
+def paginate(
+    db: Session,
+    stmt: Select,
+    params: LimitOffsetParams | None = None,
+    estimate: bool = False,
+) -> Any:
+    """
+    Paginate the query with limit/offset, like fastapi_pagination's paginate,
+    without running a COUNT of the whole query on every request.
+
+    The total is an exact count cached per query (filters included) and data
+    version of its tables when they're versioned, or a planner estimate for
+    large result sets of the queries that allow it (estimate). The page
+    includes the strategy used (total_strategy).
+    """
+    params = params or resolve_params()
+    params_without_total = LimitOffsetParamsWithoutTotal(
+        limit=params.limit, offset=params.offset
+    )
+    page = sqlalchemy_paginate(db, stmt, params_without_total)
+    page.total, total_strategy = get_total(db, stmt, estimate=estimate)
+    if "total_strategy" in type(page).model_fields:
+        page.total_strategy = total_strategy
+    return page
@@ -0,0 +1,39 @@
+import enum
+
+# Partitions of the predictions table
+PREDICTIONS_DEFAULT_PARTITION = "predictions_default"
+PREDICTIONS_PARTITION_NAME = "predictions_mv_{model_version_id}"
+
+
+class PredictionJobStatus(enum.Enum):
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+class PredictionRunStatus(enum.Enum):
+    # Being written, its predictions are not visible in the listings and reports
+    STAGING = "STAGING"
+    PUBLISHED = "PUBLISHED"
+    # Cancelled or failed, its predictions were deleted
+    DISCARDED = "DISCARDED"
+
+
+class PredictionOutput(enum.Enum):
+    # The run is submitted as a background job, its id is returned right away
+    JOB = "job"
+    # Every scored student with all its fields, as a JSON array
+    RECORDS = "records"
+    # One {student_id, probability, model_version} JSON object per line, streamed
+    NDJSON = "ndjson"
+    # Only the number of scored students and the timings of the run
+    SUMMARY = "summary"
+
+
+class RiskHistoryInterval(enum.Enum):
+    # Last prediction of every day, week or month (date_trunc)
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
@@ -1,10 +1,28 @@
+from datetime import timedelta
+from typing import Iterable
+
+from psycopg2 import errors as pg_errors
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.helpers import get_now_utc
+from app.logger.setup import logger
+from app.pagination import paginate
+from app.model_versions import models as model_version_models
+from app.predictions import constants, exceptions
 from app.predictions import models as prediction_models
+from app.reports import crud as report_crud
 
 
 def create_prediction(
-    db: Session, student_id: int, prediction: float, model_version: str
+    db: Session,
+    student_id: int,
+    prediction: float,
+    model_version: model_version_models.ModelVersion,
+    features_hash: str | None = None,
 ):
     """
     Create a prediction record with dropout probability (0.0 to 1.0).
@@ -13,14 +31,640 @@ def create_prediction(
         db: Database session
         student_id: ID of the student
         prediction: Dropout probability as a float between 0.0 (0%) and 1.0 (100%)
-        model_version: Version of the model used to generate the predictions
+        model_version: Model version used to generate the predictions
+        features_hash: Fingerprint of the student features used for the prediction
     """
     prediction = prediction_models.Prediction(
         student_id=student_id,
         dropout_probability=prediction,
-        model_version=model_version,
+        model_version_id=model_version.id,
+        model_version=f"v{model_version.version}.0",
+        features_hash=features_hash,
     )
     db.add(prediction)
+    db.flush()
+    upsert_latest_predictions(
+        db,
+        [
+            {
+                "student_id": student_id,
+                "dropout_probability": prediction.dropout_probability,
+                "model_version_id": prediction.model_version_id,
+                "model_version": prediction.model_version,
+                "features_hash": features_hash,
+                "created_at": prediction.created_at,
+            }
+        ],
+    )
     db.commit()
     db.refresh(prediction)
     return prediction
+
+
+def upsert_latest_predictions(db: Session, rows: list[dict]):
+    """
+    Keep the latest prediction of every student and model version up to date.
+
+    Args:
+        db: Database session
+        rows: Predictions with student_id, dropout_probability, model_version_id,
+            model_version, features_hash and created_at
+    """
+    # A student can only be upserted once per statement, keep its last prediction
+    rows = list(
+        {(row["student_id"], row["model_version_id"]): row for row in rows}.values()
+    )
+    stmt = pg_insert(prediction_models.StudentLatestPrediction)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "model_version_id"],
+        set_={
+            "dropout_probability": stmt.excluded.dropout_probability,
+            "features_hash": stmt.excluded.features_hash,
+            "created_at": stmt.excluded.created_at,
+            "run_id": stmt.excluded.run_id,
+        },
+        # Don't overwrite a newer prediction
+        where=prediction_models.StudentLatestPrediction.created_at
+        <= stmt.excluded.created_at,
+    )
+    db.execute(stmt, rows)
+    report_crud.bump_data_version(
+        db, prediction_models.StudentLatestPrediction.__tablename__
+    )
+
+
+def create_predictions(
+    db: Session,
+    predictions: Iterable[tuple[int, float, str | None]],
+    model_version: model_version_models.ModelVersion,
+    commit: bool = True,
+    run: prediction_models.PredictionRun | None = None,
+) -> int:
+    """
+    Bulk insert the predictions of a run in a single statement batch.
+
+    The rows are sent with executemany (batched multi-row INSERTs) without
+    RETURNING, so no ORM objects are built or refreshed per student. Without
+    a run, the latest prediction of every student is upserted in the same
+    transaction, otherwise it's updated when the run is published.
+
+    Args:
+        db: Database session
+        predictions: Iterable of (student_id, dropout_probability, features_hash)
+        model_version: Model version used to generate the predictions
+        commit: Commit the transaction after inserting the rows
+        run: Run (in staging) the predictions belong to
+
+    Returns:
+        Number of inserted predictions
+    """
+    created_at = get_now_utc()
+    model_version_str = f"v{model_version.version}.0"
+    rows = [
+        {
+            "student_id": student_id,
+            "dropout_probability": probability,
+            "model_version_id": model_version.id,
+            "model_version": model_version_str,
+            "features_hash": features_hash,
+            "created_at": created_at,
+            "run_id": run.id if run is not None else None,
+        }
+        for student_id, probability, features_hash in predictions
+    ]
+    if not rows:
+        return 0
+
+    db.execute(insert(prediction_models.Prediction), rows)
+    if run is None:
+        upsert_latest_predictions(db, rows)
+    else:
+        run.rows_count += len(rows)
+    if commit:
+        db.commit()
+    return len(rows)
+
+
+def get_student_predictions(
+    db: Session, student_id: int, model_version_id: int | None = None
+):
+    """Paginated prediction history of a student, newest first"""
+    stmt = select(prediction_models.Prediction).where(
+        prediction_models.Prediction.student_id == student_id,
+        prediction_models.get_published_filter(prediction_models.Prediction.run_id),
+    )
+    if model_version_id is not None:
+        stmt = stmt.where(
+            prediction_models.Prediction.model_version_id == model_version_id
+        )
+    stmt = stmt.order_by(
+        prediction_models.Prediction.created_at.desc(),
+        prediction_models.Prediction.id.desc(),
+    )
+    return paginate(db, stmt)
+
+
+def create_prediction_run(
+    db: Session,
+    model_version: model_version_models.ModelVersion,
+    job: prediction_models.PredictionJob | None = None,
+    commit: bool = True,
+) -> prediction_models.PredictionRun:
+    """Create a run in staging, its predictions are not visible until it's published"""
+    run = prediction_models.PredictionRun(
+        model_version_id=model_version.id,
+        job_id=job.id if job is not None else None,
+        started_at=get_now_utc(),
+        rows_count=0,
+    )
+    db.add(run)
+    if commit:
+        db.commit()
+        db.refresh(run)
+    else:
+        db.flush()
+    return run
+
+
+def publish_prediction_run(
+    db: Session,
+    run: prediction_models.PredictionRun,
+    stage_timings: dict[str, float] | None = None,
+):
+    """
+    Make the predictions of a run the latest predictions of its students.
+
+    The latest predictions are upserted from the predictions of the run with
+    a single INSERT ... SELECT (run_id equality, no per-student lookups) and
+    the run is flagged as published in the current transaction, so readers
+    see the whole run or nothing once it's committed.
+
+    Raises:
+        PredictionRunNotInStaging: The run was already published or discarded
+            (e.g. its job was failed by the recovery of another process)
+    """
+    Prediction = prediction_models.Prediction
+    StudentLatestPrediction = prediction_models.StudentLatestPrediction
+    # Locked until the transaction ends, so it can't be discarded meanwhile
+    run_status = db.execute(
+        select(prediction_models.PredictionRun.status)
+        .where(prediction_models.PredictionRun.id == run.id)
+        .with_for_update()
+    ).scalar_one()
+    if run_status != constants.PredictionRunStatus.STAGING:
+        raise exceptions.PredictionRunNotInStaging()
+    columns = [
+        "student_id",
+        "model_version_id",
+        "model_version",
+        "dropout_probability",
+        "features_hash",
+        "created_at",
+        "run_id",
+    ]
+    run_predictions = (
+        select(*[Prediction.__table__.c[column] for column in columns])
+        .where(
+            Prediction.run_id == run.id,
+            Prediction.model_version_id == run.model_version_id,
+        )
+        # A student can only be upserted once per statement
+        .distinct(Prediction.student_id)
+        .order_by(
+            Prediction.student_id, Prediction.created_at.desc(), Prediction.id.desc()
+        )
+    )
+    stmt = pg_insert(StudentLatestPrediction).from_select(columns, run_predictions)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["student_id", "model_version_id"],
+        set_={
+            "dropout_probability": stmt.excluded.dropout_probability,
+            "features_hash": stmt.excluded.features_hash,
+            "created_at": stmt.excluded.created_at,
+            "run_id": stmt.excluded.run_id,
+        },
+        # Don't overwrite a newer prediction
+        where=StudentLatestPrediction.created_at <= stmt.excluded.created_at,
+    )
+    db.execute(stmt)
+    report_crud.bump_data_version(db, StudentLatestPrediction.__tablename__)
+
+    now = get_now_utc()
+    run.status = constants.PredictionRunStatus.PUBLISHED
+    run.finished_at = run.finished_at or now
+    run.published_at = now
+    if stage_timings is not None:
+        run.stage_timings = dict(stage_timings)
+    db.flush()
+
+
+def discard_prediction_run(db: Session, run: prediction_models.PredictionRun):
+    """Delete the predictions of a run in staging (cancelled or failed)"""
+    db.refresh(run, with_for_update=True)
+    if run.status != constants.PredictionRunStatus.STAGING:
+        # Already published by another session
+        return
+    db.execute(
+        delete(prediction_models.Prediction).where(
+            prediction_models.Prediction.run_id == run.id,
+            prediction_models.Prediction.model_version_id == run.model_version_id,
+        )
+    )
+    run.status = constants.PredictionRunStatus.DISCARDED
+    run.finished_at = get_now_utc()
+    db.commit()
+
+
+def get_prediction_run(
+    db: Session, run_id: int
+) -> prediction_models.PredictionRun | None:
+    return db.query(prediction_models.PredictionRun).filter_by(id=run_id).first()
+
+
+def get_prediction_runs(db: Session, model_version_id: int | None = None):
+    """Paginated prediction runs, newest first"""
+    stmt = select(prediction_models.PredictionRun)
+    if model_version_id is not None:
+        stmt = stmt.where(
+            prediction_models.PredictionRun.model_version_id == model_version_id
+        )
+    stmt = stmt.order_by(prediction_models.PredictionRun.id.desc())
+    return paginate(db, stmt)
+
+
+def get_run_predictions(db: Session, run: prediction_models.PredictionRun):
+    """Paginated predictions of a run, by student"""
+    stmt = (
+        select(prediction_models.Prediction)
+        .where(
+            prediction_models.Prediction.run_id == run.id,
+            prediction_models.Prediction.model_version_id == run.model_version_id,
+        )
+        .order_by(prediction_models.Prediction.student_id)
+    )
+    # A run has a prediction per scored student
+    return paginate(db, stmt, estimate=True)
+
+
+def get_student_risk_history(
+    db: Session,
+    student_id: int,
+    points: int,
+    interval: constants.RiskHistoryInterval | None = None,
+    model_version_id: int | None = None,
+) -> list[dict]:
+    """
+    Dropout probability of a student over time, downsampled in the database.
+
+    The predictions are grouped in buckets (by day, week or month, or evenly
+    spaced over the history of the student when no interval is given) and
+    only the last prediction of every bucket is kept. Every model version is
+    a separate series of at most `points` buckets, the most recent ones.
+    The predictions are read through the (student_id, created_at) index.
+
+    Returns:
+        Points with model_version_id, model_version, bucket,
+        dropout_probability and created_at, oldest first
+    """
+    Prediction = prediction_models.Prediction
+    filters = [
+        Prediction.student_id == student_id,
+        prediction_models.get_published_filter(Prediction.run_id),
+    ]
+    if model_version_id is not None:
+        filters.append(Prediction.model_version_id == model_version_id)
+
+    if interval is not None:
+        bucket = func.date_trunc(interval.value, Prediction.created_at)
+    else:
+        first, last = db.execute(
+            select(
+                func.min(Prediction.created_at), func.max(Prediction.created_at)
+            ).where(*filters)
+        ).one()
+        if first is None:
+            return []
+        first_epoch = first.timestamp()
+        width = max((last - first).total_seconds() / points, 1.0)
+        # Bucket number, the last prediction belongs to the last bucket
+        bucket_number = func.least(
+            func.floor(
+                (func.extract("epoch", Prediction.created_at) - first_epoch) / width
+            ),
+            points - 1,
+        )
+        bucket = func.to_timestamp(first_epoch + bucket_number * width)
+
+    last_by_bucket = (
+        select(
+            Prediction.model_version_id,
+            Prediction.model_version,
+            bucket.label("bucket"),
+            Prediction.dropout_probability,
+            Prediction.created_at,
+        )
+        .where(*filters)
+        .distinct(Prediction.model_version_id, bucket)
+        .order_by(
+            Prediction.model_version_id,
+            bucket,
+            Prediction.created_at.desc(),
+            Prediction.id.desc(),
+        )
+        .subquery()
+    )
+    ranked = select(
+        last_by_bucket,
+        func.row_number()
+        .over(
+            partition_by=last_by_bucket.c.model_version_id,
+            order_by=last_by_bucket.c.bucket.desc(),
+        )
+        .label("rn"),
+    ).subquery()
+    stmt = (
+        select(
+            ranked.c.model_version_id,
+            ranked.c.model_version,
+            ranked.c.bucket,
+            ranked.c.dropout_probability,
+            ranked.c.created_at,
+        )
+        .where(ranked.c.rn <= points)
+        .order_by(ranked.c.model_version_id, ranked.c.bucket)
+    )
+    return [row._asdict() for row in db.execute(stmt)]
+
+
+def get_partition_name(model_version_id: int) -> str:
+    return constants.PREDICTIONS_PARTITION_NAME.format(
+        model_version_id=int(model_version_id)
+    )
+
+
+def set_partition_lock_timeout(db: Session):
+    """
+    Limit the wait for the lock of the predictions table in the current
+    transaction. Partition DDL takes an ACCESS EXCLUSIVE lock, and every
+    read of the predictions queues behind it while it waits.
+    """
+    db.execute(
+        select(
+            func.set_config(
+                "lock_timeout",
+                f"{settings.PREDICTION_PARTITION_LOCK_TIMEOUT_MS}ms",
+                True,
+            )
+        )
+    )
+
+
+def create_predictions_partition(
+    db: Session, model_version: model_version_models.ModelVersion
+) -> bool:
+    """
+    Create the partition where the predictions of the model version are stored.
+
+    If the predictions table stays locked (a long transaction writing
+    predictions) for longer than PREDICTION_PARTITION_LOCK_TIMEOUT_MS, the
+    partition is not created and the predictions of the model version are
+    stored in the default partition.
+
+    Returns:
+        Whether the partition was created
+    """
+    partition = get_partition_name(model_version.id)
+    try:
+        set_partition_lock_timeout(db)
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF predictions "
+                f"FOR VALUES IN ({int(model_version.id)})"
+            )
+        )
+        db.commit()
+    except OperationalError as e:
+        db.rollback()
+        if not isinstance(e.orig, pg_errors.LockNotAvailable):
+            raise e
+        logger.warning(
+            f"No se pudo crear la partición {partition}, las predicciones se "
+            "guardarán en la partición por defecto"
+        )
+        return False
+    return True
+
+
+def compact_predictions(
+    db: Session, model_version: model_version_models.ModelVersion, keep: int
+) -> int:
+    """
+    Delete the superseded predictions of a model version, keeping the latest
+    `keep` predictions of every student.
+
+    Returns:
+        Number of deleted predictions
+    """
+    Prediction = prediction_models.Prediction
+    ranked = (
+        select(
+            Prediction.id,
+            func.row_number()
+            .over(
+                partition_by=Prediction.student_id,
+                order_by=(Prediction.created_at.desc(), Prediction.id.desc()),
+            )
+            .label("rn"),
+        )
+        .where(
+            Prediction.model_version_id == model_version.id,
+            # The predictions of runs in staging are neither kept nor deleted
+            prediction_models.get_published_filter(Prediction.run_id),
+        )
+        .subquery()
+    )
+    result = db.execute(
+        delete(Prediction).where(
+            Prediction.model_version_id == model_version.id,
+            Prediction.id.in_(select(ranked.c.id).where(ranked.c.rn > max(keep, 1))),
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+def drop_predictions(
+    db: Session, model_version: model_version_models.ModelVersion
+) -> bool:
+    """
+    Delete every prediction of a retired model version.
+
+    The partition of the model version is detached and dropped, only the
+    predictions stored in the default partition need a DELETE.
+
+    Returns:
+        Whether there was anything to drop, the data version of the latest
+        predictions is only bumped when some of them were deleted
+    """
+    latest = db.execute(
+        delete(prediction_models.StudentLatestPrediction).where(
+            prediction_models.StudentLatestPrediction.model_version_id
+            == model_version.id
+        )
+    )
+    dropped = latest.rowcount > 0
+    if dropped:
+        report_crud.bump_data_version(
+            db, prediction_models.StudentLatestPrediction.__tablename__
+        )
+    partition = get_partition_name(model_version.id)
+    if db.execute(select(func.to_regclass(partition))).scalar() is not None:
+        # Fails instead of blocking the readers, retried by the next compaction
+        set_partition_lock_timeout(db)
+        db.execute(text(f"ALTER TABLE predictions DETACH PARTITION {partition}"))
+        db.execute(text(f"DROP TABLE {partition}"))
+        dropped = True
+    else:
+        result = db.execute(
+            delete(prediction_models.Prediction).where(
+                prediction_models.Prediction.model_version_id == model_version.id
+            )
+        )
+        dropped = dropped or result.rowcount > 0
+    db.commit()
+    return dropped
+
+
+def get_prediction_job(
+    db: Session, job_id: int
+) -> prediction_models.PredictionJob | None:
+    return db.query(prediction_models.PredictionJob).filter_by(id=job_id).first()
+
+
+def get_activation_job_in_progress(
+    db: Session, model_version: model_version_models.ModelVersion
+) -> prediction_models.PredictionJob | None:
+    return (
+        db.query(prediction_models.PredictionJob)
+        .filter_by(model_version_id=model_version.id, activate_model_version=True)
+        .filter(
+            prediction_models.PredictionJob.status.in_(
+                [
+                    constants.PredictionJobStatus.PENDING,
+                    constants.PredictionJobStatus.RUNNING,
+                ]
+            )
+        )
+        .first()
+    )
+
+
+def create_prediction_job(
+    db: Session,
+    model_version: model_version_models.ModelVersion,
+    activate_model_version: bool = False,
+) -> prediction_models.PredictionJob:
+    job = prediction_models.PredictionJob(
+        model_version_id=model_version.id,
+        activate_model_version=activate_model_version,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def claim_prediction_job(
+    db: Session, job_id: int
+) -> prediction_models.PredictionJob | None:
+    """
+    Flag a pending job as running, None if it was already claimed or cancelled.
+
+    A job can be queued by several processes (resubmitted at startup), the
+    conditional UPDATE makes only one of them run it.
+    """
+    PredictionJob = prediction_models.PredictionJob
+    now = get_now_utc()
+    result = db.execute(
+        update(PredictionJob)
+        .where(
+            PredictionJob.id == job_id,
+            PredictionJob.status == constants.PredictionJobStatus.PENDING,
+        )
+        .values(
+            status=constants.PredictionJobStatus.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+        )
+    )
+    db.commit()
+    if result.rowcount == 0:
+        return None
+    return get_prediction_job(db, job_id)
+
+
+def get_pending_prediction_jobs(db: Session) -> list[prediction_models.PredictionJob]:
+    return (
+        db.query(prediction_models.PredictionJob)
+        .filter_by(status=constants.PredictionJobStatus.PENDING)
+        .order_by(prediction_models.PredictionJob.id)
+        .all()
+    )
+
+
+def fail_interrupted_prediction_jobs(db: Session) -> int:
+    """
+    Fail the running jobs whose worker is gone (no heartbeat in
+    PREDICTION_JOB_HEARTBEAT_TIMEOUT seconds), and discard the predictions
+    committed to their runs in staging.
+
+    The jobs of the workers still alive (other API processes, or workers
+    left running by a reload) keep heartbeating and are not touched.
+
+    Returns:
+        Number of failed jobs
+    """
+    PredictionJob = prediction_models.PredictionJob
+    lost_before = get_now_utc() - timedelta(
+        seconds=settings.PREDICTION_JOB_HEARTBEAT_TIMEOUT
+    )
+    interrupted_jobs = (
+        db.query(PredictionJob)
+        .filter(
+            PredictionJob.status == constants.PredictionJobStatus.RUNNING,
+            func.coalesce(PredictionJob.heartbeat_at, PredictionJob.started_at)
+            < lost_before,
+        )
+        .all()
+    )
+    for job in interrupted_jobs:
+        runs = (
+            db.query(prediction_models.PredictionRun)
+            .filter_by(job_id=job.id, status=constants.PredictionRunStatus.STAGING)
+            .all()
+        )
+        for run in runs:
+            discard_prediction_run(db, run)
+        job.status = constants.PredictionJobStatus.FAILED
+        job.error = "Ejecución interrumpida, su proceso dejó de responder"
+        job.finished_at = get_now_utc()
+    db.commit()
+    return len(interrupted_jobs)
+
+
+def cancel_prediction_job(
+    db: Session, job: prediction_models.PredictionJob
+) -> prediction_models.PredictionJob:
+    """
+    Request the cancellation of a job.
+
+    Pending jobs are cancelled right away, running jobs stop (and roll back
+    their predictions) before scoring their next chunk.
+    """
+    job.cancel_requested = True
+    if job.status == constants.PredictionJobStatus.PENDING:
+        job.status = constants.PredictionJobStatus.CANCELLED
+        job.finished_at = get_now_utc()
+    db.commit()
+    db.refresh(job)
+    return job
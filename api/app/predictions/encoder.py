@@ -0,0 +1,164 @@
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.students import constants as student_constants
+
+# Reference date used to calculate the age of the students
+AGE_REFERENCE_YEAR = 2019
+MIN_AGE = 17
+
+NUMERIC_COLUMNS = [
+    "nro_hijos",
+    "anio_egreso",
+    "cuantos_colegios_secundaria",
+    "edad",
+]
+
+# Vocabularies of the categorical variables, faculties are loaded from the database
+CATEGORICAL_VOCABULARIES = {
+    "facultad": None,
+    "estado_civil": student_constants.EstadoCivilEnum,
+    "promedio_secundaria": student_constants.PromedioEnum,
+    "posee_enfermedad": student_constants.EnfermedadEnum,
+    "vive_con": student_constants.ViveConEnum,
+    "situacion_ocupacional": student_constants.SituacionOcupacionalEnum,
+    "sustento_economico": student_constants.SustentoEconomicoEnum,
+    "formacion_academica_padre": student_constants.FormacionEnum,
+    "formacion_academica_madre": student_constants.FormacionEnum,
+    "formacion_academica_hermanos": student_constants.FormacionEnum,
+}
+
+
+class FeatureEncoder:
+    """
+    Encode raw student rows into the feature matrix of a model.
+
+    The encoder is built from the columns the model was trained on, so the
+    output always has the exact same column order. The one-hot encoding of
+    every categorical variable is done in a single vectorized pass, with the
+    same naming as pd.get_dummies ("<column>_<value>").
+    """
+
+    def __init__(self, columns: list[str]):
+        self.columns = list(columns)
+        column_index = {column: idx for idx, column in enumerate(self.columns)}
+
+        # Position of the numeric variables in the output matrix
+        self.numeric_columns = [
+            (column, column_index[column])
+            for column in NUMERIC_COLUMNS
+            if column in column_index
+        ]
+
+        # Known categories of every variable and their position in the output matrix
+        self.categorical_columns = {}
+        self.category_positions = {}
+        for column in CATEGORICAL_VOCABULARIES:
+            prefix = f"{column}_"
+            categories = {
+                name[len(prefix) :]: idx
+                for name, idx in column_index.items()
+                if name.startswith(prefix)
+            }
+            self.categorical_columns[column] = (
+                pd.Index(list(categories.keys()), dtype=object),
+                np.array(list(categories.values()), dtype=np.intp),
+            )
+            self.category_positions[column] = categories
+
+    @classmethod
+    def from_vocabularies(cls, faculties: list[str]) -> "FeatureEncoder":
+        """
+        Build the encoder used to train a new model version.
+
+        As with pd.get_dummies(drop_first=True), the first category (in sorted
+        order) of every variable is dropped and used as the reference.
+        """
+        columns = list(NUMERIC_COLUMNS)
+        for column, vocabulary in CATEGORICAL_VOCABULARIES.items():
+            values = faculties if vocabulary is None else [v.value for v in vocabulary]
+            columns += [f"{column}_{value}" for value in sorted(values)[1:]]
+        return cls(columns)
+
+    def transform(
+        self, df: pd.DataFrame, faculty_mapping: dict[int, str] | None = None
+    ) -> np.ndarray:
+        """
+        Encode the students into a dense matrix (rows x model columns).
+
+        Args:
+            df: Raw student rows (as stored in the students table)
+            faculty_mapping: Faculty id to short name, required when the rows
+                have a faculty_id instead of a facultad column
+        """
+        features = np.zeros((len(df), len(self.columns)), dtype=np.float64)
+        rows = np.arange(len(df))
+
+        for column, idx in self.numeric_columns:
+            if column == "edad":
+                features[:, idx] = self._get_age(df)
+            elif column in df.columns:
+                features[:, idx] = pd.to_numeric(df[column]).to_numpy(
+                    dtype=np.float64, na_value=np.nan
+                )
+
+        for column, (categories, positions) in self.categorical_columns.items():
+            if categories.empty:
+                continue
+            if column == "facultad" and column not in df.columns:
+                if faculty_mapping is None or "faculty_id" not in df.columns:
+                    continue
+                values = df["faculty_id"].map(faculty_mapping)
+            elif column in df.columns:
+                values = df[column]
+            else:
+                continue
+
+            # Unknown categories and the reference category are left as zeros
+            codes = categories.get_indexer(values)
+            known = codes >= 0
+            features[rows[known], positions[codes[known]]] = 1.0
+
+        return features
+
+    def transform_records(self, records: list[dict[str, Any]]) -> np.ndarray:
+        """
+        Encode a few students given as dicts (e.g. the body of a request).
+
+        Same output as transform, without the overhead of building a
+        DataFrame, which dominates the latency for small batches. The
+        records must have a 'facultad' (short name) instead of a faculty_id.
+        """
+        features = np.zeros((len(records), len(self.columns)), dtype=np.float64)
+        for row, record in enumerate(records):
+            for column, idx in self.numeric_columns:
+                if column == "edad" and "edad" not in record:
+                    fecha_nac = record.get("fecha_nac")
+                    value = (
+                        max(AGE_REFERENCE_YEAR - fecha_nac.year, MIN_AGE)
+                        if fecha_nac is not None
+                        else None
+                    )
+                else:
+                    value = record.get(column)
+                features[row, idx] = np.nan if value is None else value
+
+            for column, categories in self.category_positions.items():
+                idx = categories.get(record.get(column))
+                if idx is not None:
+                    features[row, idx] = 1.0
+        return features
+
+    @staticmethod
+    def _get_age(df: pd.DataFrame) -> np.ndarray:
+        if "edad" in df.columns:
+            return pd.to_numeric(df["edad"]).to_numpy(dtype=np.float64, na_value=np.nan)
+        if "fecha_nac" not in df.columns:
+            return np.full(len(df), np.nan)
+        # Transform 'fecha_nac' to 'edad'
+        birth_year = pd.to_datetime(df["fecha_nac"]).dt.year.to_numpy(
+            dtype=np.float64, na_value=np.nan
+        )
+        return np.maximum(AGE_REFERENCE_YEAR - birth_year, MIN_AGE)
@@ -0,0 +1,19 @@
+from fastapi import HTTPException, status
+
+
+class NoStudentsToPredict(HTTPException):
+    def __init__(
+        self,
+        detail: str = (
+            "No se encontraron estudiantes sin predicciones con el modelo actual"
+        ),
+    ):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+class PredictionRunNotInStaging(HTTPException):
+    def __init__(
+        self,
+        detail: str = "La ejecución de predicciones ya fue publicada o descartada",
+    ):
+        super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
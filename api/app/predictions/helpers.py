@@ -1,12 +1,9 @@
-import joblib
 import numpy as np
 import pandas as pd
 from sqlalchemy.orm import Session
 
 from app.faculties import models as faculty_models
 
-model_columns = joblib.load("files/model_columns.pkl")
-
 
 def clean_data(df: pd.DataFrame):
     # Data preprocessing
@@ -34,56 +31,9 @@ def clean_data(df: pd.DataFrame):
     return df
 
 
-# Helper function to preprocess data
-def preprocess_data(df: pd.DataFrame, db: Session | None = None) -> pd.DataFrame:
-    # Transform 'fecha_nac' to 'edad'
-    if "fecha_nac" in df.columns:
-        df["fecha_nac"] = pd.to_datetime(df["fecha_nac"])
-        fecha_datos = pd.to_datetime("2019-12-31")
-        df["edad"] = fecha_datos.year - df["fecha_nac"].dt.year
-        df.loc[df["edad"] < 17, "edad"] = 17
-        df = df.drop("fecha_nac", axis=1)
-
-    faculty_mapping = {
+def get_faculty_mapping(db: Session) -> dict[int, str]:
+    """Map every faculty id to its short name (used as the 'facultad' feature)"""
+    return {
         faculty.id: faculty.short_name
         for faculty in db.query(faculty_models.Faculty).all()
     }
-    df["facultad"] = df["faculty_id"].map(faculty_mapping)
-
-    # Drop extra columns
-    columns_to_drop = [
-        "id",
-        "archived",
-        "estado",
-        "first_name",
-        "last_name",
-        "faculty_id",
-        "ultimo_semestre_cursado",
-        "created_at",
-        "updated_at",
-    ]
-    df.drop(columns=[col for col in columns_to_drop if col in df.columns], inplace=True)
-
-    # One-hot encoding for categorical variables
-    categorical_columns = [
-        "facultad",
-        "estado_civil",
-        "promedio_secundaria",
-        "posee_enfermedad",
-        "vive_con",
-        "situacion_ocupacional",
-        "sustento_economico",
-        "formacion_academica_padre",
-        "formacion_academica_madre",
-        "formacion_academica_hermanos",
-    ]
-    for col in categorical_columns:
-        if col in df.columns:
-            df = pd.get_dummies(df, columns=[col], drop_first=True)
-
-    # Ensure all columns match the model's expected input
-    for col in model_columns:
-        if col not in df.columns:
-            df[col] = False  # Add missing columns with default value False
-
-    return df
@@ -0,0 +1,191 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.helpers import get_now_utc
+from app.logger.setup import logger
+from app.model_versions import crud as model_version_crud
+from app.model_versions import models as model_version_models
+from app.model_versions.registry import model_registry
+from app.predictions import constants, crud, exceptions, models, service
+from app.reports.cache import report_cache
+
+_executor: ProcessPoolExecutor | None = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Process pool where the prediction jobs run, outside the API workers"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PREDICTION_JOB_WORKERS,
+            # Don't fork the API process (open connections, scheduler threads)
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def submit_prediction_job(job: models.PredictionJob):
+    future = get_executor().submit(run_prediction_job, job.id)
+    future.add_done_callback(on_prediction_job_done)
+
+
+def on_prediction_job_done(future):
+    """
+    Clear the caches of this process once a job published its predictions.
+
+    The job runs in a worker process, so the caches it clears are the
+    worker's own. This is the API process that submitted the job, the other
+    API processes pick up the new predictions and the active model version
+    once their caches expire (REPORT_CACHE_TTL and MODEL_REGISTRY_ACTIVE_TTL).
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    if future.result():
+        model_registry.invalidate_active()
+        report_cache.invalidate()
+
+
+def submit_activation_job(
+    db: Session, model_version: model_version_models.ModelVersion
+) -> models.PredictionJob:
+    """
+    Activate a model version once the whole cohort is scored with it.
+
+    The students are scored in a background job (throttled to
+    PREDICTION_BACKFILL_MAX_ROWS_PER_SECOND), and the model version is only
+    activated, in the same transaction that publishes its predictions, when
+    the job completes. Listings and reports never switch to a version without
+    predictions.
+    """
+    job = crud.get_activation_job_in_progress(db, model_version)
+    if job is None:
+        job = crud.create_prediction_job(db, model_version, activate_model_version=True)
+        submit_prediction_job(job)
+    return job
+
+
+def throttle(rows: int, start_time: float, max_rows_per_second: int):
+    """Wait until the rows written since start_time are under the rate limit"""
+    if max_rows_per_second <= 0:
+        return
+    wait = rows / max_rows_per_second - (time.monotonic() - start_time)
+    if wait > 0:
+        time.sleep(wait)
+
+
+def finish_job(
+    job: models.PredictionJob,
+    status: constants.PredictionJobStatus,
+    error: str | None = None,
+):
+    job.status = status
+    job.error = error
+    job.finished_at = get_now_utc()
+
+
+def run_prediction_job(job_id: int) -> bool:
+    """
+    Run a prediction job in a worker process.
+
+    The predictions of every chunk are committed (db) to the run of the job,
+    in staging, before the next chunk is read, so no transaction stays open
+    while the job runs. The run is published (and the model version of a
+    backfill activated) in a final short transaction, a cancelled or failed
+    job discards the predictions of its run. The progress of the job is
+    committed with a second session (progress_db).
+
+    Activation jobs (backfills) are throttled so they don't hurt the latency
+    of the API, and activate the model version when they complete.
+
+    Returns:
+        Whether the predictions of the job were published
+    """
+    db = SessionLocal()
+    progress_db = SessionLocal()
+    run = None
+    try:
+        job = crud.claim_prediction_job(progress_db, job_id)
+        if job is None:
+            return False
+
+        model_version = model_version_crud.get_model_version(db, job.model_version_id)
+        run = crud.create_prediction_run(progress_db, model_version, job=job)
+        runs = {model_version.id: db.get(models.PredictionRun, run.id)}
+        chunk_size = settings.PREDICTION_CHUNK_SIZE
+        max_rows_per_second = 0
+        if job.activate_model_version:
+            max_rows_per_second = settings.PREDICTION_BACKFILL_MAX_ROWS_PER_SECOND
+            if max_rows_per_second > 0:
+                # Smaller chunks spread the writes evenly over time
+                chunk_size = min(chunk_size, max_rows_per_second)
+        timings = {}
+        start_time = time.monotonic()
+        try:
+            for df in service.score_students(
+                db, model_version, chunk_size, timings, runs=runs, keyset=True
+            ):
+                progress_db.refresh(job)
+                if job.status != constants.PredictionJobStatus.RUNNING:
+                    # Failed by the recovery of another process, which
+                    # discarded the run
+                    db.rollback()
+                    logger.warning(f"Prediction job #{job_id} is no longer running")
+                    return False
+                # Check if the job was cancelled from the API
+                if job.cancel_requested:
+                    db.rollback()
+                    crud.discard_prediction_run(progress_db, run)
+                    finish_job(job, constants.PredictionJobStatus.CANCELLED)
+                    progress_db.commit()
+                    logger.info(f"Prediction job #{job_id} cancelled")
+                    return False
+
+                # The predictions stay in staging until the run is published
+                db.commit()
+                job.rows_scored += len(df)
+                # Counted once committed, the run tells if they were published
+                job.rows_persisted += len(df)
+                job.stage_timings = dict(timings)
+                job.heartbeat_at = get_now_utc()
+                progress_db.commit()
+                throttle(job.rows_scored, start_time, max_rows_per_second)
+        except exceptions.NoStudentsToPredict:
+            # Nothing to score, the job is done
+            pass
+
+        if job.activate_model_version:
+            # Publishes the predictions and activates the model version together
+            model_version_crud.set_active_model_version(db, model_version)
+        else:
+            db.commit()
+        finish_job(job, constants.PredictionJobStatus.COMPLETED)
+        job.stage_timings = dict(timings)
+        progress_db.commit()
+        logger.info(f"Prediction job #{job_id} completed: {job.rows_scored} rows")
+        return True
+    except Exception as e:
+        db.rollback()
+        progress_db.rollback()
+        if run is not None:
+            crud.discard_prediction_run(progress_db, run)
+        job = crud.get_prediction_job(progress_db, job_id)
+        if job is not None and job.status == constants.PredictionJobStatus.RUNNING:
+            finish_job(job, constants.PredictionJobStatus.FAILED, error=str(e))
+            progress_db.commit()
+        logger.error(f"Error running prediction job #{job_id}: {str(e)}")
+        return False
+    finally:
+        db.close()
+        progress_db.close()
@@ -1,16 +1,196 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float
+from sqlalchemy import (
+    DDL,
+    Column,
+    Index,
+    Integer,
+    String,
+    ForeignKey,
+    Float,
+    Boolean,
+    DateTime,
+    Enum,
+    JSON,
+    Text,
+    event,
+    or_,
+    select,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from app.database import Base, TimestampMixin
+from app.predictions import constants
 
 
 class Prediction(Base, TimestampMixin):
+    """
+    Predictions are partitioned by model version (LIST on model_version_id),
+    with one partition per model version and a default partition, so the
+    predictions of a retired model version are deleted with a partition drop.
+    """
+
     __tablename__ = "predictions"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
     dropout_probability = Column(Float, nullable=False)
+    # Partition key, part of the primary key
+    model_version_id = Column(
+        Integer, ForeignKey("model_versions.id"), primary_key=True
+    )
+    # Version name (e.g., "v1.0"), queries use model_version_id
     model_version = Column(String, nullable=False)
+    # Fingerprint of the student features the prediction was computed from
+    features_hash = Column(String(32), nullable=True)
+    # Run that computed the prediction
+    run_id = Column(Integer, ForeignKey("prediction_runs.id"), nullable=True)
 
     # Relationships
     student = relationship("Student", back_populates="predictions")
+
+    __table_args__ = (
+        # Predictions of a model version per student (prediction runs, latest
+        # predictions)
+        Index(
+            "predictions_model_version_id_student_id_created_at_idx",
+            "model_version_id",
+            "student_id",
+            text("created_at DESC"),
+            postgresql_include=["dropout_probability", "features_hash"],
+        ),
+        # Prediction history of a student
+        Index(
+            "predictions_student_id_created_at_idx",
+            "student_id",
+            text("created_at DESC"),
+        ),
+        # Predictions of a run (publish, run results)
+        Index("predictions_run_id_student_id_idx", "run_id", "student_id"),
+        {"postgresql_partition_by": "LIST (model_version_id)"},
+    )
+
+
+# Predictions of model versions without their own partition
+event.listen(
+    Prediction.__table__,
+    "after_create",
+    DDL(
+        f"CREATE TABLE IF NOT EXISTS {constants.PREDICTIONS_DEFAULT_PARTITION} "
+        "PARTITION OF predictions DEFAULT"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+class StudentLatestPrediction(Base):
+    """Latest prediction of every student with every model version"""
+
+    __tablename__ = "student_latest_prediction"
+
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    model_version_id = Column(
+        Integer, ForeignKey("model_versions.id"), primary_key=True
+    )
+    model_version = Column(String, nullable=False)
+    dropout_probability = Column(Float, nullable=False)
+    features_hash = Column(String(32), nullable=True)
+    # Date of the prediction
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    # Run that published the prediction
+    run_id = Column(Integer, ForeignKey("prediction_runs.id"), nullable=True)
+
+    __table_args__ = (
+        # Listings and reports of a model version (index-only scans)
+        Index(
+            "student_latest_prediction_model_version_id_student_id_idx",
+            "model_version_id",
+            "student_id",
+            postgresql_include=["dropout_probability", "created_at"],
+        ),
+        # Cursor pagination of the listings, in the order of the pages
+        Index(
+            "student_latest_prediction_model_version_id_probability_idx",
+            "model_version_id",
+            text("dropout_probability DESC"),
+            "student_id",
+        ),
+    )
+
+
+class PredictionRun(Base, TimestampMixin):
+    """
+    Predictions computed together with a model version.
+
+    The predictions of a run are written while it's in staging, and only
+    become the latest predictions of the students when the run is published,
+    in a single statement.
+    """
+
+    __tablename__ = "prediction_runs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    model_version_id = Column(Integer, ForeignKey("model_versions.id"), nullable=False)
+    # Job that executed the run, if it ran in the background
+    job_id = Column(Integer, ForeignKey("prediction_jobs.id"), nullable=True)
+    status = Column(
+        Enum(constants.PredictionRunStatus),
+        default=constants.PredictionRunStatus.STAGING,
+        nullable=False,
+    )
+    rows_count = Column(Integer, default=0, nullable=False)
+    # Seconds spent in every stage of the run (fetch, encode, score, persist,
+    # publish, snapshot)
+    stage_timings = Column(JSON, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    published_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("prediction_runs_model_version_id_idx", "model_version_id"),
+    )
+
+
+def get_published_filter(run_id: Column):
+    """
+    Predictions written without a run or by a published run.
+
+    The prediction jobs commit the predictions of their run chunk by chunk
+    while it's in staging, the history of the students skips them until
+    the run is published.
+    """
+    return or_(
+        run_id.is_(None),
+        run_id.in_(
+            select(PredictionRun.id).where(
+                PredictionRun.status == constants.PredictionRunStatus.PUBLISHED
+            )
+        ),
+    )
+
+
+class PredictionJob(Base, TimestampMixin):
+    __tablename__ = "prediction_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    model_version_id = Column(Integer, ForeignKey("model_versions.id"), nullable=False)
+    status = Column(
+        Enum(constants.PredictionJobStatus),
+        default=constants.PredictionJobStatus.PENDING,
+        nullable=False,
+    )
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    # Activate the model version once the whole cohort is scored (backfill)
+    activate_model_version = Column(Boolean, default=False, nullable=False)
+    error = Column(Text, nullable=True)
+
+    # Progress
+    rows_scored = Column(Integer, default=0, nullable=False)
+    # Predictions committed to the run of the job, kept as is when the job is
+    # cancelled or fails (its run is discarded)
+    rows_persisted = Column(Integer, default=0, nullable=False)
+    # Seconds spent in every stage of the run (fetch, encode, score, persist)
+    stage_timings = Column(JSON, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Updated by the worker after every chunk, a running job without recent
+    # heartbeats lost its worker
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
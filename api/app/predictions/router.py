@@ -1,10 +1,16 @@
-import joblib
-from fastapi import APIRouter, HTTPException
+import time
+
+from fastapi import APIRouter, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.api.deps import SessionDep, SupervisorRequired
-from app.students import crud as student_crud
-from app.predictions import crud, helpers
+from app.config import settings
+from app.pagination import LimitOffsetPage
+from app.predictions import constants, crud, jobs, schemas, service
 from app.model_versions import crud as model_version_crud
+from app.model_versions.registry import model_registry
+from app.reports.cache import report_cache
+from app.students import schemas as student_schemas
 
 router = APIRouter(prefix="/predictions")
 
@@ -14,62 +20,109 @@ router = APIRouter(prefix="/predictions")
 def predict(
     _supervisor: SupervisorRequired,
     db: SessionDep,
+    response: Response,
     model_version_id: int | None = None,
+    chunk_size: int | None = Query(
+        default=None, ge=1, description="Number of students scored per chunk"
+    ),
+    output: constants.PredictionOutput = Query(
+        default=constants.PredictionOutput.JOB,
+        description="Format of the results (job, records, ndjson, summary)",
+    ),
+    candidate_model_version_ids: list[int] = Query(
+        default=[],
+        description="Model versions scored in the same pass (shadow scoring)",
+    ),
 ):
     """
     Predict dropout probability for all students.
     Returns probability scores from 0.0 (0%) to 1.0 (100%).
+
+    Candidate model versions can be scored in the same pass, their predictions
+    are saved as well (shadow scoring).
+
+    By default the run is submitted as a background job and its id is
+    returned right away (job), follow it in /predictions/jobs/{job_id}. The
+    other outputs score the students in the request: every scored student
+    with all its fields (records), a stream with one {student_id, probability,
+    model_version} object per line sent as each chunk is scored (ndjson), or
+    only counts and timings of the run (summary).
     """
     try:
-        # If model_version_id is provided, get the model version
-        if model_version_id is not None:
-            model_version = model_version_crud.get_model_version(db, model_version_id)
-            if model_version is None:
-                # If model version not found, use the active model
-                model_version = model_version_crud.get_active_model_version(db)
-        else:
-            # If no model_version_id provided, use the active model
-            model_version = model_version_crud.get_active_model_version(db)
-
-        # Fetch all students from the database
-        df = student_crud.get_students_data_for_ia(
-            db, purpose="PREDICT", model_version=model_version
+        # Use the model version if provided (and found), otherwise the active one
+        model_version = model_version_crud.get_model_version_or_active(
+            db, model_version_id
         )
-        # Preprocess the data
-        processed_data = helpers.preprocess_data(df, db)
-        # Remove extra column
-        processed_data = processed_data.drop("desercion", axis=1)
-        # Load active model
-        model = joblib.load(f"files/{model_version.model_path}")
-        # Make probability predictions
-        # predict_proba returns probabilities for each class
-        prediction_probabilities = model.predict_proba(processed_data)
-        # Extract the probability of class 1 (dropout)
-        dropout_probabilities = prediction_probabilities[:, 1]
-        # Round to 2 decimal places to limit precision
-        dropout_probabilities = [round(prob, 2) for prob in dropout_probabilities]
-        # Add probability predictions to the original DataFrame (0 to 1 range)
-        df["prediction"] = dropout_probabilities
-        # Get the results as a list of dictionaries
-        student_predictions = df.to_dict(orient="records")
-
-        # Save predictions results
-        for student_prediction in student_predictions:
-            current_student_id: int | None = student_prediction.get("id", None)
-            current_student_prediction: float | None = student_prediction.get(
-                "prediction", None
-            )
+        chunk_size = chunk_size or settings.PREDICTION_CHUNK_SIZE
 
-            if current_student_id is None or current_student_prediction is None:
-                continue
-            student_db = student_crud.get_student(db, current_student_id)
-            if not student_db:
+        # Get the candidate model versions, ignoring the one used for the run
+        candidate_model_versions = []
+        for candidate_id in dict.fromkeys(candidate_model_version_ids):
+            if candidate_id == model_version.id:
                 continue
-            crud.create_prediction(
-                db,
-                student_id=current_student_id,
-                prediction=current_student_prediction,
+            candidate = model_version_crud.get_model_version(db, candidate_id)
+            if candidate is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No se ha encontrado ningún modelo con id #{candidate_id}",
+                )
+            candidate_model_versions.append(candidate)
+
+        if output == constants.PredictionOutput.JOB:
+            if model_version is None:
+                raise HTTPException(
+                    status_code=400, detail="No hay ningún modelo activo"
+                )
+            if candidate_model_versions:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Los modelos candidatos solo se pueden puntuar "
+                    "con las salidas records, ndjson o summary",
+                )
+            job = crud.create_prediction_job(db, model_version)
+            jobs.submit_prediction_job(job)
+            response.status_code = status.HTTP_202_ACCEPTED
+            return schemas.PredictionJobRead.model_validate(job, from_attributes=True)
+
+        if output == constants.PredictionOutput.NDJSON:
+            return StreamingResponse(
+                service.stream_predictions(
+                    model_version.id,
+                    chunk_size,
+                    [candidate.id for candidate in candidate_model_versions],
+                ),
+                media_type="application/x-ndjson",
+            )
+
+        # Score the students chunk by chunk and persist the predictions
+        start_time = time.perf_counter()
+        timings = {}
+        student_predictions = []
+        students_scored = 0
+        chunks = 0
+        runs = {
+            version.id: crud.create_prediction_run(db, version, commit=False)
+            for version in [model_version, *candidate_model_versions]
+        }
+        for df in service.score_students(
+            db, model_version, chunk_size, timings, candidate_model_versions, runs
+        ):
+            students_scored += len(df)
+            chunks += 1
+            if output == constants.PredictionOutput.RECORDS:
+                student_predictions.extend(df.to_dict(orient="records"))
+        db.commit()
+        # The runs were published
+        report_cache.invalidate()
+
+        if output == constants.PredictionOutput.SUMMARY:
+            return schemas.PredictionRunSummary(
+                run_id=runs[model_version.id].id,
                 model_version=f"v{model_version.version}.0",
+                students_scored=students_scored,
+                chunks=chunks,
+                elapsed=time.perf_counter() - start_time,
+                stage_timings=timings,
             )
         return student_predictions
 
@@ -77,3 +130,141 @@ def predict(
         raise e
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/jobs",
+    response_model=schemas.PredictionJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+def create_prediction_job(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    model_version_id: int | None = None,
+):
+    """
+    Submit a prediction run for all students without predictions.
+    The run is executed in the background, use the returned job id to follow it.
+    """
+    model_version = model_version_crud.get_model_version_or_active(db, model_version_id)
+    if model_version is None:
+        raise HTTPException(status_code=400, detail="No hay ningún modelo activo")
+
+    job = crud.create_prediction_job(db, model_version)
+    jobs.submit_prediction_job(job)
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=schemas.PredictionJobRead)
+def get_prediction_job(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    job_id: int,
+):
+    """Get the status and progress of a prediction job"""
+    job = crud.get_prediction_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No se ha encontrado ninguna ejecución con id #{job_id}",
+        )
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=schemas.PredictionJobRead)
+def cancel_prediction_job(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    job_id: int,
+):
+    """Cancel a pending or running prediction job"""
+    job = crud.get_prediction_job(db, job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No se ha encontrado ninguna ejecución con id #{job_id}",
+        )
+    if job.status not in (
+        constants.PredictionJobStatus.PENDING,
+        constants.PredictionJobStatus.RUNNING,
+    ):
+        raise HTTPException(status_code=400, detail="La ejecución ya ha finalizado")
+    return crud.cancel_prediction_job(db, job)
+
+
+@router.get("/runs", response_model=LimitOffsetPage[schemas.PredictionRunRead])
+def get_prediction_runs(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    model_version_id: int | None = None,
+):
+    """Prediction runs, newest first"""
+    return crud.get_prediction_runs(db, model_version_id)
+
+
+@router.get("/runs/{run_id}", response_model=schemas.PredictionRunRead)
+def get_prediction_run(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    run_id: int,
+):
+    run = crud.get_prediction_run(db, run_id)
+    if run is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No se ha encontrado ninguna ejecución con id #{run_id}",
+        )
+    return run
+
+
+@router.get(
+    "/runs/{run_id}/predictions",
+    response_model=LimitOffsetPage[schemas.PredictionBase],
+)
+def get_run_predictions(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    run_id: int,
+):
+    """Predictions of a published run"""
+    run = crud.get_prediction_run(db, run_id)
+    if run is None or run.status != constants.PredictionRunStatus.PUBLISHED:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No se ha encontrado ninguna ejecución publicada con id #{run_id}",
+        )
+    return crud.get_run_predictions(db, run)
+
+
+@router.post("/score", response_model=schemas.ScoreResponse)
+def score(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    students: student_schemas.StudentScoreRequest
+    | list[student_schemas.StudentScoreRequest],
+):
+    """
+    Get the dropout probability of one or many students with the active model.
+    Nothing is saved, the database is only read when the active model changes.
+    """
+    loaded_model = model_registry.get_active(db)
+    if loaded_model is None:
+        raise HTTPException(status_code=400, detail="No hay ningún modelo activo")
+
+    if not isinstance(students, list):
+        students = [students]
+    if not students:
+        return {
+            "model_version": f"v{loaded_model.version}.0",
+            "dropout_probabilities": [],
+        }
+
+    try:
+        dropout_probabilities = service.score_payloads(loaded_model, students)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {
+        "model_version": f"v{loaded_model.version}.0",
+        "dropout_probabilities": dropout_probabilities.tolist(),
+    }
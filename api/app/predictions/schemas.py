@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from app.predictions import constants
+
 
 class PredictionBase(BaseModel):
     id: int
@@ -9,3 +11,64 @@ class PredictionBase(BaseModel):
     dropout_probability: float
     model_version: str
     created_at: datetime
+
+
+class ScoreResponse(BaseModel):
+    model_version: str
+    # Dropout probability (0.0 to 1.0) of every student, in request order
+    dropout_probabilities: list[float]
+
+
+class PredictionRunSummary(BaseModel):
+    run_id: int
+    model_version: str
+    students_scored: int
+    chunks: int
+    elapsed: float
+    # Seconds spent in every stage of the run (fetch, encode, score, persist)
+    stage_timings: dict[str, float]
+
+
+class PredictionRunRead(BaseModel):
+    id: int
+    model_version_id: int
+    job_id: int | None = None
+    status: constants.PredictionRunStatus
+    rows_count: int
+    stage_timings: dict[str, float] | None = None
+    started_at: datetime
+    finished_at: datetime | None = None
+    published_at: datetime | None = None
+
+
+class PredictionJobRead(BaseModel):
+    id: int
+    model_version_id: int
+    status: constants.PredictionJobStatus
+    cancel_requested: bool
+    activate_model_version: bool
+    error: str | None = None
+    rows_scored: int
+    rows_persisted: int
+    stage_timings: dict[str, float] | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    heartbeat_at: datetime | None = None
+    finished_at: datetime | None = None
+
+
+class RiskHistoryPoint(BaseModel):
+    model_version_id: int
+    model_version: str
+    # Start of the bucket
+    bucket: datetime
+    # Last prediction of the bucket
+    dropout_probability: float
+    created_at: datetime
+
+
+class RiskHistory(BaseModel):
+    student_id: int
+    # None when the buckets are evenly spaced over the history of the student
+    interval: constants.RiskHistoryInterval | None = None
+    points: list[RiskHistoryPoint]
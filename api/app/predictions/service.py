@@ -0,0 +1,254 @@
+import json
+import time
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.logger.setup import logger
+from app.model_versions import crud as model_version_crud
+from app.model_versions import models as model_version_models
+from app.model_versions.registry import LoadedModel, model_registry
+from app.predictions import crud, exceptions, helpers, models
+from app.reports.cache import report_cache
+from app.reports import service as reports_service
+from app.students import crud as student_crud
+from app.students import schemas as student_schemas
+
+
+def add_stage_time(timings: dict[str, float], stage: str, start: float) -> float:
+    """Add the time elapsed since start to the stage, returns the current time"""
+    now = time.perf_counter()
+    timings[stage] = timings.get(stage, 0.0) + now - start
+    return now
+
+
+def score_students(
+    db: Session,
+    model_version: model_version_models.ModelVersion,
+    chunk_size: int,
+    timings: dict[str, float] | None = None,
+    candidate_model_versions: list[model_version_models.ModelVersion] | None = None,
+    runs: dict[int, models.PredictionRun] | None = None,
+    keyset: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Score the new students and the students whose features changed since
+    their last prediction with the model version, chunk by chunk.
+
+    Every chunk is read with a server-side cursor, encoded, scored and
+    persisted before the next one is read, so the memory used by a run
+    doesn't depend on the number of students. The predictions are inserted
+    in the current transaction, the caller is responsible for committing it.
+
+    Candidate model versions are scored in the same pass (shadow scoring):
+    the students are read and encoded once, and every model only persists
+    predictions for the students it doesn't have an up-to-date prediction for.
+
+    Every model version writes its predictions to a run in staging. The runs
+    are published (the latest predictions of the students are updated) once
+    every chunk is scored, in the current transaction as well, and the reports
+    of their model versions are snapshotted.
+
+    Args:
+        db: Database session
+        model_version: Model version used to score the students
+        chunk_size: Maximum number of students per chunk
+        timings: Optional dict where the seconds spent in every stage
+            (fetch, encode, score, persist, publish, snapshot) are accumulated
+        candidate_model_versions: Other model versions to score the students with
+        runs: Runs in staging of every model version (by id), created in the
+            current transaction if not provided
+        keyset: Read every chunk with its own query instead of a server-side
+            cursor, so the caller can commit the predictions of every chunk
+            (they stay in staging until the runs are published)
+
+    Yields:
+        The students of every chunk persisted with the model version, with
+        their "prediction" column, plus a "prediction_v<version>" column per
+        candidate model version (None if the candidate already had an
+        up-to-date prediction of the student)
+    """
+    if timings is None:
+        timings = {}
+    candidate_model_versions = candidate_model_versions or []
+    model_versions = [model_version, *candidate_model_versions]
+    loaded_models = [model_registry.get(version) for version in model_versions]
+    faculty_mapping = helpers.get_faculty_mapping(db)
+    model_version_str = f"v{model_version.version}.0"
+    runs = runs or {}
+    for version in model_versions:
+        if version.id not in runs:
+            runs[version.id] = crud.create_prediction_run(db, version, commit=False)
+
+    start_time = time.time()
+    total_scored = 0
+    chunks = student_crud.get_students_chunks_for_ia(
+        db,
+        chunk_size,
+        purpose="PREDICT",
+        model_version=model_version,
+        candidate_model_versions=candidate_model_versions,
+        keyset=keyset,
+    )
+    chunk_number = 0
+    while True:
+        stage_start = time.perf_counter()
+        df = next(chunks, None)
+        stage_start = add_stage_time(timings, "fetch", stage_start)
+        if df is None:
+            break
+        chunk_number += 1
+
+        # Encode the students with the same columns the models were trained on,
+        # models trained on the same columns share the feature matrix
+        features_by_columns = {}
+        for loaded_model in loaded_models:
+            columns = tuple(loaded_model.columns)
+            if columns not in features_by_columns:
+                features_by_columns[columns] = loaded_model.encoder.transform(
+                    df, faculty_mapping
+                )
+        stage_start = add_stage_time(timings, "encode", stage_start)
+
+        # Make probability predictions of class 1 (dropout), rounded to 2 decimals
+        prediction_columns = []
+        for version, loaded_model in zip(model_versions, loaded_models):
+            column = (
+                "prediction"
+                if version is model_version
+                else f"prediction_v{version.version}"
+            )
+            df[column] = np.round(
+                loaded_model.predict_dropout_probabilities(
+                    features_by_columns[tuple(loaded_model.columns)]
+                ),
+                2,
+            )
+            prediction_columns.append((version, column))
+        stage_start = add_stage_time(timings, "score", stage_start)
+
+        for version, column in prediction_columns:
+            # Skip the students that already have predictions with this model
+            scored = df
+            if candidate_model_versions:
+                scored = df[~df[f"has_prediction_{version.id}"]]
+            crud.create_predictions(
+                db,
+                zip(
+                    scored["id"].tolist(),
+                    scored[column].tolist(),
+                    scored["features_hash"].tolist(),
+                ),
+                model_version=version,
+                commit=False,
+                run=runs[version.id],
+            )
+        add_stage_time(timings, "persist", stage_start)
+
+        total_scored += len(df)
+        logger.info(
+            f"Prediction run {model_version_str}: chunk #{chunk_number} "
+            f"({len(df)} students) scored, {total_scored} in total "
+            f"in {time.time() - start_time:.2f} seconds"
+        )
+        if candidate_model_versions:
+            # Only the students persisted with the model version are yielded,
+            # with the predictions of the candidates persisted for them
+            for version, column in prediction_columns:
+                df[column] = (
+                    df[column]
+                    .astype(object)
+                    .where(~df[f"has_prediction_{version.id}"], None)
+                )
+            df = df[~df[f"has_prediction_{model_version.id}"]].drop(
+                columns=[f"has_prediction_{version.id}" for version in model_versions]
+            )
+        yield df
+
+    stage_start = time.perf_counter()
+    for version in model_versions:
+        crud.publish_prediction_run(db, runs[version.id], timings)
+    stage_start = add_stage_time(timings, "publish", stage_start)
+
+    # Reports of the published predictions, served until the next run
+    report_service = reports_service.ReportService(db)
+    for version in model_versions:
+        report_service.create_report_snapshots(runs[version.id])
+    add_stage_time(timings, "snapshot", stage_start)
+    for version in model_versions:
+        runs[version.id].stage_timings = dict(timings)
+
+    if total_scored == 0:
+        raise exceptions.NoStudentsToPredict()
+
+
+def stream_predictions(
+    model_version_id: int,
+    chunk_size: int,
+    candidate_model_version_ids: list[int] | None = None,
+) -> Iterator[bytes]:
+    """
+    Run the predictions and stream the results as NDJSON, chunk by chunk.
+
+    The response outlives the request dependencies, so the run uses its own
+    session. The predictions are committed once every chunk has been sent.
+    """
+    db = SessionLocal()
+    try:
+        model_version = model_version_crud.get_model_version(db, model_version_id)
+        candidate_model_versions = [
+            model_version_crud.get_model_version(db, candidate_id)
+            for candidate_id in candidate_model_version_ids or []
+        ]
+        model_version_str = f"v{model_version.version}.0"
+        try:
+            for df in score_students(
+                db,
+                model_version,
+                chunk_size,
+                candidate_model_versions=candidate_model_versions,
+            ):
+                if df.empty:
+                    # Every student was only scored by the candidates
+                    continue
+                lines = pd.DataFrame(
+                    {
+                        "student_id": df["id"],
+                        "probability": df["prediction"],
+                        "model_version": model_version_str,
+                    }
+                ).to_json(orient="records", lines=True)
+                yield (lines.rstrip("\n") + "\n").encode()
+        except exceptions.NoStudentsToPredict:
+            # Nothing to score, the stream is empty
+            pass
+        db.commit()
+        # The runs were published
+        report_cache.invalidate()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error streaming predictions: {str(e)}")
+        yield (json.dumps({"error": str(e)}) + "\n").encode()
+    finally:
+        db.close()
+
+
+def score_payloads(
+    loaded_model: LoadedModel, students: list[student_schemas.StudentScoreRequest]
+) -> np.ndarray:
+    """
+    Score students sent in a request, without reading or writing the database.
+
+    Returns:
+        Dropout probabilities rounded to 2 decimals, in the same order as the students
+    """
+    records = []
+    for student in students:
+        record = student.model_dump()
+        record["facultad"] = record.pop("faculty_short_name").value
+        records.append(record)
+    features = loaded_model.encoder.transform_records(records)
+    return np.round(loaded_model.predict_dropout_probabilities(features), 2)
@@ -0,0 +1,64 @@
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.logger.setup import logger
+from app.model_versions import crud as model_version_crud
+from app.predictions import crud, jobs
+
+
+def recover_prediction_jobs(db: Session):
+    """
+    Task run at startup to fail the running prediction jobs whose worker is
+    gone, and queue again the pending ones (only one process claims each)
+    """
+    try:
+        failed = crud.fail_interrupted_prediction_jobs(db)
+        if failed:
+            logger.warning(f"{failed} ejecuciones de predicción interrumpidas")
+        for job in crud.get_pending_prediction_jobs(db):
+            jobs.submit_prediction_job(job)
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error recuperando las ejecuciones de predicción: {str(e)}")
+    finally:
+        db.close()
+
+
+async def compact_predictions(db: Session):
+    """
+    Task to delete superseded predictions and the predictions of retired model versions
+    """
+    try:
+        # Drop the predictions of the retired model versions
+        retired_model_versions = []
+        if settings.PREDICTION_RETAINED_MODEL_VERSIONS > 0:
+            retired_model_versions = model_version_crud.get_retired_model_versions(
+                db, settings.PREDICTION_RETAINED_MODEL_VERSIONS
+            )
+        for model_version in retired_model_versions:
+            # The versions already dropped by a previous compaction are skipped
+            if not crud.drop_predictions(db, model_version):
+                continue
+            logger.info(
+                f"Predicciones del modelo v{model_version.version}.0 eliminadas"
+            )
+
+        # Keep the latest predictions of every student for the other model versions
+        if settings.PREDICTION_RETENTION_PER_STUDENT <= 0:
+            return
+        retired_ids = {model_version.id for model_version in retired_model_versions}
+        for model_version in model_version_crud.get_all_model_versions(db):
+            if model_version.id in retired_ids:
+                continue
+            deleted = crud.compact_predictions(
+                db, model_version, settings.PREDICTION_RETENTION_PER_STUDENT
+            )
+            logger.info(
+                f"Compactación del modelo v{model_version.version}.0: "
+                f"{deleted} predicciones eliminadas"
+            )
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error compactando las predicciones: {str(e)}")
+    finally:
+        db.close()
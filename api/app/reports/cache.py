@@ -0,0 +1,153 @@
+import threading
+import time
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.logger.setup import logger
+from app.reports import crud
+
+# Cached report results
+REPORT_CACHE_SIZE = 256
+# Tables the reports are computed from (snapshots are written with the
+# latest predictions, in the same transaction)
+REPORT_TABLES = (
+    "students",
+    "student_latest_prediction",
+    "model_versions",
+)
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    # Data version of the report tables when the value was computed
+    data_version: int
+    # Generation of the cache when the value was computed
+    generation: int
+    validated_at: float
+
+
+class ReportCache:
+    """
+    Results of the reports by report, faculty, model version and parameters.
+
+    Fresh results (validated less than REPORT_CACHE_TTL seconds ago) are
+    served without touching the database. Stale results are served while
+    they are revalidated in the background, and only recomputed if the data
+    version of the report tables (bumped by their writers) changed. Results older than
+    REPORT_CACHE_TTL + REPORT_CACHE_MAX_STALE seconds are recomputed.
+
+    Publishing a run or writing a student in this process invalidates every
+    result, changes made by other processes (prediction jobs) are picked up
+    by the revalidation.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        # Keys being revalidated in the background
+        self._revalidating: set[Hashable] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def get_or_compute(
+        self, db: Session, key: Hashable, compute: Callable[[Session], Any]
+    ) -> Any:
+        """
+        Get the cached result of the report, or compute it.
+
+        Args:
+            db: Database session, used on a miss
+            key: Report, faculty, model version and parameters of the report
+            compute: Function computing the report with a database session
+        """
+        if settings.REPORT_CACHE_TTL <= 0:
+            return compute(db)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.generation == self._generation:
+                age = time.monotonic() - entry.validated_at
+                if age <= settings.REPORT_CACHE_TTL:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return entry.value
+                if age <= settings.REPORT_CACHE_TTL + settings.REPORT_CACHE_MAX_STALE:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._revalidating:
+                        self._revalidating.add(key)
+                        threading.Thread(
+                            target=self._revalidate,
+                            args=(key, entry, compute),
+                            daemon=True,
+                        ).start()
+                    return entry.value
+            self.misses += 1
+            generation = self._generation
+
+        data_version = crud.get_data_version(db, REPORT_TABLES)
+        value = compute(db)
+        self._set(key, value, data_version, generation)
+        return value
+
+    def _revalidate(
+        self, key: Hashable, entry: CacheEntry, compute: Callable[[Session], Any]
+    ):
+        db = SessionLocal()
+        try:
+            data_version = crud.get_data_version(db, REPORT_TABLES)
+            value = entry.value
+            if data_version != entry.data_version:
+                value = compute(db)
+            self._set(key, value, data_version, entry.generation)
+            with self._lock:
+                self.revalidations += 1
+        except Exception as e:
+            logger.warning(f"Could not revalidate the report {key}: {str(e)}")
+        finally:
+            db.close()
+            with self._lock:
+                self._revalidating.discard(key)
+
+    def _set(self, key: Hashable, value: Any, data_version: int, generation: int):
+        with self._lock:
+            # Invalidated while the report was computed
+            if generation != self._generation:
+                return
+            self._entries[key] = CacheEntry(
+                value=value,
+                data_version=data_version,
+                generation=generation,
+                validated_at=time.monotonic(),
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+            }
+
+
+report_cache = ReportCache(REPORT_CACHE_SIZE)
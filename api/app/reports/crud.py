@@ -0,0 +1,35 @@
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.reports import models
+
+# Tables whose every writer bumps their data version. model_versions is only
+# bumped on activation, the rest of the tables aren't versioned
+VERSIONED_TABLES = frozenset({"students", "student_latest_prediction"})
+
+
+def bump_data_version(db: Session, table_name: str):
+    """
+    Increment the data version of a table in the current transaction.
+
+    The row stays locked until the transaction ends, so concurrent writers
+    of the table are serialized on it: keep the transaction short.
+    """
+    stmt = pg_insert(models.DataVersion).values(table_name=table_name, version=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["table_name"],
+        set_={"version": models.DataVersion.version + 1},
+    )
+    db.execute(stmt)
+
+
+def get_data_version(db: Session, table_names: Iterable[str]) -> int:
+    """Sum of the data versions of the tables, it changes on every write"""
+    return db.execute(
+        select(func.coalesce(func.sum(models.DataVersion.version), 0)).where(
+            models.DataVersion.table_name.in_(sorted(table_names))
+        )
+    ).scalar()
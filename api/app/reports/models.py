@@ -0,0 +1,64 @@
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+
+from app.database import Base, TimestampMixin
+
+
+class ReportSnapshot(Base, TimestampMixin):
+    """
+    Reports of a model version computed when a prediction run is published.
+
+    Every run writes one snapshot per faculty plus one of every faculty
+    (faculty_id NULL), with the distribution, faculty distribution and
+    factors impact reports of the default parameters. The latest snapshot
+    is served by the report endpoints, the older ones are the history.
+    """
+
+    __tablename__ = "report_snapshots"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(Integer, ForeignKey("prediction_runs.id"), nullable=False)
+    model_version_id = Column(Integer, ForeignKey("model_versions.id"), nullable=False)
+    faculty_id = Column(Integer, ForeignKey("faculties.id"), nullable=True)
+    buckets = Column(Integer, nullable=False)
+    high_risk_threshold = Column(Float, nullable=False)
+    medium_risk_threshold = Column(Float, nullable=False)
+    # Data version of the students when the reports were computed (in the
+    # same transaction), a student written afterwards makes the snapshot stale
+    students_data_version = Column(BigInteger, nullable=False)
+    # Dashboard reports (dropout_distribution, faculty_dropout_distribution
+    # and dropout_factors_impact)
+    data = Column(JSON, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "report_snapshots_model_version_id_faculty_id_idx",
+            "model_version_id",
+            "faculty_id",
+            "id",
+        ),
+        Index("report_snapshots_run_id_idx", "run_id"),
+    )
+
+
+class DataVersion(Base):
+    """
+    Version of a table the reports are computed from.
+
+    Bumped in the transaction writing the table, so a version read in a
+    transaction matches the rows visible to it (unlike the statistics of
+    Postgres, flushed lazily and reset on a crash).
+    """
+
+    __tablename__ = "data_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False)
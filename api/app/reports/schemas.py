@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Dict
 
 from pydantic import BaseModel
@@ -34,3 +35,31 @@ class FactorImpactItem(BaseModel):
 class DropoutFactorsImpactResponse(BaseModel):
     factors: list[FactorImpactItem]
     total_students_analyzed: int
+
+
+class ReportCacheStats(BaseModel):
+    entries: int
+    hits: int
+    # Stale results served while they were revalidated
+    stale_hits: int
+    misses: int
+    revalidations: int
+
+
+class DashboardResponse(BaseModel):
+    dropout_distribution: DropoutDistributionResponse
+    faculty_dropout_distribution: FacultyDropoutDistributionResponse
+    dropout_factors_impact: DropoutFactorsImpactResponse
+
+
+class ReportSnapshotRead(BaseModel):
+    id: int
+    run_id: int
+    model_version_id: int
+    # None for the snapshot of every faculty
+    faculty_id: int | None = None
+    buckets: int
+    high_risk_threshold: float
+    medium_risk_threshold: float
+    data: DashboardResponse
+    created_at: datetime
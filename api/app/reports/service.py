@@ -1,166 +1,444 @@
 from typing import Any
 
-from sqlalchemy import func
+import numpy as np
+import pandas as pd
+from sqlalchemy import Select, and_, delete, func, select
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.faculties.models import Faculty
-from app.predictions.models import Prediction
+from app.pagination import paginate
+from app.predictions.models import PredictionRun, StudentLatestPrediction
 from app.students.models import Student
 from app.students import constants as student_constants
 from app.model_versions import crud as model_versions_crud
-from app.reports import schemas
+from app.reports import crud, schemas
+from app.reports.models import ReportSnapshot
+
+
+def get_bucket_labels(buckets: int) -> list[str]:
+    """Labels of the distribution buckets (0-10%, 10-20%, etc.)"""
+    width = 100 / buckets
+    return [
+        f"{round(idx * width, 1):g}-{round((idx + 1) * width, 1):g}%"
+        for idx in range(buckets)
+    ]
+
+
+def get_percentage(count: int, total: int) -> float:
+    return round((count / total * 100), 1) if total > 0 else 0
+
+
+# Factors of the dropout factors impact report
+FACTORS_TO_ANALYZE = [
+    ("estado_civil", "Estado civil"),
+    ("nro_hijos", "Número de hijos"),
+    ("posee_enfermedad", "Posee enfermedad"),
+    ("vive_con", "Vive con"),
+    ("situacion_ocupacional", "Situación ocupacional"),
+    ("sustento_economico", "Sustento económico"),
+    ("formacion_academica_padre", "Formación académica del padre"),
+    ("formacion_academica_madre", "Formación académica de la madre"),
+    ("formacion_academica_hermanos", "Formación académica de hermanos"),
+    ("ultimo_semestre_cursado", "Último semestre cursado"),
+    ("promedio_secundaria", "Promedio de secundaria"),
+    ("cuantos_colegios_secundaria", "Cantidad de colegios en secundaria"),
+]
+
+
+def get_factors_impact(df: pd.DataFrame) -> list[dict[str, Any]]:
+    """
+    Impact of every factor on the dropout probability, highest first.
+
+    The impact of a factor is the variance of the average probability of
+    its values, normalized to a 0-100 scale. The students are grouped with
+    pd.factorize and np.bincount (one pass per factor, in row order, so the
+    averages are the same as summing the probabilities one by one).
+
+    Args:
+        df: One row per student with the factor columns and dropout_probability
+    """
+    probabilities = df["dropout_probability"].to_numpy(dtype=np.float64)
+    factor_impact_scores = []
+    for factor_key, factor_name in FACTORS_TO_ANALYZE:
+        # Code of the value of every student (-1 if missing), in order of first appearance
+        codes, values = pd.factorize(df[factor_key], sort=False)
+        known = codes >= 0
+        # Skip factors with no data
+        if not known.any():
+            continue
+
+        # Average probability of every value
+        avg_probabilities = (
+            np.bincount(codes[known], weights=probabilities[known])
+            / np.bincount(codes[known])
+        ).tolist()
+
+        # Higher variance indicates more impact on dropout probability
+        mean_probability = sum(avg_probabilities) / len(avg_probabilities)
+        variance = sum((p - mean_probability) ** 2 for p in avg_probabilities) / len(
+            avg_probabilities
+        )
+
+        # Factor value with highest dropout probability (the first one on ties)
+        highest_risk_idx = int(np.argmax(avg_probabilities))
+        highest_risk_value_str = str(values[highest_risk_idx])
+        highest_risk_prob = avg_probabilities[highest_risk_idx]
+
+        # Create description
+        description = f"Los estudiantes con {factor_name.lower()} '{highest_risk_value_str}' tienen una predicción de deserción promedio de {round(highest_risk_prob * 100, 1)}%"
+
+        factor_impact_scores.append(
+            {
+                "factor": factor_name,
+                "impact_score": variance,
+                "description": description,
+            }
+        )
+
+    # Sort factors by impact score (highest first)
+    factor_impact_scores.sort(key=lambda x: x["impact_score"], reverse=True)
+
+    # Normalize impact scores to a 0-100 scale
+    if factor_impact_scores:
+        max_score = max(item["impact_score"] for item in factor_impact_scores)
+        for item in factor_impact_scores:
+            item["impact_score"] = round(item["impact_score"] / max_score * 100, 1)
+
+    return factor_impact_scores
+
+
+def get_distribution_rows(
+    df: pd.DataFrame,
+    buckets: int,
+    high_risk_threshold: float,
+    medium_risk_threshold: float,
+) -> list:
+    """
+    Count the students of every faculty and bucket of an already read cohort.
+
+    Same rows as the aggregate query of the reports: floor(p * buckets) is
+    what width_bucket computes, clipped to the first and last bucket.
+
+    Args:
+        df: One row per student with faculty_name and dropout_probability
+    """
+    probabilities = df["dropout_probability"].to_numpy(dtype=np.float64)
+    counts = pd.DataFrame(
+        {
+            "faculty_name": df["faculty_name"].to_numpy(),
+            "bucket": np.clip(np.floor(probabilities * buckets), 0, buckets - 1).astype(
+                np.int64
+            ),
+            "high_risk": probabilities >= high_risk_threshold,
+            "medium_risk": (probabilities >= medium_risk_threshold)
+            & (probabilities < high_risk_threshold),
+            "low_risk": probabilities < medium_risk_threshold,
+        }
+    )
+    return list(
+        counts.groupby(["faculty_name", "bucket"], sort=False)
+        .agg(
+            students=("bucket", "size"),
+            high_risk=("high_risk", "sum"),
+            medium_risk=("medium_risk", "sum"),
+            low_risk=("low_risk", "sum"),
+        )
+        .reset_index()
+        .itertuples(index=False)
+    )
+
+
+def build_dropout_distribution(rows: list, buckets: int) -> dict[str, Any]:
+    """
+    Distribution report from the counts of every bucket (or faculty and bucket)
+    """
+    labels = get_bucket_labels(buckets)
+    distribution = dict.fromkeys(labels, 0)
+    risk_counts = {"high_risk": 0, "medium_risk": 0, "low_risk": 0}
+    for row in rows:
+        distribution[labels[row.bucket]] += int(row.students)
+        for risk in risk_counts:
+            risk_counts[risk] += int(getattr(row, risk))
+    total_students = sum(distribution.values())
+
+    return {
+        "total_students": total_students,
+        "distribution": distribution,
+        "distribution_percentages": {
+            bucket: get_percentage(count, total_students)
+            for bucket, count in distribution.items()
+        },
+        "risk_summary": {
+            risk: {
+                "count": count,
+                "percentage": get_percentage(count, total_students),
+            }
+            for risk, count in risk_counts.items()
+        },
+    }
+
+
+def build_faculty_dropout_distribution(rows: list, buckets: int) -> dict[str, Any]:
+    """
+    Faculty distribution report from the counts of every faculty and bucket
+    """
+    labels = get_bucket_labels(buckets)
+    faculty_distributions = {}
+    for row in rows:
+        if row.faculty_name not in faculty_distributions:
+            faculty_distributions[row.faculty_name] = dict.fromkeys(labels, 0)
+        faculty_distributions[row.faculty_name][labels[row.bucket]] += int(row.students)
+
+    return {"faculty_distributions": faculty_distributions}
+
+
+def build_dropout_factors_impact(df: pd.DataFrame) -> dict[str, Any]:
+    """
+    Factors impact report from the factors and probabilities of the cohort
+    """
+    return {
+        "factors": [
+            schemas.FactorImpactItem(**item) for item in get_factors_impact(df)
+        ],
+        "total_students_analyzed": len(df),
+    }
+
+
+def build_dashboard(
+    df: pd.DataFrame,
+    buckets: int,
+    high_risk_threshold: float,
+    medium_risk_threshold: float,
+) -> dict[str, Any]:
+    """
+    Distribution, faculty distribution and factors impact reports of a cohort
+    """
+    rows = get_distribution_rows(
+        df, buckets, high_risk_threshold, medium_risk_threshold
+    )
+    return {
+        "dropout_distribution": build_dropout_distribution(rows, buckets),
+        "faculty_dropout_distribution": build_faculty_dropout_distribution(
+            rows, buckets
+        ),
+        "dropout_factors_impact": build_dropout_factors_impact(df),
+    }
 
 
 class ReportService:
     def __init__(self, db: Session):
         self.db = db
 
-    def __get_predictions_query(
-        self, faculty_id: int, model_version_id: int | None = None
-    ):
-        # Create distribution buckets (0-10%, 10-20%, etc.)
-        buckets = {
-            "0-10%": 0,
-            "10-20%": 0,
-            "20-30%": 0,
-            "30-40%": 0,
-            "40-50%": 0,
-            "50-60%": 0,
-            "60-70%": 0,
-            "70-80%": 0,
-            "80-90%": 0,
-            "90-100%": 0,
-        }
-
-        # If model_version_id is provided, get the model version
-        if model_version_id is not None:
-            model_version = model_versions_crud.get_model_version(
-                self.db, model_version_id
-            )
-            if model_version is None:
-                # If model version not found, use the active model
-                model_version = model_versions_crud.get_active_model_version(self.db)
-        else:
-            # If no model_version_id provided, use the active model
-            model_version = model_versions_crud.get_active_model_version(self.db)
-
-        # Get the model version string (e.g., "v1.0")
-        model_version_str = f"v{model_version.version}.0" if model_version else None
-
-        # Get the latest prediction for each student with the current model specified
-        latest_predictions_subquery = (
-            self.db.query(
-                Prediction.student_id,
-                func.max(Prediction.created_at).label("latest_date"),
-            )
-            .filter(model_version_str == Prediction.model_version)
-            .group_by(Prediction.student_id)
-            .subquery()
+    def __get_model_version_id(self, model_version_id: int | None) -> int | None:
+        # Model version used (the active one if not provided or not found)
+        return model_versions_crud.get_model_version_id_or_active(
+            self.db, model_version_id
         )
 
-        # Join with the predictions table to get the actual prediction records
-        query = (
-            self.db.query(
-                Prediction.dropout_probability,
-                Faculty.short_name.label("faculty_name"),
-            )
-            .join(Student, Prediction.student_id == Student.id)
-            .join(Faculty, Student.faculty_id == Faculty.id)
-            .join(
-                latest_predictions_subquery,
-                (Prediction.student_id == latest_predictions_subquery.c.student_id)
-                & (Prediction.created_at == latest_predictions_subquery.c.latest_date),
+    def __get_snapshot(
+        self,
+        faculty_id: int | None,
+        model_version_id: int | None,
+        buckets: int | None = None,
+        high_risk_threshold: float | None = None,
+        medium_risk_threshold: float | None = None,
+    ) -> dict[str, Any] | None:
+        """
+        Reports of the latest snapshot of the faculty and model version.
+
+        None (the reports are computed live) if there is no snapshot, it was
+        computed with other parameters (None matches any), or a student was
+        written after it.
+        """
+        snapshot = self.db.execute(
+            select(ReportSnapshot)
+            .where(
+                ReportSnapshot.model_version_id == model_version_id,
+                ReportSnapshot.faculty_id.is_(None)
+                if faculty_id is None
+                else ReportSnapshot.faculty_id == faculty_id,
             )
-            .filter(model_version_str == Prediction.model_version)
+            .order_by(ReportSnapshot.id.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+        if snapshot is None:
+            return None
+        parameters = [
+            (buckets, snapshot.buckets),
+            (high_risk_threshold, snapshot.high_risk_threshold),
+            (medium_risk_threshold, snapshot.medium_risk_threshold),
+        ]
+        if any(value is not None and value != used for value, used in parameters):
+            return None
+        if snapshot.students_data_version != crud.get_data_version(
+            self.db, [Student.__tablename__]
+        ):
+            return None
+        return snapshot.data
+
+    def __get_cohort_stmt(
+        self,
+        columns: list,
+        faculty_id: int | None,
+        model_version_id: int | None,
+        by_faculty: bool = False,
+    ) -> Select:
+        """
+        Current students (of the faculty) with their latest prediction of the
+        model version, the rows every report is computed from.
+        """
+        stmt = (
+            select(*columns)
+            .select_from(StudentLatestPrediction)
+            .join(Student, StudentLatestPrediction.student_id == Student.id)
+            .where(model_version_id == StudentLatestPrediction.model_version_id)
+            .where(student_constants.EstadoEnum.VIGENTE == Student.estado)
         )
+        if by_faculty:
+            stmt = stmt.join(Faculty, Student.faculty_id == Faculty.id)
 
         # Apply optional filters
         if faculty_id is not None:
-            query = query.filter(faculty_id == Student.faculty_id)
+            stmt = stmt.where(faculty_id == Student.faculty_id)
+
+        return stmt
+
+    def __get_distribution_rows(
+        self,
+        faculty_id: int | None,
+        model_version_id: int | None,
+        buckets: int,
+        high_risk_threshold: float,
+        medium_risk_threshold: float,
+        by_faculty: bool = False,
+    ):
+        """
+        Count the students of every bucket (and faculty) in the database.
 
-        # Execute query
-        query = query.filter(student_constants.EstadoEnum.VIGENTE == Student.estado)
-        return query.all(), buckets
+        The latest predictions are aggregated in a single query, with
+        width_bucket for the buckets and count(*) FILTER for the risk levels,
+        so only one row per bucket (and faculty) is read.
+        """
+        probability = StudentLatestPrediction.dropout_probability
+        # Buckets numbered 0..buckets-1, a probability of 1.0 belongs to the last one
+        bucket = (
+            func.least(
+                func.greatest(func.width_bucket(probability, 0.0, 1.0, buckets), 1),
+                buckets,
+            )
+            - 1
+        ).label("bucket")
+        columns = [
+            bucket,
+            func.count().label("students"),
+            func.count().filter(probability >= high_risk_threshold).label("high_risk"),
+            func.count()
+            .filter(
+                and_(
+                    probability >= medium_risk_threshold,
+                    probability < high_risk_threshold,
+                )
+            )
+            .label("medium_risk"),
+            func.count().filter(probability < medium_risk_threshold).label("low_risk"),
+        ]
+        group_by = [bucket]
+        if by_faculty:
+            columns.insert(0, Faculty.short_name.label("faculty_name"))
+            group_by.insert(0, Faculty.short_name)
+
+        stmt = self.__get_cohort_stmt(
+            columns, faculty_id, model_version_id, by_faculty=by_faculty
+        )
+        return self.db.execute(stmt.group_by(*group_by)).all()
+
+    def __get_cohort(
+        self,
+        faculty_id: int | None,
+        model_version_id: int | None,
+        by_faculty: bool = False,
+    ) -> pd.DataFrame:
+        """
+        Read the analyzed columns of the cohort (and the faculty of every
+        student), the factors keep their database values (object columns).
+        """
+        factor_keys = [factor_key for factor_key, _ in FACTORS_TO_ANALYZE]
+        columns = [
+            *[getattr(Student, factor_key) for factor_key in factor_keys],
+            StudentLatestPrediction.dropout_probability,
+        ]
+        if by_faculty:
+            columns.append(Faculty.short_name)
+
+        stmt = self.__get_cohort_stmt(
+            columns, faculty_id, model_version_id, by_faculty=by_faculty
+        )
+        return pd.DataFrame(
+            self.db.execute(stmt).all(),
+            columns=[
+                *factor_keys,
+                "dropout_probability",
+                *(["faculty_name"] if by_faculty else []),
+            ],
+            dtype=object,
+        )
 
     def get_dropout_probability_distribution(
-        self, faculty_id: int | None = None, model_version_id: int | None = None
+        self,
+        faculty_id: int | None = None,
+        model_version_id: int | None = None,
+        buckets: int = settings.REPORT_DISTRIBUTION_BUCKETS,
+        high_risk_threshold: float = settings.REPORT_HIGH_RISK_THRESHOLD,
+        medium_risk_threshold: float = settings.REPORT_MEDIUM_RISK_THRESHOLD,
     ) -> dict[str, Any]:
         """
         Get the distribution of dropout probabilities across all students
         """
-        results, buckets = self.__get_predictions_query(faculty_id, model_version_id)
-
-        # Populate buckets
-        for probability, faculty_name in results:
-            # Overall distribution
-            bucket_idx = min(int(probability * 10), 9)  # Ensure it's within 0-9 range
-            bucket_key = list(buckets.keys())[bucket_idx]
-            buckets[bucket_key] += 1
-
-        # Calculate statistics
-        total_students = len(results)
-        high_risk_count = sum(prob >= 0.7 for prob, _ in results)
-        medium_risk_count = sum(0.4 <= prob < 0.7 for prob, _ in results)
-        low_risk_count = sum(prob < 0.4 for prob, _ in results)
-
-        # Calculate percentages for the overall distribution
-        distribution_percentages = {}
-        for bucket, count in buckets.items():
-            distribution_percentages[bucket] = (
-                round((count / total_students * 100), 1) if total_students > 0 else 0
-            )
-
-        return {
-            "total_students": total_students,
-            "distribution": buckets,
-            "distribution_percentages": distribution_percentages,
-            "risk_summary": {
-                "high_risk": {
-                    "count": high_risk_count,
-                    "percentage": round((high_risk_count / total_students * 100), 1)
-                    if total_students > 0
-                    else 0,
-                },
-                "medium_risk": {
-                    "count": medium_risk_count,
-                    "percentage": round((medium_risk_count / total_students * 100), 1)
-                    if total_students > 0
-                    else 0,
-                },
-                "low_risk": {
-                    "count": low_risk_count,
-                    "percentage": round((low_risk_count / total_students * 100), 1)
-                    if total_students > 0
-                    else 0,
-                },
-            },
-        }
+        model_version_id = self.__get_model_version_id(model_version_id)
+        snapshot = self.__get_snapshot(
+            faculty_id,
+            model_version_id,
+            buckets,
+            high_risk_threshold,
+            medium_risk_threshold,
+        )
+        if snapshot is not None:
+            return snapshot["dropout_distribution"]
+
+        rows = self.__get_distribution_rows(
+            faculty_id,
+            model_version_id,
+            buckets,
+            high_risk_threshold,
+            medium_risk_threshold,
+        )
+        return build_dropout_distribution(rows, buckets)
 
     def get_faculty_dropout_distribution(
-        self, faculty_id: int | None = None, model_version_id: int | None = None
+        self,
+        faculty_id: int | None = None,
+        model_version_id: int | None = None,
+        buckets: int = settings.REPORT_DISTRIBUTION_BUCKETS,
     ) -> dict[str, Any]:
         """
         Get the distribution of dropout probabilities across all faculties
         """
-        results, buckets = self.__get_predictions_query(faculty_id, model_version_id)
-
-        # Faculty-specific distributions
-        faculty_distributions = {}
-
-        # Populate buckets
-        for probability, faculty_name in results:
-            # Overall distribution
-            bucket_idx = min(int(probability * 10), 9)  # Ensure it's within 0-9 range
-            bucket_key = list(buckets.keys())[bucket_idx]
-            buckets[bucket_key] += 1
-
-            # Faculty-specific distribution
-            if faculty_name not in faculty_distributions:
-                faculty_distributions[faculty_name] = buckets.copy()
-
-            faculty_distributions[faculty_name][bucket_key] += 1
-
-        return {"faculty_distributions": faculty_distributions}
+        model_version_id = self.__get_model_version_id(model_version_id)
+        snapshot = self.__get_snapshot(faculty_id, model_version_id, buckets)
+        if snapshot is not None:
+            return snapshot["faculty_dropout_distribution"]
+
+        rows = self.__get_distribution_rows(
+            faculty_id,
+            model_version_id,
+            buckets,
+            settings.REPORT_HIGH_RISK_THRESHOLD,
+            settings.REPORT_MEDIUM_RISK_THRESHOLD,
+            by_faculty=True,
+        )
+        return build_faculty_dropout_distribution(rows, buckets)
 
     def get_dropout_factors_impact(
         self, faculty_id: int | None = None, model_version_id: int | None = None
@@ -168,134 +446,115 @@ class ReportService:
         """
         Get the most impactful factors for student dropout
         """
-        # If model_version_id is provided, get the model version
-        if model_version_id is not None:
-            model_version = model_versions_crud.get_model_version(
-                self.db, model_version_id
-            )
-            if model_version is None:
-                # If model version not found, use the active model
-                model_version = model_versions_crud.get_active_model_version(self.db)
-        else:
-            # If no model_version_id provided, use the active model
-            model_version = model_versions_crud.get_active_model_version(self.db)
-
-        # Get the model version string (e.g., "v1.0")
-        model_version_str = f"v{model_version.version}.0" if model_version else None
-
-        # Get the latest prediction for each student with the current model specified
-        latest_predictions_subquery = (
-            self.db.query(
-                Prediction.student_id,
-                func.max(Prediction.created_at).label("latest_date"),
-            )
-            .filter(model_version_str == Prediction.model_version)
-            .group_by(Prediction.student_id)
-            .subquery()
-        )
+        model_version_id = self.__get_model_version_id(model_version_id)
+        snapshot = self.__get_snapshot(faculty_id, model_version_id)
+        if snapshot is not None:
+            return snapshot["dropout_factors_impact"]
+
+        df = self.__get_cohort(faculty_id, model_version_id)
+        return build_dropout_factors_impact(df)
+
+    def get_dashboard(
+        self,
+        faculty_id: int | None = None,
+        model_version_id: int | None = None,
+        buckets: int = settings.REPORT_DISTRIBUTION_BUCKETS,
+        high_risk_threshold: float = settings.REPORT_HIGH_RISK_THRESHOLD,
+        medium_risk_threshold: float = settings.REPORT_MEDIUM_RISK_THRESHOLD,
+    ) -> dict[str, Any]:
+        """
+        Get the distribution, faculty distribution and factors impact reports.
 
-        # Base query to get students with their predictions
-        query = (
-            self.db.query(Student, Prediction.dropout_probability)
-            .join(Prediction, Student.id == Prediction.student_id)
-            .join(
-                latest_predictions_subquery,
-                (Prediction.student_id == latest_predictions_subquery.c.student_id)
-                & (Prediction.created_at == latest_predictions_subquery.c.latest_date),
-            )
-            .filter(model_version_str == Prediction.model_version)
-            .filter(student_constants.EstadoEnum.VIGENTE == Student.estado)
+        The model version is resolved once and the cohort is read in a single
+        query, the factors report needs its rows anyway, so the distributions
+        are counted from them instead of aggregating the cohort again.
+        """
+        model_version_id = self.__get_model_version_id(model_version_id)
+        snapshot = self.__get_snapshot(
+            faculty_id,
+            model_version_id,
+            buckets,
+            high_risk_threshold,
+            medium_risk_threshold,
         )
+        if snapshot is not None:
+            return snapshot
 
-        # Apply optional filters
-        if faculty_id is not None:
-            query = query.filter(faculty_id == Student.faculty_id)
-
-        # Execute query
-        results = query.all()
-        total_students = len(results)
-
-        # Define the factors to analyze
-        factors_to_analyze = [
-            ("estado_civil", "Estado civil"),
-            ("nro_hijos", "Número de hijos"),
-            ("posee_enfermedad", "Posee enfermedad"),
-            ("vive_con", "Vive con"),
-            ("situacion_ocupacional", "Situación ocupacional"),
-            ("sustento_economico", "Sustento económico"),
-            ("formacion_academica_padre", "Formación académica del padre"),
-            ("formacion_academica_madre", "Formación académica de la madre"),
-            ("formacion_academica_hermanos", "Formación académica de hermanos"),
-            ("ultimo_semestre_cursado", "Último semestre cursado"),
-            ("promedio_secundaria", "Promedio de secundaria"),
-            ("cuantos_colegios_secundaria", "Cantidad de colegios en secundaria"),
-        ]
-
-        # Calculate impact scores for each factor
-        factor_impact_scores = []
-
-        for factor_key, factor_name in factors_to_analyze:
-            # Group students by factor value and calculate average dropout probability
-            factor_values = {}
-            for student, probability in results:
-                factor_value = getattr(student, factor_key)
-                if factor_value is not None:
-                    if factor_value not in factor_values:
-                        factor_values[factor_value] = []
-                    factor_values[factor_value].append(probability)
-
-            # Skip factors with no data
-            if not factor_values:
-                continue
-
-            # Calculate variance in dropout probability across different factor values
-            avg_probabilities = [
-                sum(probs) / len(probs) for probs in factor_values.values() if probs
-            ]
-            if not avg_probabilities:
-                continue
-
-            # Higher variance indicates more impact on dropout probability
-            variance = sum(
-                (p - sum(avg_probabilities) / len(avg_probabilities)) ** 2
-                for p in avg_probabilities
-            ) / len(avg_probabilities)
-
-            # Find the factor value with highest dropout probability
-            highest_risk_value = max(
-                factor_values.items(),
-                key=lambda x: sum(x[1]) / len(x[1]) if x[1] else 0,
-            )
-            highest_risk_value_str = str(highest_risk_value[0])
-            highest_risk_prob = (
-                sum(highest_risk_value[1]) / len(highest_risk_value[1])
-                if highest_risk_value[1]
-                else 0
-            )
+        df = self.__get_cohort(faculty_id, model_version_id, by_faculty=True)
+        return build_dashboard(df, buckets, high_risk_threshold, medium_risk_threshold)
 
-            # Create description
-            description = f"Los estudiantes con {factor_name.lower()} '{highest_risk_value_str}' tienen una predicción de deserción promedio de {round(highest_risk_prob * 100, 1)}%"
+    def create_report_snapshots(self, run: PredictionRun) -> list[ReportSnapshot]:
+        """
+        Snapshot the reports of the model version of a published run.
 
-            factor_impact_scores.append(
-                {
-                    "factor": factor_name,
-                    "impact_score": variance,
-                    "description": description,
-                }
+        The cohort is read once (in the transaction publishing the run, so
+        its predictions are included) and the reports of every faculty are
+        computed from its rows. A run without predictions didn't change the
+        reports, the previous snapshot is still served. Only the snapshots of
+        the latest REPORT_SNAPSHOT_RETENTION runs of the model version are kept.
+        """
+        if run.rows_count == 0:
+            return []
+
+        buckets = settings.REPORT_DISTRIBUTION_BUCKETS
+        high_risk_threshold = settings.REPORT_HIGH_RISK_THRESHOLD
+        medium_risk_threshold = settings.REPORT_MEDIUM_RISK_THRESHOLD
+        students_data_version = crud.get_data_version(self.db, [Student.__tablename__])
+
+        df = self.__get_cohort(None, run.model_version_id, by_faculty=True)
+        cohorts = [(None, df)]
+        for faculty in self.db.execute(select(Faculty.id, Faculty.short_name)).all():
+            cohorts.append((faculty.id, df[df["faculty_name"] == faculty.short_name]))
+
+        snapshots = [
+            ReportSnapshot(
+                run_id=run.id,
+                model_version_id=run.model_version_id,
+                faculty_id=faculty_id,
+                buckets=buckets,
+                high_risk_threshold=high_risk_threshold,
+                medium_risk_threshold=medium_risk_threshold,
+                students_data_version=students_data_version,
+                data=jsonable_encoder(
+                    build_dashboard(
+                        cohort, buckets, high_risk_threshold, medium_risk_threshold
+                    )
+                ),
             )
+            for faculty_id, cohort in cohorts
+        ]
+        self.db.add_all(snapshots)
+        self.db.flush()
+        self.__delete_old_snapshots(run.model_version_id)
+        return snapshots
+
+    def __delete_old_snapshots(self, model_version_id: int):
+        """Delete the snapshots of the model version older than the retained runs"""
+        if settings.REPORT_SNAPSHOT_RETENTION <= 0:
+            return
+        retained_runs = (
+            select(ReportSnapshot.run_id)
+            .where(ReportSnapshot.model_version_id == model_version_id)
+            .distinct()
+            .order_by(ReportSnapshot.run_id.desc())
+            .limit(settings.REPORT_SNAPSHOT_RETENTION)
+        )
+        self.db.execute(
+            delete(ReportSnapshot).where(
+                ReportSnapshot.model_version_id == model_version_id,
+                ReportSnapshot.run_id.not_in(retained_runs),
+            )
+        )
 
-        # Sort factors by impact score (highest first)
-        factor_impact_scores.sort(key=lambda x: x["impact_score"], reverse=True)
-
-        # Normalize impact scores to a 0-100 scale
-        if factor_impact_scores:
-            max_score = max(item["impact_score"] for item in factor_impact_scores)
-            for item in factor_impact_scores:
-                item["impact_score"] = round(item["impact_score"] / max_score * 100, 1)
-
-        return {
-            "factors": [
-                schemas.FactorImpactItem(**item) for item in factor_impact_scores
-            ],
-            "total_students_analyzed": total_students,
-        }
+    def get_report_snapshots(
+        self, faculty_id: int | None = None, model_version_id: int | None = None
+    ):
+        """Paginated report snapshots of every faculty (or one), newest first"""
+        stmt = select(ReportSnapshot).where(
+            ReportSnapshot.faculty_id.is_(None)
+            if faculty_id is None
+            else ReportSnapshot.faculty_id == faculty_id
+        )
+        if model_version_id is not None:
+            stmt = stmt.where(ReportSnapshot.model_version_id == model_version_id)
+        return paginate(self.db, stmt.order_by(ReportSnapshot.id.desc()))
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.helpers import get_now_utc
 from app.model_versions import models as model_version_models
 from app.model_versions import constants as model_version_constants
+from app.predictions import crud as prediction_crud
 
 
 def seed_model_versions(db: Session):
@@ -23,3 +24,4 @@ def seed_model_versions(db: Session):
     db.add(model_version)
     db.commit()
     db.refresh(model_version)
+    prediction_crud.create_predictions_partition(db, model_version)
@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.faculties import crud as faculty_crud
 from app.predictions import helpers as prediction_helpers
+from app.reports import crud as report_crud
 from app.students import models as student_models
 
 fake = Faker("es_ES")
@@ -46,7 +47,9 @@ def seed_students(db: Session):
                 formacion_academica_madre=row["formacion_academica_madre"],
                 formacion_academica_hermanos=row["formacion_academica_hermanos"],
             )
+            student.update_features_hash()
             db.add(student)
+            report_crud.bump_data_version(db, student_models.Student.__tablename__)
             db.commit()
             db.refresh(student)
 
@@ -53,3 +53,29 @@ class FormacionEnum(str, Enum):
     UNIVERSITARIA = "Universitaria"
     SUPERIOR = "Superior"
     NINGUNA = "Ninguna"
+
+
+class SearchModeEnum(str, Enum):
+    # Names containing the term
+    CONTAINS = "contains"
+    # Names similar to the term (typos), ranked by similarity
+    FUZZY = "fuzzy"
+
+
+# Columns used by the models, a change in any of them requires a new prediction
+FEATURE_COLUMNS = [
+    "faculty_id",
+    "estado_civil",
+    "fecha_nac",
+    "nro_hijos",
+    "anio_egreso",
+    "promedio_secundaria",
+    "cuantos_colegios_secundaria",
+    "posee_enfermedad",
+    "vive_con",
+    "situacion_ocupacional",
+    "sustento_economico",
+    "formacion_academica_padre",
+    "formacion_academica_madre",
+    "formacion_academica_hermanos",
+]
@@ -1,18 +1,52 @@
+from typing import Iterator
+
 import pandas as pd
 from fastapi import HTTPException
-from fastapi_pagination.ext.sqlalchemy import paginate
-from sqlalchemy import select, desc, func, not_, exists
-from sqlalchemy.orm import Session
+from sqlalchemy import select, desc, func, literal, not_, exists, or_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
+from app.pagination import paginate
 from app.faculties import constants as faculty_constants
 from app.faculties import crud as faculty_crud
 from app.model_versions import crud as model_versions_crud
 from app.model_versions import models as model_version_models
-from app.predictions.models import Prediction
-from app.students import models, schemas, constants
+from app.predictions.models import (
+    Prediction,
+    StudentLatestPrediction,
+    get_published_filter,
+)
+from app.reports import crud as report_crud
+from app.reports.cache import report_cache
+from app.students import models, schemas, constants, helpers
 
 
-def get_students(
+def filter_by_search(
+    stmt,
+    search: str,
+    search_mode: constants.SearchModeEnum = constants.SearchModeEnum.CONTAINS,
+):
+    """
+    Filter the students by name, ignoring case and accents.
+
+    Both modes use the trigram index of the full name (students_search_name_idx).
+
+    Returns:
+        The filtered query and the similarity of every name to the term
+        (None in contains mode)
+    """
+    search_name = models.get_search_name()
+    term = func.f_unaccent(search)
+    if search_mode == constants.SearchModeEnum.FUZZY:
+        # Names with a word similar to the term
+        rank = func.word_similarity(term, search_name)
+        return stmt.where(term.op("<%")(search_name)), rank
+
+    # Escape the LIKE wildcards of the term
+    search = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return stmt.where(search_name.ilike(func.f_unaccent(f"%{search}%"))), None
+
+
+def get_students_stmt(
     db: Session,
     faculty: faculty_constants.FacultiesOptions | None = None,
     min_probability: int | None = None,
@@ -21,44 +55,27 @@ def get_students(
     estado: constants.EstadoEnum = constants.EstadoEnum.VIGENTE,
     model_version_id: int | None = None,
     archived: bool = False,
+    search_mode: constants.SearchModeEnum = constants.SearchModeEnum.CONTAINS,
 ):
-    # If model_version_id is provided, get the model version
-    if model_version_id is not None:
-        model_version = model_versions_crud.get_model_version(db, model_version_id)
-        if model_version is None:
-            # If model version not found, use the active model
-            model_version = model_versions_crud.get_active_model_version(db)
-    else:
-        # If no model_version_id provided, use the active model
-        model_version = model_versions_crud.get_active_model_version(db)
+    """
+    Build the query of the student listing, without ordering.
 
-    # Get the model version string (e.g., "v1.0")
-    model_version_str = f"v{model_version.version}.0" if model_version else None
-
-    # First, create a subquery to get the latest prediction for each student
-    # Use a window function to get the most recent prediction per student
-    latest_prediction_subq = (
-        select(
-            Prediction.student_id,
-            Prediction.dropout_probability,
-            Prediction.model_version,
-            func.row_number()
-            .over(
-                partition_by=Prediction.student_id, order_by=desc(Prediction.created_at)
-            )
-            .label("rn"),
-        )
-        .where(model_version_str == Prediction.model_version)
-        .subquery()
+    Returns:
+        The query, the latest probability column of the students and the
+        similarity of their names to the search term (fuzzy search only)
+    """
+    # Model version used (the active one if not provided or not found)
+    model_version_id = model_versions_crud.get_model_version_id_or_active(
+        db, model_version_id
     )
 
-    # Filter to only get the most recent prediction for each student
+    # Get the latest prediction of each student, maintained by the prediction write path
     latest_prediction = (
         select(
-            latest_prediction_subq.c.student_id,
-            latest_prediction_subq.c.dropout_probability.label("latest_probability"),
+            StudentLatestPrediction.student_id,
+            StudentLatestPrediction.dropout_probability.label("latest_probability"),
         )
-        .where(latest_prediction_subq.c.rn == 1)
+        .where(model_version_id == StudentLatestPrediction.model_version_id)
         .subquery()
     )
 
@@ -68,6 +85,11 @@ def get_students(
         .outerjoin(
             latest_prediction, models.Student.id == latest_prediction.c.student_id
         )
+        # Load the faculty and the latest predictions of the page with two queries
+        .options(
+            joinedload(models.Student.faculty),
+            selectinload(models.Student.latest_predictions),
+        )
     )
 
     # Filter by faculty if specified
@@ -91,33 +113,140 @@ def get_students(
         stmt = stmt.where(latest_prediction.c.latest_probability <= max_value)
 
     # Filter by search term if specified
+    search_rank = None
     if search:
-        search_term = f"%{search}%"
-        stmt = stmt.where(
-            (models.Student.first_name.ilike(search_term))
-            | (models.Student.last_name.ilike(search_term))
-        )
+        stmt, search_rank = filter_by_search(stmt, search, search_mode)
+
+    if min_probability is None or max_probability is None:
+        stmt = stmt.filter(latest_prediction.c.latest_probability.is_(None))
+
+    return stmt, latest_prediction.c.latest_probability, search_rank
+
+
+def get_students(
+    db: Session,
+    faculty: faculty_constants.FacultiesOptions | None = None,
+    min_probability: int | None = None,
+    max_probability: int | None = None,
+    search: str | None = None,
+    estado: constants.EstadoEnum = constants.EstadoEnum.VIGENTE,
+    model_version_id: int | None = None,
+    archived: bool = False,
+    search_mode: constants.SearchModeEnum = constants.SearchModeEnum.CONTAINS,
+):
+    stmt, latest_probability, search_rank = get_students_stmt(
+        db,
+        faculty=faculty,
+        min_probability=min_probability,
+        max_probability=max_probability,
+        search=search,
+        estado=estado,
+        model_version_id=model_version_id,
+        archived=archived,
+        search_mode=search_mode,
+    )
+
+    if search_rank is not None:
+        # Best matches first
+        stmt = stmt.order_by(search_rank.desc())
 
     if min_probability is not None and max_probability is not None:
         # Order by dropout probability in descending order, placing NULL values last
         stmt = stmt.order_by(
-            latest_prediction.c.latest_probability.is_(None).asc(),
-            desc(latest_prediction.c.latest_probability),
+            latest_probability.is_(None).asc(),
+            desc(latest_probability),
         )
-    else:
-        stmt = stmt.filter(latest_prediction.c.latest_probability.is_(None))
 
-    return paginate(db, stmt)
+    # The listing of a large university can have hundreds of thousands of rows
+    return paginate(db, stmt, estimate=True)
 
 
-def get_students_data_for_ia(
+def get_students_by_cursor(
     db: Session,
+    limit: int,
+    cursor: str | None = None,
+    faculty: faculty_constants.FacultiesOptions | None = None,
+    min_probability: int | None = None,
+    max_probability: int | None = None,
+    search: str | None = None,
+    estado: constants.EstadoEnum = constants.EstadoEnum.VIGENTE,
+    model_version_id: int | None = None,
+    archived: bool = False,
+    search_mode: constants.SearchModeEnum = constants.SearchModeEnum.CONTAINS,
+) -> schemas.StudentCursorPage:
+    """
+    Get a page of the student listing after the cursor (keyset pagination).
+
+    The students with a probability range are sorted by latest probability
+    (descending) and id, in the order of the
+    student_latest_prediction_model_version_id_probability_idx index. The
+    students without prediction (no range) are sorted by id. The cursor
+    holds the sort key of the last student of the previous page, so every
+    page is read from the index position of the cursor instead of sorting
+    the filtered students or skipping `offset` rows.
+    """
+    # The order is fixed by the cursor, fuzzy search results aren't ranked
+    stmt, latest_probability, _ = get_students_stmt(
+        db,
+        faculty=faculty,
+        min_probability=min_probability,
+        max_probability=max_probability,
+        search=search,
+        estado=estado,
+        model_version_id=model_version_id,
+        archived=archived,
+        search_mode=search_mode,
+    )
+
+    # Without range only the students without prediction are listed (see
+    # get_students_stmt), their probability in the cursor is -1
+    with_probability = min_probability is not None and max_probability is not None
+    sort_probability = latest_probability if with_probability else literal(-1.0)
+    if cursor is not None:
+        last_probability, last_id = helpers.decode_cursor(cursor)
+        if with_probability:
+            # The first condition is the bound of the index scan
+            stmt = stmt.where(
+                latest_probability <= last_probability,
+                (latest_probability < last_probability) | (models.Student.id > last_id),
+            )
+        else:
+            stmt = stmt.where(models.Student.id > last_id)
+    order_by = [models.Student.id.asc()]
+    if with_probability:
+        order_by.insert(0, latest_probability.desc())
+
+    # Fetch an extra row to know if there is a next page
+    rows = db.execute(
+        stmt.add_columns(sort_probability).order_by(*order_by).limit(limit + 1)
+    ).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_student, last_probability = rows[-1]
+        next_cursor = helpers.encode_cursor([last_probability, last_student.id])
+
+    return schemas.StudentCursorPage.model_validate(
+        {
+            "items": [student for student, _ in rows],
+            "limit": limit,
+            "next_cursor": next_cursor,
+        },
+        from_attributes=True,
+    )
+
+
+def get_students_for_ia_stmt(
     purpose: str | None = None,
     model_version: model_version_models.ModelVersion | None = None,
-) -> pd.DataFrame:
+    candidate_model_versions: list[model_version_models.ModelVersion] | None = None,
+):
+    # Select the columns only, there is no need to build ORM objects
+    columns = models.Student.__table__.columns
     if purpose == "TRAINING":
         stmt = (
-            select(models.Student)
+            select(*columns)
             .filter(
                 models.Student.estado.in_(
                     [constants.EstadoEnum.ABANDONO, constants.EstadoEnum.EGRESADO]
@@ -126,20 +255,42 @@ def get_students_data_for_ia(
             .filter_by(archived=False)
         )
     elif model_version is not None:
-        predictions_exists = exists().where(
-            (Prediction.student_id == models.Student.id)
-            & (Prediction.model_version == f"v{model_version.version}.0")
+        model_versions = [model_version, *(candidate_model_versions or [])]
+        # The predictions of runs in staging or discarded don't count as scored
+        predictions_exist = {
+            version.id: exists().where(
+                (Prediction.student_id == models.Student.id)
+                & (Prediction.model_version_id == version.id)
+                & (Prediction.features_hash == models.Student.features_hash)
+                & get_published_filter(Prediction.run_id)
+            )
+            for version in model_versions
+        }
+        # New students and students whose features changed since their last
+        # prediction, for at least one of the model versions
+        stmt = select(*columns).where(
+            or_(*[not_(exist) for exist in predictions_exist.values()])
         )
-        stmt = select(models.Student).where(not_(predictions_exists))
+        if candidate_model_versions:
+            # Flag the model versions every student already has up-to-date predictions for
+            stmt = stmt.add_columns(
+                *[
+                    exist.label(f"has_prediction_{model_version_id}")
+                    for model_version_id, exist in predictions_exist.items()
+                ]
+            )
     else:
-        stmt = select(models.Student)
+        stmt = select(*columns)
+    return stmt
 
-    result = db.execute(stmt).scalars().all()
-    # Convert the result to a list of dictionaries
-    students = [
-        {k: v for k, v in student.__dict__.items() if not k.startswith("_")}
-        for student in result
-    ]
+
+def get_students_data_for_ia(
+    db: Session,
+    purpose: str | None = None,
+    model_version: model_version_models.ModelVersion | None = None,
+) -> pd.DataFrame:
+    result = db.execute(get_students_for_ia_stmt(purpose, model_version))
+    students = result.all()
 
     if not students:
         raise HTTPException(
@@ -148,10 +299,52 @@ def get_students_data_for_ia(
         )
 
     # Convert the students to a Pandas DataFrame
-    df = pd.DataFrame(students)
+    df = pd.DataFrame(students, columns=list(result.keys()))
     return df
 
 
+def get_students_chunks_for_ia(
+    db: Session,
+    chunk_size: int,
+    purpose: str | None = None,
+    model_version: model_version_models.ModelVersion | None = None,
+    candidate_model_versions: list[model_version_models.ModelVersion] | None = None,
+    keyset: bool = False,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the students in DataFrames of at most chunk_size rows.
+
+    The rows are read with a server-side cursor, so only one chunk is held
+    in memory at a time. With keyset, every chunk is read with its own query
+    (the students after the last id read) instead, so the caller can commit
+    the transaction between chunks.
+    """
+    stmt = get_students_for_ia_stmt(
+        purpose, model_version, candidate_model_versions
+    ).order_by(models.Student.id)
+    if keyset:
+        last_id = None
+        while True:
+            chunk_stmt = stmt.limit(chunk_size)
+            if last_id is not None:
+                chunk_stmt = chunk_stmt.where(models.Student.id > last_id)
+            result = db.execute(chunk_stmt)
+            columns = list(result.keys())
+            rows = result.all()
+            if not rows:
+                return
+            df = pd.DataFrame(rows, columns=columns)
+            last_id = int(df["id"].iloc[-1])
+            yield df
+            if len(rows) < chunk_size:
+                return
+
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    columns = list(result.keys())
+    for partition in result.partitions():
+        yield pd.DataFrame(partition, columns=columns)
+
+
 def get_student(db: Session, student_id: int) -> models.Student | None:
     return db.execute(
         select(models.Student).filter_by(id=student_id)
@@ -165,9 +358,12 @@ def create_student(db: Session, data: schemas.CreateOrUpdateStudent) -> models.S
     faculty = faculty_crud.get_faculty_by_short_name(db, data.faculty_short_name.value)
     if faculty is not None:
         student.faculty_id = faculty.id
+    student.update_features_hash()
 
     db.add(student)
+    report_crud.bump_data_version(db, models.Student.__tablename__)
     db.commit()
+    report_cache.invalidate()
     db.refresh(student)
     return student
 
@@ -183,7 +379,10 @@ def update_student(
     faculty = faculty_crud.get_faculty_by_short_name(db, data.faculty_short_name.value)
     if faculty is not None:
         student.faculty_id = faculty.id
+    student.update_features_hash()
 
+    report_crud.bump_data_version(db, models.Student.__tablename__)
     db.commit()
+    report_cache.invalidate()
     db.refresh(student)
     return student
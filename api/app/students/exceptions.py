@@ -4,3 +4,8 @@ from fastapi import HTTPException, status
 class StudentNotFound(HTTPException):
     def __init__(self, detail: str = "Student not found"):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
+
+
+class InvalidCursor(HTTPException):
+    def __init__(self, detail: str = "Invalid cursor"):
+        super().__init__(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
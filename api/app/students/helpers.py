@@ -0,0 +1,55 @@
+import base64
+import binascii
+import hashlib
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any, Mapping
+
+from app.students import constants, exceptions
+
+
+def normalize_feature_value(value: Any) -> str:
+    # Same representation whether the value comes from a request, pandas or the database
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def get_features_hash(values: Mapping[str, Any]) -> str:
+    """
+    Fingerprint of the model-relevant features of a student.
+
+    Predictions store the fingerprint they were computed from, so a student
+    only needs to be rescored when it changes.
+    """
+    payload = "\x1f".join(
+        normalize_feature_value(values.get(column))
+        for column in constants.FEATURE_COLUMNS
+    )
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def encode_cursor(values: list[Any]) -> str:
+    """Opaque cursor with the sort key of the last item of a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise exceptions.InvalidCursor()
+    if not isinstance(values, list) or len(values) != 2:
+        raise exceptions.InvalidCursor()
+    if not all(isinstance(value, (int, float)) for value in values):
+        raise exceptions.InvalidCursor()
+    return values
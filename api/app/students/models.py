@@ -1,8 +1,25 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean
+from sqlalchemy import (
+    DDL,
+    Column,
+    Integer,
+    String,
+    Date,
+    ForeignKey,
+    Boolean,
+    Index,
+    and_,
+    event,
+    func,
+    literal_column,
+    select,
+    text,
+)
 from sqlalchemy.orm import relationship
 
+from app.config import settings
 from app.database import Base, TimestampMixin
 from app.predictions import models as prediction_models
+from app.students import constants, helpers
 
 
 class Student(Base, TimestampMixin):
@@ -32,6 +49,93 @@ class Student(Base, TimestampMixin):
     formacion_academica_madre = Column(String, nullable=True)
     formacion_academica_hermanos = Column(String, nullable=True)
 
+    # Fingerprint of the dropout factors used by the models
+    features_hash = Column(String(32), nullable=True)
+
     # Relationships
     faculty = relationship("Faculty", back_populates="students")
     predictions = relationship(prediction_models.Prediction, back_populates="student")
+    # Latest STUDENT_PREDICTION_HISTORY_LIMIT predictions, newest first
+    latest_predictions = relationship(
+        prediction_models.Prediction,
+        primaryjoin=lambda: and_(
+            prediction_models.Prediction.student_id == Student.id,
+            prediction_models.Prediction.id.in_(get_latest_prediction_ids()),
+        ),
+        order_by=lambda: (
+            prediction_models.Prediction.created_at.desc(),
+            prediction_models.Prediction.id.desc(),
+        ),
+        viewonly=True,
+    )
+
+    __table_args__ = (
+        # Filters of the listings, exports and reports (estado and faculty)
+        Index("students_estado_faculty_id_idx", "estado", "faculty_id", "id"),
+        # Current students (the default of the listings and the reports), by faculty
+        Index(
+            "students_vigente_faculty_id_idx",
+            "faculty_id",
+            "id",
+            postgresql_where=text("estado = 'V'"),
+        ),
+        # Archived students, a small fraction of the table
+        Index(
+            "students_archived_idx",
+            "estado",
+            "faculty_id",
+            postgresql_where=text("archived"),
+        ),
+        # Accent-insensitive trigram index of the full name (name search)
+        Index(
+            "students_search_name_idx",
+            text("f_unaccent(first_name || ' ' || last_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+    )
+
+    def update_features_hash(self):
+        self.features_hash = helpers.get_features_hash(
+            {column: getattr(self, column) for column in constants.FEATURE_COLUMNS}
+        )
+
+
+def get_latest_prediction_ids():
+    """Ids of the latest predictions of the student of the enclosing prediction row"""
+    recent_predictions = prediction_models.Prediction.__table__.alias(
+        "recent_predictions"
+    )
+    return (
+        select(recent_predictions.c.id)
+        .where(
+            recent_predictions.c.student_id == prediction_models.Prediction.student_id,
+            prediction_models.get_published_filter(recent_predictions.c.run_id),
+        )
+        .order_by(
+            recent_predictions.c.created_at.desc(), recent_predictions.c.id.desc()
+        )
+        .limit(settings.STUDENT_PREDICTION_HISTORY_LIMIT)
+        .correlate(prediction_models.Prediction.__table__)
+        .scalar_subquery()
+    )
+
+
+def get_search_name():
+    """Accent-insensitive full name, same expression as students_search_name_idx"""
+    return func.f_unaccent(
+        Student.first_name.op("||")(literal_column("' '")).op("||")(Student.last_name)
+    )
+
+
+# unaccent is not immutable, so it's wrapped in a function that can be indexed
+event.listen(
+    Student.__table__,
+    "before_create",
+    DDL(
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm;"
+        "CREATE EXTENSION IF NOT EXISTS unaccent;"
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    ).execute_if(dialect="postgresql"),
+)
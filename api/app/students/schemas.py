@@ -31,7 +31,18 @@ class Student(StudentBase):
     first_name: str = Field(min_length=2, max_length=200)
     last_name: str = Field(min_length=2, max_length=200)
     faculty: faculty_schemas.FacultyRead
-    predictions: list[prediction_schemas.PredictionBase]
+    # Latest predictions only (STUDENT_PREDICTION_HISTORY_LIMIT), the full
+    # history is paginated in /students/{student_id}/predictions
+    predictions: list[prediction_schemas.PredictionBase] = Field(
+        validation_alias="latest_predictions"
+    )
+
+
+class StudentCursorPage(BaseModel):
+    items: list[Student]
+    limit: int
+    # Cursor of the next page, None on the last page
+    next_cursor: str | None = None
 
 
 class CreateOrUpdateStudent(StudentBase):
@@ -40,6 +51,10 @@ class CreateOrUpdateStudent(StudentBase):
     last_name: str = Field(min_length=2, max_length=200)
 
 
+class StudentScoreRequest(StudentBase):
+    faculty_short_name: faculty_constants.FacultiesOptions
+
+
 class StudentWithPrediction(StudentBase):
     id: int
     first_name: str = Field(min_length=2, max_length=200)
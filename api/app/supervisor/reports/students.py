@@ -5,13 +5,14 @@ from typing import List, Dict, Any
 
 import pandas as pd
 import xlsxwriter
-from sqlalchemy import select, desc, func
+from sqlalchemy import select, desc
 from sqlalchemy.orm import Session
 
 from app.faculties import constants as faculty_constants
 from app.faculties import crud as faculty_crud
-from app.predictions.models import Prediction
+from app.predictions.models import StudentLatestPrediction
 from app.students import models, constants
+from app.students import crud as student_crud
 from app.model_versions import crud as model_versions_crud
 
 
@@ -28,60 +29,26 @@ def get_students_for_export(
     """
     Get all students matching the filters for export purposes without pagination
     """
-    # If model_version_id is provided, get the model version
-    if model_version_id is not None:
-        model_version = model_versions_crud.get_model_version(db, model_version_id)
-        if model_version is None:
-            # If model version not found, use the active model
-            model_version = model_versions_crud.get_active_model_version(db)
-    else:
-        # If no model_version_id provided, use the active model
-        model_version = model_versions_crud.get_active_model_version(db)
-
-    # Get the model version string (e.g., "v1.0")
-    model_version_str = f"v{model_version.version}.0" if model_version else None
-
-    # First, create a subquery to get the latest prediction for each student
-    latest_prediction_subq = select(
-        Prediction.student_id,
-        Prediction.dropout_probability,
-        Prediction.model_version,
-        Prediction.created_at,
-        func.row_number()
-        .over(partition_by=Prediction.student_id, order_by=desc(Prediction.created_at))
-        .label("rn"),
-    )
-
-    # Filter by model version if specified
-    if model_version_str:
-        latest_prediction_subq = latest_prediction_subq.where(
-            model_version_str == Prediction.model_version
-        )
-
-    latest_prediction_subq = latest_prediction_subq.subquery()
-
-    # Filter to only get the most recent prediction for each student
-    latest_prediction = (
-        select(
-            latest_prediction_subq.c.student_id,
-            latest_prediction_subq.c.dropout_probability.label("latest_probability"),
-            latest_prediction_subq.c.model_version.label("model_version"),
-            latest_prediction_subq.c.created_at.label("prediction_date"),
-        )
-        .where(latest_prediction_subq.c.rn == 1)
-        .subquery()
+    # Model version used (the active one if not provided or not found)
+    model_version_id = model_versions_crud.get_model_version_id_or_active(
+        db, model_version_id
     )
 
+    # Latest prediction of every student with the model version, maintained
+    # by the prediction write path (a single row per student and model version)
+    latest_probability = StudentLatestPrediction.dropout_probability
     stmt = (
         select(
             models.Student,
-            latest_prediction.c.latest_probability,
-            latest_prediction.c.model_version,
-            latest_prediction.c.prediction_date,
+            latest_probability.label("latest_probability"),
+            StudentLatestPrediction.model_version,
+            StudentLatestPrediction.created_at.label("prediction_date"),
         )
         .filter(estado == models.Student.estado)
         .outerjoin(
-            latest_prediction, models.Student.id == latest_prediction.c.student_id
+            StudentLatestPrediction,
+            (StudentLatestPrediction.student_id == models.Student.id)
+            & (StudentLatestPrediction.model_version_id == model_version_id),
         )
     )
 
@@ -98,29 +65,25 @@ def get_students_for_export(
     if min_probability is not None:
         min_value = min_probability / 100.0  # Convert percentage to decimal
         # Only include students with predictions that meet the minimum threshold
-        stmt = stmt.where(latest_prediction.c.latest_probability >= min_value)
+        stmt = stmt.where(latest_probability >= min_value)
 
     if max_probability is not None:
         max_value = max_probability / 100.0  # Convert percentage to decimal
         # Only include students with predictions that meet the maximum threshold
-        stmt = stmt.where(latest_prediction.c.latest_probability <= max_value)
+        stmt = stmt.where(latest_probability <= max_value)
 
     # Filter by search term if specified
     if search:
-        search_term = f"%{search}%"
-        stmt = stmt.where(
-            (models.Student.first_name.ilike(search_term))
-            | (models.Student.last_name.ilike(search_term))
-        )
+        stmt, _ = student_crud.filter_by_search(stmt, search)
 
     if min_probability is not None and max_probability is not None:
         # Order by dropout probability in descending order, placing NULL values last
         stmt = stmt.order_by(
-            latest_prediction.c.latest_probability.is_(None).asc(),
-            desc(latest_prediction.c.latest_probability),
+            latest_probability.is_(None).asc(),
+            desc(latest_probability),
         )
     else:
-        stmt = stmt.filter(latest_prediction.c.latest_probability.is_(None))
+        stmt = stmt.filter(latest_probability.is_(None))
 
     result = db.execute(stmt).all()
 
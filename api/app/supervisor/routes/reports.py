@@ -1,11 +1,18 @@
 from typing import Optional
 
 from fastapi import APIRouter, Query, HTTPException
+from sqlalchemy.orm import Session
 
 from app.api.deps import SessionDep
+from app.config import settings
+from app.pagination import LimitOffsetPage
+from app.reports.cache import report_cache
 from app.reports.service import ReportService
 from app.reports.schemas import (
+    DashboardResponse,
     DropoutDistributionResponse,
+    ReportCacheStats,
+    ReportSnapshotRead,
     FacultyDropoutDistributionResponse,
     DropoutFactorsImpactResponse,
 )
@@ -15,8 +22,22 @@ from app.faculties import crud as faculty_crud
 router = APIRouter(prefix="/reports")
 
 
+def get_faculty_id(
+    db: Session, faculty: faculty_reports.FacultiesOptions | None
+) -> int | None:
+    if faculty is None:
+        return None
+    faculty_db = faculty_crud.get_faculty_by_short_name(db, faculty.value)
+    if not faculty_db:
+        raise HTTPException(
+            status_code=404,
+            detail="No se ha encontrado ninguna facultad con el nombre especificado.",
+        )
+    return faculty_db.id
+
+
 @router.get("/dropout-distribution", response_model=DropoutDistributionResponse)
-async def get_dropout_distribution(
+def get_dropout_distribution(
     db: SessionDep,
     faculty: Optional[faculty_reports.FacultiesOptions] = Query(
         None, description="Filter by faculty"
@@ -24,26 +45,55 @@ async def get_dropout_distribution(
     model_version_id: int | None = Query(
         default=None, description="ID of the model version to use for predictions"
     ),
+    buckets: int = Query(
+        default=settings.REPORT_DISTRIBUTION_BUCKETS,
+        ge=1,
+        le=100,
+        description="Number of buckets of the distribution",
+    ),
+    high_risk_threshold: float = Query(
+        default=settings.REPORT_HIGH_RISK_THRESHOLD,
+        ge=0,
+        le=1,
+        description="Minimum probability of the high risk students",
+    ),
+    medium_risk_threshold: float = Query(
+        default=settings.REPORT_MEDIUM_RISK_THRESHOLD,
+        ge=0,
+        le=1,
+        description="Minimum probability of the medium risk students",
+    ),
 ):
     """
     Get the distribution of dropout probabilities across all students
     """
-    if faculty is not None:
-        faculty_db = faculty_crud.get_faculty_by_short_name(db, faculty.value)
-        if not faculty_db:
-            raise HTTPException(
-                status_code=404,
-                detail="No se ha encontrado ninguna facultad con el nombre especificado.",
-            )
-        faculty_id = faculty_db.id
-    else:
-        faculty_id = None
+    if medium_risk_threshold > high_risk_threshold:
+        raise HTTPException(
+            status_code=400,
+            detail="El umbral de riesgo medio no puede ser mayor que el de riesgo alto.",
+        )
 
     try:
-        report_service = ReportService(db)
-        return report_service.get_dropout_probability_distribution(
-            faculty_id, model_version_id
+        return report_cache.get_or_compute(
+            db,
+            (
+                "dropout-distribution",
+                faculty,
+                model_version_id,
+                buckets,
+                high_risk_threshold,
+                medium_risk_threshold,
+            ),
+            lambda db: ReportService(db).get_dropout_probability_distribution(
+                get_faculty_id(db, faculty),
+                model_version_id,
+                buckets=buckets,
+                high_risk_threshold=high_risk_threshold,
+                medium_risk_threshold=medium_risk_threshold,
+            ),
         )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -51,7 +101,7 @@ async def get_dropout_distribution(
 @router.get(
     "/faculty-dropout-distribution", response_model=FacultyDropoutDistributionResponse
 )
-async def get_faculty_dropout_distribution(
+def get_faculty_dropout_distribution(
     db: SessionDep,
     faculty: Optional[faculty_reports.FacultiesOptions] = Query(
         None, description="Filter by faculty"
@@ -59,32 +109,32 @@ async def get_faculty_dropout_distribution(
     model_version_id: int | None = Query(
         default=None, description="ID of the model version to use for predictions"
     ),
+    buckets: int = Query(
+        default=settings.REPORT_DISTRIBUTION_BUCKETS,
+        ge=1,
+        le=100,
+        description="Number of buckets of the distribution",
+    ),
 ):
     """
     Get the distribution of dropout probabilities across all faculties
     """
-    if faculty is not None:
-        faculty_db = faculty_crud.get_faculty_by_short_name(db, faculty.value)
-        if not faculty_db:
-            raise HTTPException(
-                status_code=404,
-                detail="No se ha encontrado ninguna facultad con el nombre especificado.",
-            )
-        faculty_id = faculty_db.id
-    else:
-        faculty_id = None
-
     try:
-        report_service = ReportService(db)
-        return report_service.get_faculty_dropout_distribution(
-            faculty_id, model_version_id
+        return report_cache.get_or_compute(
+            db,
+            ("faculty-dropout-distribution", faculty, model_version_id, buckets),
+            lambda db: ReportService(db).get_faculty_dropout_distribution(
+                get_faculty_id(db, faculty), model_version_id, buckets=buckets
+            ),
         )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/dropout-factors-impact", response_model=DropoutFactorsImpactResponse)
-async def get_dropout_factors_impact(
+def get_dropout_factors_impact(
     db: SessionDep,
     faculty: Optional[faculty_reports.FacultiesOptions] = Query(
         None, description="Filter by faculty"
@@ -96,19 +146,104 @@ async def get_dropout_factors_impact(
     """
     Get the most impactful factors for student dropout
     """
-    if faculty is not None:
-        faculty_db = faculty_crud.get_faculty_by_short_name(db, faculty.value)
-        if not faculty_db:
-            raise HTTPException(
-                status_code=404,
-                detail="No se ha encontrado ninguna facultad con el nombre especificado.",
-            )
-        faculty_id = faculty_db.id
-    else:
-        faculty_id = None
+    try:
+        return report_cache.get_or_compute(
+            db,
+            ("dropout-factors-impact", faculty, model_version_id),
+            lambda db: ReportService(db).get_dropout_factors_impact(
+                get_faculty_id(db, faculty), model_version_id
+            ),
+        )
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/dashboard", response_model=DashboardResponse)
+def get_dashboard(
+    db: SessionDep,
+    faculty: Optional[faculty_reports.FacultiesOptions] = Query(
+        None, description="Filter by faculty"
+    ),
+    model_version_id: int | None = Query(
+        default=None, description="ID of the model version to use for predictions"
+    ),
+    buckets: int = Query(
+        default=settings.REPORT_DISTRIBUTION_BUCKETS,
+        ge=1,
+        le=100,
+        description="Number of buckets of the distributions",
+    ),
+    high_risk_threshold: float = Query(
+        default=settings.REPORT_HIGH_RISK_THRESHOLD,
+        ge=0,
+        le=1,
+        description="Minimum probability of the high risk students",
+    ),
+    medium_risk_threshold: float = Query(
+        default=settings.REPORT_MEDIUM_RISK_THRESHOLD,
+        ge=0,
+        le=1,
+        description="Minimum probability of the medium risk students",
+    ),
+):
+    """
+    Get the dropout distribution, faculty dropout distribution and dropout
+    factors impact reports from a single read of the students
+    """
+    if medium_risk_threshold > high_risk_threshold:
+        raise HTTPException(
+            status_code=400,
+            detail="El umbral de riesgo medio no puede ser mayor que el de riesgo alto.",
+        )
 
     try:
-        report_service = ReportService(db)
-        return report_service.get_dropout_factors_impact(faculty_id, model_version_id)
+        return report_cache.get_or_compute(
+            db,
+            (
+                "dashboard",
+                faculty,
+                model_version_id,
+                buckets,
+                high_risk_threshold,
+                medium_risk_threshold,
+            ),
+            lambda db: ReportService(db).get_dashboard(
+                get_faculty_id(db, faculty),
+                model_version_id,
+                buckets=buckets,
+                high_risk_threshold=high_risk_threshold,
+                medium_risk_threshold=medium_risk_threshold,
+            ),
+        )
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/snapshots", response_model=LimitOffsetPage[ReportSnapshotRead])
+def get_report_snapshots(
+    db: SessionDep,
+    faculty: Optional[faculty_reports.FacultiesOptions] = Query(
+        None, description="Filter by faculty"
+    ),
+    model_version_id: int | None = Query(
+        default=None, description="ID of the model version of the snapshots"
+    ),
+):
+    """
+    Reports snapshotted at the end of every prediction run, newest first
+    """
+    return ReportService(db).get_report_snapshots(
+        get_faculty_id(db, faculty), model_version_id
+    )
+
+
+@router.get("/cache-stats", response_model=ReportCacheStats)
+def get_report_cache_stats():
+    """
+    Hits (fresh and stale) and misses of the report cache
+    """
+    return report_cache.get_stats()
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Query, HTTPException, Response
-from fastapi_pagination import LimitOffsetPage
 from datetime import datetime
 
+from app.pagination import LimitOffsetPage
 from app.api.deps import SessionDep, SupervisorRequired
+from app.predictions import constants as prediction_constants
+from app.predictions import crud as prediction_crud
+from app.predictions import schemas as prediction_schemas
 from app.students import schemas as student_schemas
 from app.students import crud as student_crud
 from app.students import constants as student_constants
@@ -26,6 +29,12 @@ def get_students(
         default=None, description="ID of the model version to use for predictions"
     ),
     archived: bool = False,
+    search_mode: student_constants.SearchModeEnum = Query(
+        default=student_constants.SearchModeEnum.CONTAINS,
+        description=(
+            "Name search mode (contains, fuzzy: similar names ranked by similarity)"
+        ),
+    ),
 ):
     return student_crud.get_students(
         db,
@@ -36,6 +45,100 @@ def get_students(
         estado=estado,
         model_version_id=model_version_id,
         archived=archived,
+        search_mode=search_mode,
+    )
+
+
+@router.get("/cursor", response_model=student_schemas.StudentCursorPage)
+def get_students_by_cursor(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    cursor: str | None = Query(
+        default=None, description="Cursor of the page, next_cursor of the previous page"
+    ),
+    limit: int = Query(default=50, ge=1, le=100),
+    faculty: faculty_constants.FacultiesOptions | None = None,
+    min_probability: int | None = Query(default=None, ge=0, le=100),
+    max_probability: int | None = Query(default=None, ge=0, le=100),
+    search: str | None = None,
+    estado: student_constants.EstadoEnum = student_constants.EstadoEnum.VIGENTE,
+    model_version_id: int | None = Query(
+        default=None, description="ID of the model version to use for predictions"
+    ),
+    archived: bool = False,
+    search_mode: student_constants.SearchModeEnum = Query(
+        default=student_constants.SearchModeEnum.CONTAINS,
+        description="Name search mode (contains, fuzzy: similar names)",
+    ),
+):
+    """
+    Same listing as /students, paginated with a cursor instead of limit/offset.
+    Every page costs the same regardless of its position.
+    """
+    return student_crud.get_students_by_cursor(
+        db,
+        limit=limit,
+        cursor=cursor,
+        faculty=faculty,
+        min_probability=min_probability,
+        max_probability=max_probability,
+        search=search,
+        estado=estado,
+        model_version_id=model_version_id,
+        archived=archived,
+        search_mode=search_mode,
+    )
+
+
+@router.get(
+    "/{student_id}/predictions",
+    response_model=LimitOffsetPage[prediction_schemas.PredictionBase],
+)
+def get_student_predictions(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    student: student_dependencies.StudentDep,
+    model_version_id: int | None = Query(
+        default=None, description="ID of the model version of the predictions"
+    ),
+):
+    """
+    Full prediction history of a student, newest first.
+    """
+    return prediction_crud.get_student_predictions(db, student.id, model_version_id)
+
+
+@router.get("/{student_id}/risk-history", response_model=prediction_schemas.RiskHistory)
+def get_student_risk_history(
+    _supervisor: SupervisorRequired,
+    db: SessionDep,
+    student: student_dependencies.StudentDep,
+    points: int = Query(
+        default=60, ge=1, le=1000, description="Max number of points per model version"
+    ),
+    interval: prediction_constants.RiskHistoryInterval | None = Query(
+        default=None,
+        description=(
+            "Last prediction per day, week or month (evenly spaced buckets if empty)"
+        ),
+    ),
+    model_version_id: int | None = Query(
+        default=None, description="ID of the model version of the predictions"
+    ),
+):
+    """
+    Dropout probability of a student over time, one series per model version,
+    downsampled to at most `points` points.
+    """
+    history = prediction_crud.get_student_risk_history(
+        db,
+        student.id,
+        points=points,
+        interval=interval,
+        model_version_id=model_version_id,
+    )
+    return prediction_schemas.RiskHistory(
+        student_id=student.id, interval=interval, points=history
     )
 
 
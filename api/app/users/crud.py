@@ -2,10 +2,10 @@ from typing import Any
 from datetime import datetime, timedelta
 
 
-from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy import select, func
 from sqlalchemy.orm import Session
 
+from app.pagination import paginate
 from app.security import get_password_hash
 from app.users import models, schemas, constants
 
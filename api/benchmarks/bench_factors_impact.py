@@ -0,0 +1,126 @@
+"""
+Benchmark the dropout factors impact report.
+
+Compares the legacy analysis (a loop over every factor and student with
+getattr, averages with nested sums) against get_factors_impact, and checks
+both produce the same factors.
+
+The legacy rows are built before timing it, so the ORM materialization it
+paid on top of the loop is not included.
+
+Usage (from the api directory, no database required):
+
+    python -m benchmarks.bench_factors_impact
+"""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+from app.predictions.encoder import CATEGORICAL_VOCABULARIES
+from app.reports.service import FACTORS_TO_ANALYZE, get_factors_impact
+
+SIZES = [100_000, 1_000_000]
+# Share of missing values of every factor
+MISSING_RATE = 0.05
+
+
+def build_students(size: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    numeric_values = {
+        "nro_hijos": range(0, 4),
+        "ultimo_semestre_cursado": range(1, 11),
+        "cuantos_colegios_secundaria": range(1, 4),
+    }
+    df = pd.DataFrame(index=range(size))
+    for factor_key, _ in FACTORS_TO_ANALYZE:
+        if factor_key in numeric_values:
+            values = list(numeric_values[factor_key])
+        else:
+            values = [value.value for value in CATEGORICAL_VOCABULARIES[factor_key]]
+        # Database values: Python ints and strings, None when missing
+        column = pd.Series(
+            np.array(values, dtype=object)[rng.integers(0, len(values), size)],
+            dtype=object,
+        )
+        column[rng.random(size) < MISSING_RATE] = None
+        df[factor_key] = column
+    df["dropout_probability"] = np.round(rng.random(size), 2).astype(object)
+    return df
+
+
+def legacy_factors_impact(results: list) -> list[dict]:
+    factor_impact_scores = []
+    for factor_key, factor_name in FACTORS_TO_ANALYZE:
+        factor_values = {}
+        for student, probability in results:
+            factor_value = getattr(student, factor_key)
+            if factor_value is not None:
+                if factor_value not in factor_values:
+                    factor_values[factor_value] = []
+                factor_values[factor_value].append(probability)
+        if not factor_values:
+            continue
+        avg_probabilities = [
+            sum(probs) / len(probs) for probs in factor_values.values() if probs
+        ]
+        if not avg_probabilities:
+            continue
+        variance = sum(
+            (p - sum(avg_probabilities) / len(avg_probabilities)) ** 2
+            for p in avg_probabilities
+        ) / len(avg_probabilities)
+        highest_risk_value = max(
+            factor_values.items(),
+            key=lambda x: sum(x[1]) / len(x[1]) if x[1] else 0,
+        )
+        highest_risk_prob = (
+            sum(highest_risk_value[1]) / len(highest_risk_value[1])
+            if highest_risk_value[1]
+            else 0
+        )
+        description = f"Los estudiantes con {factor_name.lower()} '{highest_risk_value[0]}' tienen una predicción de deserción promedio de {round(highest_risk_prob * 100, 1)}%"
+        factor_impact_scores.append(
+            {
+                "factor": factor_name,
+                "impact_score": variance,
+                "description": description,
+            }
+        )
+    factor_impact_scores.sort(key=lambda x: x["impact_score"], reverse=True)
+    if factor_impact_scores:
+        max_score = max(item["impact_score"] for item in factor_impact_scores)
+        for item in factor_impact_scores:
+            item["impact_score"] = round(item["impact_score"] / max_score * 100, 1)
+    return factor_impact_scores
+
+
+def run():
+    for size in SIZES:
+        df = build_students(size)
+        factor_keys = [factor_key for factor_key, _ in FACTORS_TO_ANALYZE]
+        results = [
+            (SimpleNamespace(**dict(zip(factor_keys, row[:-1]))), row[-1])
+            for row in df.itertuples(index=False, name=None)
+        ]
+
+        start = time.perf_counter()
+        legacy = legacy_factors_impact(results)
+        legacy_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = get_factors_impact(df)
+        vectorized_elapsed = time.perf_counter() - start
+
+        assert vectorized == legacy, "The reports are different"
+        print(
+            f"{size:>9} students | legacy {legacy_elapsed:8.3f} s | "
+            f"vectorized {vectorized_elapsed:8.3f} s | "
+            f"x{legacy_elapsed / vectorized_elapsed:6.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,95 @@
+"""
+Benchmark the persistence of prediction results.
+
+Compares the legacy per-student path (lookup + add/commit/refresh per row)
+against the bulk insert used by /predictions/predict.
+
+Usage (from the api directory, with a configured database):
+
+    ENVIRONMENT=development python -m benchmarks.bench_prediction_persistence
+"""
+
+import itertools
+import random
+import time
+
+from sqlalchemy import delete, select
+
+from app.database import SessionLocal
+from app.model_versions import models as model_version_models
+from app.predictions import crud, models
+from app.students import crud as student_crud
+from app.students import models as student_models
+
+SIZES = [10_000, 100_000]
+
+
+def legacy_persist(db, predictions, model_version):
+    for student_id, probability, features_hash in predictions:
+        if not student_crud.get_student(db, student_id):
+            continue
+        crud.create_prediction(
+            db,
+            student_id=student_id,
+            prediction=probability,
+            model_version=model_version,
+            features_hash=features_hash,
+        )
+
+
+def bulk_persist(db, predictions, model_version):
+    crud.create_predictions(db, predictions, model_version=model_version)
+
+
+def create_benchmark_model_version(db) -> model_version_models.ModelVersion:
+    # Predictions reference a model version, use a throwaway one
+    model_version = model_version_models.ModelVersion(
+        version=-1,
+        model_path="benchmark",
+        accuracy=0,
+        num_samples=0,
+        num_features=0,
+    )
+    db.add(model_version)
+    db.commit()
+    return model_version
+
+
+def build_predictions(db, size: int) -> list[tuple[int, float, str | None]]:
+    student_ids = db.execute(select(student_models.Student.id)).scalars().all()
+    if not student_ids:
+        raise SystemExit("The database has no students to benchmark with")
+    # Repeat the existing ids to reach the requested size
+    ids = list(itertools.islice(itertools.cycle(student_ids), size))
+    return [(student_id, round(random.random(), 2), None) for student_id in ids]
+
+
+def clean_up(db, model_version):
+    for model in (models.StudentLatestPrediction, models.Prediction):
+        db.execute(delete(model).where(model.model_version_id == model_version.id))
+    db.commit()
+
+
+def run():
+    db = SessionLocal()
+    model_version = create_benchmark_model_version(db)
+    try:
+        for size in SIZES:
+            predictions = build_predictions(db, size)
+            for name, persist in (("legacy", legacy_persist), ("bulk", bulk_persist)):
+                start = time.perf_counter()
+                persist(db, predictions, model_version)
+                elapsed = time.perf_counter() - start
+                clean_up(db, model_version)
+                print(
+                    f"{name:>6} | {size:>7} rows | {elapsed:8.2f} s | {size / elapsed:10.0f} rows/s"
+                )
+    finally:
+        clean_up(db, model_version)
+        db.delete(model_version)
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,96 @@
+"""
+Benchmark the preprocessing of students before scoring them.
+
+Compares the legacy preprocessing (one pd.get_dummies call per categorical
+column and missing model columns added one by one) against FeatureEncoder.
+
+Usage (from the api directory, no database required):
+
+    python -m benchmarks.bench_preprocessing
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.faculties.constants import FACULTIES
+from app.predictions.encoder import CATEGORICAL_VOCABULARIES, FeatureEncoder
+
+SIZES = [10_000, 100_000]
+FACULTY_MAPPING = {idx: faculty["short_name"] for idx, faculty in enumerate(FACULTIES)}
+
+
+def build_students(size: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame(
+        {
+            "id": np.arange(size),
+            "archived": False,
+            "estado": "V",
+            "first_name": "Nombre",
+            "last_name": "Apellido",
+            "faculty_id": rng.integers(0, len(FACULTIES), size),
+            "ultimo_semestre_cursado": rng.integers(1, 10, size),
+            "fecha_nac": pd.to_datetime("1995-01-01")
+            + pd.to_timedelta(rng.integers(0, 3650, size), unit="D"),
+            "nro_hijos": rng.integers(0, 4, size),
+            "anio_egreso": rng.integers(2005, 2019, size),
+            "cuantos_colegios_secundaria": rng.integers(1, 4, size),
+        }
+    )
+    for column, vocabulary in CATEGORICAL_VOCABULARIES.items():
+        if vocabulary is not None:
+            values = [value.value for value in vocabulary]
+            df[column] = rng.choice(values, size)
+    return df
+
+
+def legacy_preprocess(df: pd.DataFrame, model_columns: list[str]) -> pd.DataFrame:
+    df["fecha_nac"] = pd.to_datetime(df["fecha_nac"])
+    df["edad"] = 2019 - df["fecha_nac"].dt.year
+    df.loc[df["edad"] < 17, "edad"] = 17
+    df = df.drop("fecha_nac", axis=1)
+    df["facultad"] = df["faculty_id"].map(FACULTY_MAPPING)
+    df = df.drop(
+        columns=[
+            "id",
+            "archived",
+            "estado",
+            "first_name",
+            "last_name",
+            "faculty_id",
+            "ultimo_semestre_cursado",
+        ]
+    )
+    for col in CATEGORICAL_VOCABULARIES:
+        df = pd.get_dummies(df, columns=[col], drop_first=True)
+    for col in model_columns:
+        if col not in df.columns:
+            df[col] = False
+    return df[model_columns]
+
+
+def run():
+    encoder = FeatureEncoder.from_vocabularies(sorted(FACULTY_MAPPING.values()))
+    for size in SIZES:
+        students = build_students(size)
+
+        start = time.perf_counter()
+        legacy = legacy_preprocess(students.copy(), encoder.columns)
+        legacy_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        features = encoder.transform(students, FACULTY_MAPPING)
+        encoder_time = time.perf_counter() - start
+
+        assert np.allclose(legacy.to_numpy(dtype=np.float64), features)
+        print(
+            f"{size:>7} rows | legacy {legacy_time * 1000:8.1f} ms"
+            f" | encoder {encoder_time * 1000:8.1f} ms"
+            f" | x{legacy_time / encoder_time:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""
+Print the query plans of the student listing, its name search and the reports.
+
+Runs the real listing and report functions, captures the SQL they send to
+the database and prints EXPLAIN (ANALYZE, BUFFERS) for every statement that
+reads predictions, to check they use the prediction indexes (index scans
+instead of sequential scans over the prediction history).
+
+Usage (from the api directory, with a configured database):
+
+    ENVIRONMENT=development python -m benchmarks.explain_prediction_queries
+"""
+
+from fastapi_pagination import LimitOffsetPage, LimitOffsetParams, set_page, set_params
+from sqlalchemy import event, text
+
+from app.database import SessionLocal, engine
+from app.reports.service import ReportService
+from app.students import crud as student_crud
+from app.students import constants as student_constants
+
+PREDICTION_TABLES = ("predictions", "student_latest_prediction")
+
+
+def capture_statements(run) -> list[str]:
+    """Run the function and return the statements it executed, with their params"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if any(table in statement for table in PREDICTION_TABLES):
+            statements.append(cursor.mogrify(statement, parameters).decode())
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+
+def explain(db, name: str, statements: list[str]):
+    for statement in statements:
+        plan = db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {statement}")).scalars()
+        print(f"--- {name}")
+        print("\n".join(plan))
+        print()
+
+
+def run():
+    db = SessionLocal()
+    set_page(LimitOffsetPage)
+    set_params(LimitOffsetParams(limit=50, offset=0))
+    try:
+        queries = {
+            "students listing": lambda: student_crud.get_students(
+                db,
+                min_probability=0,
+                max_probability=100,
+                estado=student_constants.EstadoEnum.VIGENTE,
+            ),
+            "students search (contains)": lambda: student_crud.get_students(
+                db, min_probability=0, max_probability=100, search="garcia"
+            ),
+            "students search (fuzzy)": lambda: student_crud.get_students(
+                db,
+                min_probability=0,
+                max_probability=100,
+                search="garsia",
+                search_mode=student_constants.SearchModeEnum.FUZZY,
+            ),
+            "probability distribution report": lambda: ReportService(
+                db
+            ).get_dropout_probability_distribution(),
+            "dropout factors report": lambda: ReportService(
+                db
+            ).get_dropout_factors_impact(),
+        }
+        for name, query in queries.items():
+            explain(db, name, capture_statements(query))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    run()
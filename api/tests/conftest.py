@@ -3,10 +3,35 @@ from fastapi.testclient import TestClient
 from fastapi_pagination import add_pagination
 from httpx import Cookies
 
+from sqlalchemy import delete, func, select
+
 from app import database
 from app.seeder import seeder
 from app.database import engine, SessionLocal
 from app.main import app
+from app.model_versions import models as model_version_models
+from app.predictions import crud as prediction_crud
+from app.predictions import models as prediction_models
+from app.reports.models import ReportSnapshot
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-slow", action="store_true", help="Run the tests marked as slow"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: slow test, run with --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="Slow test, run with --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
 
 
 def get_authorization_cookie(
@@ -82,3 +107,36 @@ def authorized_client_as_admin(test_client):
     authorization_cookie = get_authorization_cookie_as_admin(test_client)
     test_client.cookies.update(authorization_cookie)
     return test_client
+
+
+@pytest.fixture
+def new_model_version(test_client, db):
+    """
+    Model version without predictions. Its predictions, runs, jobs and report
+    snapshots are deleted with it at the end, so the seeded data is untouched.
+    """
+    version = (
+        db.execute(select(func.max(model_version_models.ModelVersion.version))).scalar()
+        or 0
+    ) + 1
+    model_version = model_version_models.ModelVersion(
+        version=version,
+        model_path=f"model_v{version}.pkl",
+        accuracy=0.5,
+        num_samples=1,
+        num_features=1,
+    )
+    db.add(model_version)
+    db.commit()
+    db.refresh(model_version)
+    yield model_version
+    db.rollback()
+    prediction_crud.drop_predictions(db, model_version)
+    for model in (
+        ReportSnapshot,
+        prediction_models.PredictionRun,
+        prediction_models.PredictionJob,
+    ):
+        db.execute(delete(model).where(model.model_version_id == model_version.id))
+    db.delete(model_version)
+    db.commit()
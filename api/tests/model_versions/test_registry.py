@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+
+from app.model_versions.registry import LoadedModel
+
+COLUMNS = ["nro_hijos", "anio_egreso", "cuantos_colegios_secundaria"]
+
+
+def get_loaded_model() -> LoadedModel:
+    estimator = LogisticRegression().fit(
+        np.array([[0, 2008, 1], [2, 2018, 2], [1, 2010, 1], [3, 2020, 3]]),
+        np.array([0, 1, 0, 1]),
+    )
+    return LoadedModel(1, 1, estimator, COLUMNS)
+
+
+def test_predict_dropout_probabilities_matches_predict_proba():
+    loaded_model = get_loaded_model()
+    features = np.array([[1.0, 2012.0, 2.0], [0.0, 2019.0, 1.0]])
+
+    np.testing.assert_allclose(
+        loaded_model.predict_dropout_probabilities(features),
+        loaded_model.estimator.predict_proba(features)[:, 1],
+    )
+
+
+def test_predict_dropout_probabilities_rejects_missing_features():
+    loaded_model = get_loaded_model()
+    # Student with a NULL numeric column (nro_hijos), encoded as NaN
+    students = pd.DataFrame(
+        [{"nro_hijos": None, "anio_egreso": 2012, "cuantos_colegios_secundaria": 1}]
+    )
+    features = loaded_model.encoder.transform(students, {})
+    assert np.isnan(features).any()
+
+    # Test that the fast path fails like predict_proba instead of saving NaN
+    with pytest.raises(ValueError, match="NaN"):
+        loaded_model.estimator.predict_proba(features)
+    with pytest.raises(ValueError, match="NaN"):
+        loaded_model.predict_dropout_probabilities(features)
@@ -0,0 +1,355 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import insert, select, func, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.helpers import get_now_utc
+from app.model_versions import models as model_version_models
+from app.predictions import constants, crud, exceptions, models
+from app.reports import crud as report_crud
+from app.students import crud as student_crud
+from app.students import models as student_models
+
+
+def test_create_predictions(db: Session, new_model_version):
+    student_ids = db.execute(select(student_models.Student.id).limit(3)).scalars().all()
+    assert len(student_ids) > 0
+
+    # Test inserting the predictions of a run in bulk
+    created = crud.create_predictions(
+        db,
+        [(student_id, 0.5, None) for student_id in student_ids],
+        model_version=new_model_version,
+    )
+    assert created == len(student_ids)
+
+    # Verify exactly one prediction per student was added to the database
+    rows = db.execute(
+        select(models.Prediction.student_id).where(
+            models.Prediction.model_version_id == new_model_version.id
+        )
+    ).scalars()
+    assert sorted(rows) == sorted(student_ids)
+
+
+def test_create_predictions_without_rows(test_client, db: Session):
+    # Test that an empty run doesn't touch the database
+    model_version = db.execute(
+        select(model_version_models.ModelVersion).limit(1)
+    ).scalar_one()
+    assert crud.create_predictions(db, [], model_version=model_version) == 0
+
+
+def test_create_predictions_updates_latest_prediction(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id).limit(1)).scalar_one()
+
+    # Test that the latest prediction of the student is replaced by the newest one
+    crud.create_predictions(
+        db, [(student_id, 0.2, None)], model_version=new_model_version
+    )
+    crud.create_predictions(
+        db, [(student_id, 0.8, None)], model_version=new_model_version
+    )
+
+    latest = db.execute(
+        select(models.StudentLatestPrediction).filter_by(
+            model_version_id=new_model_version.id
+        )
+    ).scalar_one()
+    assert latest.student_id == student_id
+    assert latest.dropout_probability == 0.8
+    assert count_predictions(db, new_model_version.id) == 2
+
+
+def test_get_student_risk_history(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id).limit(1)).scalar_one()
+    first = datetime(2026, 1, 1, 8, tzinfo=timezone.utc)
+    # Days since the first prediction and probability
+    predictions = [(0, 0.1), (0.5, 0.2), (5, 0.5), (9, 0.8), (10, 0.9)]
+    db.execute(
+        insert(models.Prediction),
+        [
+            {
+                "student_id": student_id,
+                "dropout_probability": probability,
+                "model_version_id": new_model_version.id,
+                "model_version": f"v{new_model_version.version}.0",
+                "created_at": first + timedelta(days=days),
+            }
+            for days, probability in predictions
+        ],
+    )
+    db.commit()
+
+    # Test that the predictions of the same day are reduced to the last one,
+    # and only the most recent days are kept
+    history = crud.get_student_risk_history(
+        db,
+        student_id,
+        points=3,
+        interval=constants.RiskHistoryInterval.DAY,
+        model_version_id=new_model_version.id,
+    )
+    assert [point["dropout_probability"] for point in history] == [0.5, 0.8, 0.9]
+
+    # Test that the history is split in evenly spaced buckets (5 days wide),
+    # the last prediction of every bucket is kept
+    history = crud.get_student_risk_history(
+        db, student_id, points=2, model_version_id=new_model_version.id
+    )
+    assert len(history) == 2
+    assert [point["dropout_probability"] for point in history] == [0.2, 0.9]
+    assert [point["bucket"] for point in history] == [
+        first,
+        first + timedelta(days=5),
+    ]
+
+
+def test_publish_prediction_run(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id).limit(1)).scalar_one()
+    run = crud.create_prediction_run(db, new_model_version)
+    crud.create_predictions(
+        db, [(student_id, 0.9, None)], model_version=new_model_version, run=run
+    )
+
+    # Test that the predictions of a run in staging are not the latest ones
+    latest = db.execute(
+        select(models.StudentLatestPrediction).filter_by(
+            student_id=student_id, model_version_id=new_model_version.id
+        )
+    ).scalar_one_or_none()
+    assert latest is None
+
+    # Test that publishing the run updates the latest predictions
+    crud.publish_prediction_run(db, run)
+    db.commit()
+    latest = db.execute(
+        select(models.StudentLatestPrediction).filter_by(
+            student_id=student_id, model_version_id=new_model_version.id
+        )
+    ).scalar_one()
+    assert latest.run_id == run.id
+    assert latest.dropout_probability == 0.9
+    assert run.status == constants.PredictionRunStatus.PUBLISHED
+    assert run.rows_count == 1
+
+    # Test that a run can only be published once
+    with pytest.raises(exceptions.PredictionRunNotInStaging):
+        crud.publish_prediction_run(db, run)
+    db.rollback()
+
+
+def test_publish_discarded_prediction_run(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id).limit(1)).scalar_one()
+    run = crud.create_prediction_run(db, new_model_version)
+    crud.create_predictions(
+        db, [(student_id, 0.9, None)], model_version=new_model_version, run=run
+    )
+    crud.discard_prediction_run(db, run)
+
+    # Test that a discarded run is not published
+    with pytest.raises(exceptions.PredictionRunNotInStaging):
+        crud.publish_prediction_run(db, run)
+    db.rollback()
+    assert count_predictions(db, new_model_version.id) == 0
+    assert count_predictions(db, new_model_version.id, "student_latest_prediction") == 0
+
+
+def test_staged_predictions_are_hidden(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id).limit(1)).scalar_one()
+    crud.create_predictions(
+        db, [(student_id, 0.5, None)], model_version=new_model_version
+    )
+    run = crud.create_prediction_run(db, new_model_version)
+    crud.create_predictions(
+        db, [(student_id, 0.99, None)], model_version=new_model_version, run=run
+    )
+
+    staged = db.execute(select(models.Prediction).filter_by(run_id=run.id)).scalar_one()
+
+    # Test that the committed predictions of a run in staging are not in the history
+    history = crud.get_student_risk_history(
+        db, student_id, points=100, model_version_id=new_model_version.id
+    )
+    assert [point["dropout_probability"] for point in history] == [0.5]
+
+    # Test that they are once the run is published
+    crud.publish_prediction_run(db, run)
+    db.commit()
+    history = crud.get_student_risk_history(
+        db, student_id, points=100, model_version_id=new_model_version.id
+    )
+    assert history[-1]["created_at"] == staged.created_at
+    assert history[-1]["dropout_probability"] == 0.99
+
+
+def test_staged_predictions_dont_count_as_scored(db: Session, new_model_version):
+    student = (
+        db.execute(
+            select(student_models.Student).where(
+                student_models.Student.features_hash.is_not(None)
+            )
+        )
+        .scalars()
+        .first()
+    )
+    scored_stmt = student_crud.get_students_for_ia_stmt(
+        model_version=new_model_version
+    ).where(student_models.Student.id == student.id)
+    run = crud.create_prediction_run(db, new_model_version)
+    crud.create_predictions(
+        db,
+        [(student.id, 0.5, student.features_hash)],
+        model_version=new_model_version,
+        run=run,
+    )
+
+    # Test that a student scored by a discarded run is scored again
+    crud.discard_prediction_run(db, run)
+    assert db.execute(scored_stmt).first() is not None
+
+    # Test that a student only counts as scored once its run is published
+    run = crud.create_prediction_run(db, new_model_version)
+    crud.create_predictions(
+        db,
+        [(student.id, 0.5, student.features_hash)],
+        model_version=new_model_version,
+        run=run,
+    )
+    # While the run is in staging
+    assert db.execute(scored_stmt).first() is not None
+    crud.publish_prediction_run(db, run)
+    db.commit()
+    assert db.execute(scored_stmt).first() is None
+
+
+def count_predictions(db: Session, model_version_id: int, table: str = "predictions"):
+    return db.execute(
+        text(f"SELECT count(*) FROM {table} WHERE model_version_id = :id"),
+        {"id": model_version_id},
+    ).scalar()
+
+
+def test_compact_predictions(db: Session, new_model_version):
+    student_ids = db.execute(select(student_models.Student.id).limit(2)).scalars().all()
+    for probability in (0.1, 0.2, 0.3, 0.4):
+        crud.create_predictions(
+            db,
+            [(student_id, probability, None) for student_id in student_ids],
+            model_version=new_model_version,
+        )
+
+    # Test that only the latest `keep` predictions of every student survive
+    deleted = crud.compact_predictions(db, new_model_version, keep=2)
+    assert deleted == 2 * len(student_ids)
+    for student_id in student_ids:
+        probabilities = (
+            db.execute(
+                select(models.Prediction.dropout_probability)
+                .filter_by(student_id=student_id, model_version_id=new_model_version.id)
+                .order_by(models.Prediction.id)
+            )
+            .scalars()
+            .all()
+        )
+        assert probabilities == [0.3, 0.4]
+
+
+def test_drop_predictions_detaches_partition(db: Session, new_model_version):
+    student_ids = db.execute(select(student_models.Student.id).limit(3)).scalars().all()
+    assert crud.create_predictions_partition(db, new_model_version)
+    crud.create_predictions(
+        db,
+        [(student_id, 0.5, None) for student_id in student_ids],
+        model_version=new_model_version,
+    )
+    partition = crud.get_partition_name(new_model_version.id)
+    assert count_predictions(db, new_model_version.id, partition) == len(student_ids)
+
+    # Test that the partition of the model version is detached and dropped
+    assert crud.drop_predictions(db, new_model_version)
+    assert db.execute(select(func.to_regclass(partition))).scalar() is None
+    assert count_predictions(db, new_model_version.id) == 0
+    assert count_predictions(db, new_model_version.id, "student_latest_prediction") == 0
+
+    # Test that dropping it again is a no-op that keeps the data version
+    data_version = report_crud.get_data_version(db, ["student_latest_prediction"])
+    assert not crud.drop_predictions(db, new_model_version)
+    assert (
+        report_crud.get_data_version(db, ["student_latest_prediction"]) == data_version
+    )
+
+
+def test_drop_predictions_in_default_partition(db: Session, new_model_version):
+    student_ids = db.execute(select(student_models.Student.id).limit(3)).scalars().all()
+    crud.create_predictions(
+        db,
+        [(student_id, 0.5, None) for student_id in student_ids],
+        model_version=new_model_version,
+    )
+    assert count_predictions(
+        db, new_model_version.id, constants.PREDICTIONS_DEFAULT_PARTITION
+    ) == len(student_ids)
+
+    # Test that the predictions in the default partition are deleted, not the partition
+    assert crud.drop_predictions(db, new_model_version)
+    assert count_predictions(db, new_model_version.id) == 0
+    assert count_predictions(db, new_model_version.id, "student_latest_prediction") == 0
+    assert (
+        db.execute(
+            select(func.to_regclass(constants.PREDICTIONS_DEFAULT_PARTITION))
+        ).scalar()
+        is not None
+    )
+
+
+def test_fail_interrupted_prediction_jobs(db: Session, new_model_version):
+    student_id = db.execute(select(student_models.Student.id)).scalars().first()
+    lost_at = get_now_utc() - timedelta(
+        seconds=settings.PREDICTION_JOB_HEARTBEAT_TIMEOUT + 1
+    )
+    lost_job = crud.create_prediction_job(db, new_model_version)
+    lost_job.status = constants.PredictionJobStatus.RUNNING
+    lost_job.started_at = lost_job.heartbeat_at = lost_at
+    lost_run = crud.create_prediction_run(db, new_model_version, job=lost_job)
+    crud.create_predictions(
+        db, [(student_id, 0.5, None)], new_model_version, run=lost_run
+    )
+    live_job = crud.create_prediction_job(db, new_model_version)
+    live_job.status = constants.PredictionJobStatus.RUNNING
+    live_job.started_at = lost_at
+    live_job.heartbeat_at = get_now_utc()
+    live_run = crud.create_prediction_run(db, new_model_version, job=live_job)
+    db.commit()
+
+    # Test that only the jobs without recent heartbeats are failed
+    assert crud.fail_interrupted_prediction_jobs(db) == 1
+    db.refresh(lost_job)
+    db.refresh(lost_run)
+    db.refresh(live_job)
+    assert lost_job.status == constants.PredictionJobStatus.FAILED
+    assert lost_job.finished_at is not None
+    assert lost_run.status == constants.PredictionRunStatus.DISCARDED
+    assert count_predictions(db, new_model_version.id) == 0
+    assert live_job.status == constants.PredictionJobStatus.RUNNING
+    db.refresh(live_run)
+    assert live_run.status == constants.PredictionRunStatus.STAGING
+
+    # Test that the discarded run of the failed job can't be published
+    with pytest.raises(exceptions.PredictionRunNotInStaging):
+        crud.publish_prediction_run(db, lost_run)
+    db.rollback()
+    live_job.status = constants.PredictionJobStatus.FAILED
+    db.commit()
+
+
+def test_claim_prediction_job(db: Session, new_model_version):
+    job = crud.create_prediction_job(db, new_model_version)
+
+    # Test that a pending job is only claimed once
+    claimed = crud.claim_prediction_job(db, job.id)
+    assert claimed.status == constants.PredictionJobStatus.RUNNING
+    assert claimed.heartbeat_at is not None
+    assert crud.claim_prediction_job(db, job.id) is None
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+from app.predictions.encoder import FeatureEncoder
+
+FACULTY_MAPPING = {1: "FCTI", 2: "FCS"}
+
+
+def get_student_rows():
+    return pd.DataFrame(
+        [
+            {
+                "id": 1,
+                "faculty_id": 1,
+                "fecha_nac": "1990-05-10",
+                "nro_hijos": 0,
+                "anio_egreso": 2008,
+                "cuantos_colegios_secundaria": 1,
+                "estado_civil": "S",
+                "vive_con": "Solo",
+            },
+            {
+                "id": 2,
+                "faculty_id": 2,
+                "fecha_nac": "2010-01-01",
+                "nro_hijos": 2,
+                "anio_egreso": 2018,
+                "cuantos_colegios_secundaria": 2,
+                "estado_civil": "C",
+                "vive_con": "Companeros",
+            },
+        ]
+    )
+
+
+def test_from_vocabularies_drops_first_category():
+    encoder = FeatureEncoder.from_vocabularies(sorted(FACULTY_MAPPING.values()))
+
+    # The first category in sorted order is used as the reference
+    assert "facultad_FCTI" in encoder.columns
+    assert "facultad_FCS" not in encoder.columns
+    assert "estado_civil_S" in encoder.columns
+    assert "estado_civil_C" not in encoder.columns
+    assert encoder.columns[:4] == [
+        "nro_hijos",
+        "anio_egreso",
+        "cuantos_colegios_secundaria",
+        "edad",
+    ]
+
+
+def test_transform_keeps_model_column_order():
+    columns = ["vive_con_Solo", "edad", "facultad_FCS", "nro_hijos", "estado_civil_S"]
+    encoder = FeatureEncoder(columns)
+
+    features = encoder.transform(get_student_rows(), FACULTY_MAPPING)
+
+    assert features.shape == (2, len(columns))
+    np.testing.assert_array_equal(
+        features,
+        np.array(
+            [
+                [1.0, 29.0, 0.0, 0.0, 1.0],
+                # Age is never lower than 17
+                [0.0, 17.0, 1.0, 2.0, 0.0],
+            ]
+        ),
+    )
+
+
+def test_transform_matches_get_dummies():
+    df = get_student_rows()
+    encoder = FeatureEncoder.from_vocabularies(sorted(FACULTY_MAPPING.values()))
+
+    features = encoder.transform(df, FACULTY_MAPPING)
+
+    dummies = pd.get_dummies(
+        df.assign(facultad=df["faculty_id"].map(FACULTY_MAPPING))[
+            ["facultad", "estado_civil", "vive_con"]
+        ]
+    )
+    for column in dummies.columns:
+        if column in encoder.columns:
+            np.testing.assert_array_equal(
+                features[:, encoder.columns.index(column)],
+                dummies[column].to_numpy(dtype=np.float64),
+            )
+
+
+def test_transform_records_matches_transform():
+    df = get_student_rows()
+    encoder = FeatureEncoder.from_vocabularies(sorted(FACULTY_MAPPING.values()))
+
+    records = df.assign(facultad=df["faculty_id"].map(FACULTY_MAPPING)).to_dict(
+        orient="records"
+    )
+    for record in records:
+        record["fecha_nac"] = pd.to_datetime(record["fecha_nac"]).date()
+
+    np.testing.assert_array_equal(
+        encoder.transform_records(records), encoder.transform(df, FACULTY_MAPPING)
+    )
@@ -0,0 +1,58 @@
+from unittest.mock import Mock
+
+from app.config import settings
+from app.reports import cache as report_cache_module
+from app.reports.cache import ReportCache
+
+
+def compute_counter():
+    calls = []
+
+    def compute(db):
+        calls.append(db)
+        return {"total_students": len(calls)}
+
+    return compute, calls
+
+
+def test_report_cache_hits_and_invalidation(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_CACHE_TTL", 60)
+    monkeypatch.setattr(
+        report_cache_module.crud, "get_data_version", lambda db, tables: 1
+    )
+    cache = ReportCache(max_size=2)
+    compute, calls = compute_counter()
+
+    # Test that repeated reports are computed once
+    assert cache.get_or_compute(None, "report", compute) == {"total_students": 1}
+    assert cache.get_or_compute(None, "report", compute) == {"total_students": 1}
+    assert len(calls) == 1
+
+    # Test that an invalidation (published run, written student) recomputes it
+    cache.invalidate()
+    assert cache.get_or_compute(None, "report", compute) == {"total_students": 2}
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 2
+
+
+def test_report_cache_serves_stale_results(monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_CACHE_TTL", 60)
+    monkeypatch.setattr(
+        report_cache_module.crud, "get_data_version", lambda db, tables: 1
+    )
+    cache = ReportCache(max_size=2)
+    compute, calls = compute_counter()
+    cache.get_or_compute(None, "report", compute)
+    revalidations = []
+    monkeypatch.setattr(
+        report_cache_module.threading,
+        "Thread",
+        lambda target, args, daemon: revalidations.append(args) or Mock(),
+    )
+    cache._entries["report"].validated_at -= 61
+
+    # Test that a stale result is served while it's revalidated
+    assert cache.get_or_compute(None, "report", compute) == {"total_students": 1}
+    assert len(calls) == 1
+    assert len(revalidations) == 1
+    assert cache.get_stats()["stale_hits"] == 1
@@ -0,0 +1,203 @@
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.faculties import models as faculty_models
+from app.model_versions import crud as model_version_crud
+from app.predictions import crud as prediction_crud
+from app.predictions import models as prediction_models
+from app.reports import crud as report_crud
+from app.reports.models import ReportSnapshot
+from app.reports.service import (
+    FACTORS_TO_ANALYZE,
+    ReportService,
+    build_dropout_distribution,
+    build_faculty_dropout_distribution,
+    get_bucket_labels,
+    get_distribution_rows,
+    get_factors_impact,
+)
+from app.students import constants as student_constants
+from app.students import models as student_models
+
+
+def test_get_bucket_labels():
+    assert get_bucket_labels(10)[0] == "0-10%"
+    assert get_bucket_labels(10)[-1] == "90-100%"
+    assert get_bucket_labels(3) == ["0-33.3%", "33.3-66.7%", "66.7-100%"]
+
+
+def test_get_dropout_probability_distribution(test_client, db: Session):
+    model_version = model_version_crud.get_active_model_version(db)
+    probabilities = (
+        db.execute(
+            select(prediction_models.StudentLatestPrediction.dropout_probability)
+            .join(
+                student_models.Student,
+                prediction_models.StudentLatestPrediction.student_id
+                == student_models.Student.id,
+            )
+            .where(
+                prediction_models.StudentLatestPrediction.model_version_id
+                == (model_version.id if model_version else None),
+                student_models.Student.estado == student_constants.EstadoEnum.VIGENTE,
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    # Test that the aggregation in the database matches the rows
+    report = ReportService(db).get_dropout_probability_distribution(
+        buckets=5, high_risk_threshold=0.8, medium_risk_threshold=0.5
+    )
+    assert report["total_students"] == len(probabilities)
+    assert list(report["distribution"]) == get_bucket_labels(5)
+    assert report["distribution"]["80-100%"] == sum(p >= 0.8 for p in probabilities)
+    assert report["risk_summary"]["high_risk"]["count"] == sum(
+        p >= 0.8 for p in probabilities
+    )
+    assert report["risk_summary"]["medium_risk"]["count"] == sum(
+        0.5 <= p < 0.8 for p in probabilities
+    )
+    assert report["risk_summary"]["low_risk"]["count"] == sum(
+        p < 0.5 for p in probabilities
+    )
+
+
+def test_get_dashboard(test_client, db: Session):
+    service = ReportService(db)
+    dashboard = service.get_dashboard(buckets=5)
+
+    # Test that the single read gives the same reports as the separate endpoints
+    assert dashboard["dropout_distribution"] == (
+        service.get_dropout_probability_distribution(buckets=5)
+    )
+    assert dashboard["faculty_dropout_distribution"] == (
+        service.get_faculty_dropout_distribution(buckets=5)
+    )
+    assert dashboard["dropout_factors_impact"] == service.get_dropout_factors_impact()
+
+
+def test_create_report_snapshots(test_client, db: Session):
+    model_version = model_version_crud.get_active_model_version(db)
+    service = ReportService(db)
+    dashboard = jsonable_encoder(service.get_dashboard())
+    faculty_id = db.execute(select(faculty_models.Faculty.id)).scalars().first()
+    faculty_dashboard = jsonable_encoder(service.get_dashboard(faculty_id))
+
+    run = prediction_crud.create_prediction_run(db, model_version, commit=False)
+
+    # Test that a run without predictions doesn't write snapshots
+    assert service.create_report_snapshots(run) == []
+
+    # Staged predictions, the reports don't change until the run is published
+    student_id = db.execute(select(student_models.Student.id)).scalars().first()
+    prediction_crud.create_predictions(
+        db, [(student_id, 0.5, None)], model_version, commit=False, run=run
+    )
+    snapshots = service.create_report_snapshots(run)
+
+    # Test that a snapshot is written for every faculty plus one of all of them
+    assert (
+        len(snapshots) == len(db.execute(select(faculty_models.Faculty.id)).all()) + 1
+    )
+    assert snapshots[0].faculty_id is None
+    assert snapshots[0].data == dashboard
+
+    # Test that the reports are served from the latest snapshot
+    assert service.get_dashboard() == dashboard
+    assert service.get_dashboard(faculty_id) == faculty_dashboard
+    assert service.get_dropout_factors_impact() == dashboard["dropout_factors_impact"]
+
+    # Test that other parameters are computed live
+    assert list(
+        service.get_dropout_probability_distribution(buckets=5)["distribution"]
+    ) == (get_bucket_labels(5))
+
+    # Test that a student written afterwards makes the snapshot stale
+    assert service.get_dashboard() is snapshots[0].data
+    report_crud.bump_data_version(db, student_models.Student.__tablename__)
+    assert service.get_dashboard() is not snapshots[0].data
+    assert service.get_dashboard() == dashboard
+    db.rollback()
+
+
+def test_create_report_snapshots_retention(test_client, db: Session, monkeypatch):
+    monkeypatch.setattr(settings, "REPORT_SNAPSHOT_RETENTION", 2)
+    model_version = model_version_crud.get_active_model_version(db)
+    student_id = db.execute(select(student_models.Student.id)).scalars().first()
+    service = ReportService(db)
+    runs = []
+    for _ in range(3):
+        run = prediction_crud.create_prediction_run(db, model_version, commit=False)
+        prediction_crud.create_predictions(
+            db, [(student_id, 0.5, None)], model_version, commit=False, run=run
+        )
+        service.create_report_snapshots(run)
+        runs.append(run)
+
+    # Test that only the snapshots of the latest runs are kept
+    run_ids = (
+        db.execute(
+            select(ReportSnapshot.run_id)
+            .where(ReportSnapshot.model_version_id == model_version.id)
+            .distinct()
+        )
+        .scalars()
+        .all()
+    )
+    assert sorted(run_ids) == [runs[1].id, runs[2].id]
+    db.rollback()
+
+
+def test_get_distribution_rows():
+    df = pd.DataFrame(
+        {
+            "faculty_name": ["FPUNE", "FPUNE", "FCS", "FCS"],
+            "dropout_probability": [0.0, 0.2, 0.75, 1.0],
+        },
+        dtype=object,
+    )
+
+    rows = get_distribution_rows(
+        df, 4, high_risk_threshold=0.75, medium_risk_threshold=0.2
+    )
+    distribution = build_dropout_distribution(rows, 4)
+
+    # Test that the buckets match width_bucket, 1.0 belongs to the last one
+    assert distribution["distribution"] == {
+        "0-25%": 2,
+        "25-50%": 0,
+        "50-75%": 0,
+        "75-100%": 2,
+    }
+    assert distribution["risk_summary"]["high_risk"]["count"] == 2
+    assert distribution["risk_summary"]["medium_risk"]["count"] == 1
+    assert distribution["risk_summary"]["low_risk"]["count"] == 1
+    assert build_faculty_dropout_distribution(rows, 4)["faculty_distributions"] == {
+        "FPUNE": {"0-25%": 2, "25-50%": 0, "50-75%": 0, "75-100%": 0},
+        "FCS": {"0-25%": 0, "25-50%": 0, "50-75%": 0, "75-100%": 2},
+    }
+
+
+def test_get_factors_impact():
+    df = pd.DataFrame(
+        {factor_key: [None] * 4 for factor_key, _ in FACTORS_TO_ANALYZE},
+        dtype=object,
+    )
+    df["nro_hijos"] = pd.Series([0, 2, 2, None], dtype=object)
+    df["vive_con"] = pd.Series(["Solo", "Solo", "Padres", "Padres"], dtype=object)
+    df["dropout_probability"] = [0.2, 0.8, 0.6, 0.9]
+
+    factors = get_factors_impact(df)
+
+    # Test that factors without data are skipped and the impacts are normalized
+    assert [item["factor"] for item in factors] == ["Número de hijos", "Vive con"]
+    assert factors[0]["impact_score"] == 100.0
+    # Test that the description has the database value of the riskiest group
+    assert "número de hijos '2'" in factors[0]["description"]
+    assert factors[0]["description"].endswith("70.0%")
+    assert "vive con 'Padres'" in factors[1]["description"]
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.students import constants, exceptions
+from app.students.helpers import decode_cursor, encode_cursor, get_features_hash
+
+
+def get_student_features():
+    return {
+        "faculty_id": 1,
+        "estado_civil": constants.EstadoCivilEnum.SOLTERO,
+        "fecha_nac": date(1990, 5, 10),
+        "nro_hijos": 0,
+        "anio_egreso": 2008,
+        "cuantos_colegios_secundaria": 1,
+        "vive_con": constants.ViveConEnum.SOLO,
+    }
+
+
+def test_features_hash_is_stable_across_sources():
+    # Values read with pandas (seeder) have the same fingerprint as request values
+    features = get_student_features()
+    seeded = {
+        **features,
+        "estado_civil": "S",
+        "vive_con": "Solo",
+        "fecha_nac": pd.Timestamp("1990-05-10"),
+        "nro_hijos": 0.0,
+    }
+    assert get_features_hash(features) == get_features_hash(seeded)
+
+
+def test_features_hash_changes_with_features():
+    features = get_student_features()
+    changed = {**features, "nro_hijos": 1}
+    assert get_features_hash(features) != get_features_hash(changed)
+
+    # Columns not used by the models don't change the fingerprint
+    renamed = {**features, "first_name": "Juan"}
+    assert get_features_hash(features) == get_features_hash(renamed)
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor([0.75, 42])
+    assert decode_cursor(cursor) == [0.75, 42]
+
+
+def test_invalid_cursor():
+    # Test that tampered cursors are rejected
+    for cursor in ["not-a-cursor", encode_cursor(["0.75", 42]), encode_cursor([1])]:
+        with pytest.raises(exceptions.InvalidCursor):
+            decode_cursor(cursor)
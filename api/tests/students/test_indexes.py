@@ -0,0 +1,136 @@
+import pytest
+from fastapi_pagination import LimitOffsetParams, set_page, set_params
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal, engine
+from app.faculties import constants as faculty_constants
+from app.faculties import models as faculty_models
+from app.pagination import LimitOffsetPage
+from app.reports.service import ReportService
+from app.students import constants, crud
+
+# Students of a medium-sized university
+STUDENTS = 100_000
+# Small faculty, ~3% of the students
+SMALL_FACULTY = faculty_constants.FacultiesOptions.FCS
+
+# Inserts and analyzes STUDENTS students, opt-in with --run-slow
+pytestmark = pytest.mark.slow
+
+
+@pytest.fixture(scope="module")
+def students_at_scale(setup_database):
+    """
+    Add STUDENTS students (80% current, 15% graduated, 5% dropped out, 2%
+    archived) with their latest prediction, once for the tests of the module
+    and in a single transaction. The rows are rolled back at the end, and the
+    tables analyzed again: the row estimates of ANALYZE survive a rollback.
+    """
+    db = SessionLocal()
+    small_faculty_id = db.execute(
+        select(faculty_models.Faculty.id).filter_by(short_name=SMALL_FACULTY.value)
+    ).scalar_one()
+    db.execute(
+        text(
+            "INSERT INTO students "
+            "(faculty_id, first_name, last_name, estado, archived, created_at) "
+            "SELECT CASE WHEN i % 100 < 3 THEN :small_faculty_id "
+            "ELSE f.ids[1 + i % array_length(f.ids, 1)] END, "
+            "'Nombre ' || i, 'Apellido ' || i, "
+            "CASE WHEN i % 20 < 16 THEN 'V' WHEN i % 20 < 19 THEN 'E' ELSE 'A' END, "
+            "i % 50 = 0, now() "
+            "FROM generate_series(1, :students) AS i, "
+            "(SELECT array_agg(id) AS ids FROM faculties WHERE id <> :small_faculty_id) AS f"
+        ),
+        {"students": STUDENTS, "small_faculty_id": small_faculty_id},
+    )
+    db.execute(
+        text(
+            "INSERT INTO student_latest_prediction "
+            "(student_id, model_version_id, model_version, dropout_probability, created_at) "
+            "SELECT s.id, mv.id, 'v' || mv.version || '.0', random(), now() "
+            "FROM students s, model_versions mv WHERE mv.is_active "
+            "ON CONFLICT DO NOTHING"
+        )
+    )
+    db.execute(text("ANALYZE students"))
+    db.execute(text("ANALYZE student_latest_prediction"))
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.execute(text("ANALYZE students"))
+        db.execute(text("ANALYZE student_latest_prediction"))
+        db.commit()
+        db.close()
+
+
+def get_used_indexes(db: Session, run) -> set[str]:
+    """Indexes of students used by the statements the function runs"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        if "students" in statement and statement.lstrip().upper().startswith("SELECT"):
+            statements.append(cursor.mogrify(statement, parameters).decode())
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    indexes = set()
+    for statement in statements:
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        nodes = [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Relation Name") == "students" and "Index Name" in node:
+                indexes.add(node["Index Name"])
+            nodes.extend(node.get("Plans", []))
+    return indexes
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        ({"faculty": SMALL_FACULTY}, "students_vigente_faculty_id_idx"),
+        ({"estado": constants.EstadoEnum.ABANDONO}, "students_estado_faculty_id_idx"),
+        ({"archived": True}, "students_archived_idx"),
+    ],
+)
+def test_get_students_uses_indexes(students_at_scale: Session, filters, index):
+    db = students_at_scale
+    set_page(LimitOffsetPage)
+    set_params(LimitOffsetParams(limit=50, offset=0))
+
+    # Test that the selective filters of the listing are served by an index
+    indexes = get_used_indexes(
+        db,
+        lambda: crud.get_students(
+            db, min_probability=0, max_probability=100, **filters
+        ),
+    )
+    assert index in indexes
+
+
+@pytest.mark.parametrize(
+    "report",
+    [
+        "get_dropout_probability_distribution",
+        "get_dropout_factors_impact",
+        "get_dashboard",
+    ],
+)
+def test_reports_use_indexes(students_at_scale: Session, report):
+    db = students_at_scale
+    faculty_id = db.execute(
+        select(faculty_models.Faculty.id).filter_by(short_name=SMALL_FACULTY.value)
+    ).scalar_one()
+
+    # Test that the reports of a faculty read its current students by index
+    indexes = get_used_indexes(
+        db, lambda: getattr(ReportService(db), report)(faculty_id=faculty_id)
+    )
+    assert "students_vigente_faculty_id_idx" in indexes
@@ -0,0 +1,83 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.predictions import crud as prediction_crud
+from app.predictions import models as prediction_models
+from app.students import constants, models
+
+
+def test_get_students_by_cursor(
+    authorized_client_as_supervisor: TestClient, db: Session, new_model_version
+):
+    student_ids = (
+        db.execute(
+            select(models.Student.id)
+            .filter_by(estado=constants.EstadoEnum.VIGENTE)
+            .order_by(models.Student.id)
+            .limit(5)
+        )
+        .scalars()
+        .all()
+    )
+    # Ties in the probability split the pages by id
+    probabilities = [0.55, 0.9, 0.55, 0.2, 0.55]
+    prediction_crud.create_predictions(
+        db,
+        [
+            (student_id, probability, None)
+            for student_id, probability in zip(student_ids, probabilities)
+        ],
+        model_version=new_model_version,
+    )
+    expected_ids = (
+        db.execute(
+            select(models.Student.id)
+            .join(
+                prediction_models.StudentLatestPrediction,
+                prediction_models.StudentLatestPrediction.student_id
+                == models.Student.id,
+            )
+            .where(
+                prediction_models.StudentLatestPrediction.model_version_id
+                == new_model_version.id,
+                models.Student.estado == constants.EstadoEnum.VIGENTE,
+            )
+            .order_by(
+                prediction_models.StudentLatestPrediction.dropout_probability.desc(),
+                models.Student.id,
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    # Walk every page of the listing
+    pages = 0
+    seen_ids = []
+    cursor = None
+    while True:
+        params = {
+            "limit": 2,
+            "min_probability": 0,
+            "max_probability": 100,
+            "model_version_id": new_model_version.id,
+        }
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = authorized_client_as_supervisor.get(
+            "/api/v1/supervisor/students/cursor", params=params
+        )
+        assert response.status_code == 200
+        data = response.json()
+        pages += 1
+        for student in data["items"]:
+            seen_ids.append(student["id"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    # Test that the pages follow the full ordered query, no student is
+    # repeated or missed
+    assert pages == 3
+    assert seen_ids == expected_ids
@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import literal, select
+
+from app import pagination
+from app.config import settings
+from app.pagination import CountCache, LimitOffsetParamsWithoutTotal, TotalStrategy
+
+
+def test_count_cache_invalidated_by_data_version(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CACHE_TTL", 60)
+    cache = CountCache(max_size=2)
+    cache.set("students", data_version=1, total=10)
+    assert cache.get("students", data_version=1) == 10
+
+    # Test that a write to the tables of the query invalidates the count
+    assert cache.get("students", data_version=2) is None
+    assert cache.get("students", data_version=1) is None
+
+
+def test_count_cache_max_size(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CACHE_TTL", 60)
+    cache = CountCache(max_size=2)
+    for idx, key in enumerate(["users", "faculties", "students"]):
+        cache.set(key, data_version=1, total=idx)
+
+    # The least recently used count is evicted
+    assert cache.get("users", data_version=1) is None
+    assert cache.get("students", data_version=1) == 2
+
+
+def test_params_skip_count_query():
+    params = LimitOffsetParamsWithoutTotal(limit=10, offset=20)
+    raw_params = params.to_raw_params()
+    assert raw_params.include_total is False
+    assert (raw_params.limit, raw_params.offset) == (10, 20)
+
+
+def mock_get_total_queries(monkeypatch, cache: CountCache, estimated: int) -> list[str]:
+    """Replace the queries of get_total, returns the EXPLAINs run"""
+    explains = []
+
+    def get_estimated_count(db, stmt):
+        explains.append(stmt)
+        return estimated
+
+    monkeypatch.setattr(pagination, "count_cache", cache)
+    monkeypatch.setattr(pagination, "get_estimated_count", get_estimated_count)
+    monkeypatch.setattr(pagination, "get_count_cache_key", lambda db, stmt: stmt)
+    monkeypatch.setattr(pagination, "get_data_version", lambda db, stmt: 1)
+    return explains
+
+
+def test_get_total_estimates_only_large_listings(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CACHE_TTL", 60)
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_STRATEGY", "estimate")
+    cache = CountCache(max_size=2)
+    cache.set("faculties", data_version=1, total=10)
+    explains = mock_get_total_queries(monkeypatch, cache, estimated=500_000)
+
+    # Test that the queries that don't allow estimates are never explained
+    assert pagination.get_total(None, "faculties") == (10, TotalStrategy.CACHED)
+    assert explains == []
+    assert pagination.get_total(None, "students", estimate=True) == (
+        500_000,
+        TotalStrategy.ESTIMATED,
+    )
+
+
+def test_get_total_auto_uses_cached_count(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CACHE_TTL", 60)
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_STRATEGY", "auto")
+    monkeypatch.setattr(settings, "PAGINATION_ESTIMATE_THRESHOLD", 100_000)
+    cache = CountCache(max_size=2)
+    cache.set("students", data_version=1, total=42)
+    explains = mock_get_total_queries(monkeypatch, cache, estimated=500_000)
+
+    # Test that a cached count is served without asking the planner
+    assert pagination.get_total(None, "students", estimate=True) == (
+        42,
+        TotalStrategy.CACHED,
+    )
+    assert explains == []
+
+    # Test that a miss of a large result set is estimated
+    assert pagination.get_total(None, "predictions", estimate=True) == (
+        500_000,
+        TotalStrategy.ESTIMATED,
+    )
+    assert explains == ["predictions"]
+
+
+def test_get_total_doesnt_cache_unversioned_tables(monkeypatch):
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CACHE_TTL", 60)
+    cache = CountCache(max_size=2)
+    cache.set("users", data_version=1, total=10)
+    mock_get_total_queries(monkeypatch, cache, estimated=0)
+    monkeypatch.setattr(pagination, "get_count_cache_key", lambda db, stmt: "users")
+    monkeypatch.setattr(pagination, "get_data_version", lambda db, stmt: None)
+    db = MagicMock()
+    db.execute.return_value.scalar.return_value = 12
+
+    # Test that the queries on tables without data version are always counted
+    assert pagination.get_total(db, select(literal(1))) == (12, TotalStrategy.EXACT)
+    assert db.execute.call_count == 1